@@ -0,0 +1,174 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Iterable
+
+from telegram import ReplyMarkup
+from telegram.error import TelegramError, RetryAfter
+
+from constants.globals import logger, BROADCAST_MESSAGES_PER_SECOND
+from message_queue import MQBot, Priority
+
+
+class Broadcast:
+    """
+    Progress of one message that is delivered to many chats
+    """
+
+    def __init__(self, text: str, total: int):
+        self.text = text
+        self.total = total
+        self.delivered = 0
+        self.failed = {}  # Chat id -> error
+        self.started_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        if total == 0:
+            self._done.set()
+
+    @property
+    def pending(self) -> int:
+        return self.total - self.delivered - len(self.failed)
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._done.wait(timeout)
+
+    def record_delivery(self, chat_id, error: Exception = None):
+        with self._lock:
+            if error is None:
+                self.delivered += 1
+            else:
+                self.failed[chat_id] = error
+
+            if self.pending == 0:
+                logger.info(f"Broadcast delivered to {self.delivered} of {self.total} chats "
+                            f"({len(self.failed)} failed) in {time.monotonic() - self.started_at:.1f}s: "
+                            f"{self.text[:40]!r}")
+                self._done.set()
+
+
+class Broadcaster:
+    """
+    Delivers messages to many chats in the background, so the job that triggers a broadcast doesn't wait for it.
+    A scheduler thread paces the deliveries against the global limit of Telegram and the limits per chat
+    (1 message per second for users, 20 per minute for groups) and hands them to the bulk lane of the message queue.
+    At most max_pending_deliveries are in the message queue at a time, the others wait in the scheduler.
+    A RetryAfter of Telegram pauses all deliveries for the requested time.
+    """
+
+    def __init__(self,
+                 bot,
+                 messages_per_second: float = BROADCAST_MESSAGES_PER_SECOND,
+                 user_chat_interval_in_seconds: float = 1,
+                 group_chat_interval_in_seconds: float = 3,
+                 max_pending_deliveries: int = 20,
+                 on_chat_blocked: Callable[[int], None] = None):
+        self._bot = bot
+        self._interval_in_seconds = 1 / messages_per_second
+        self._user_chat_interval_in_seconds = user_chat_interval_in_seconds
+        self._group_chat_interval_in_seconds = group_chat_interval_in_seconds
+        self._max_pending_deliveries = max_pending_deliveries
+        self._on_chat_blocked = on_chat_blocked
+        self._condition = threading.Condition()
+        self._deliveries = []  # Heap of (earliest send time, sequence number, broadcast, chat id, reply markup)
+        self._sequence = itertools.count()
+        self._pending_deliveries = 0  # Handed to the message queue and not done yet
+        self._next_slot = 0
+        self._chat_next_slots = {}
+        self._scheduler = None
+
+    def broadcast(self, chat_ids: Iterable[int], text: str, reply_markup: ReplyMarkup = None) -> Broadcast:
+        """
+        Enqueues the message for all chats and returns its progress right away
+        """
+
+        chat_ids = list(chat_ids)
+        broadcast = Broadcast(text=text, total=len(chat_ids))
+        # Serialized once instead of once per chat
+        reply_markup = reply_markup.to_json() if reply_markup is not None else None
+
+        with self._condition:
+            for chat_id in chat_ids:
+                heapq.heappush(self._deliveries, (0, next(self._sequence), broadcast, chat_id, reply_markup))
+            self._start_scheduler()
+            self._condition.notify()
+
+        return broadcast
+
+    def _start_scheduler(self):
+        if self._scheduler is None:
+            self._scheduler = threading.Thread(target=self._schedule, name='broadcast-scheduler', daemon=True)
+            self._scheduler.start()
+
+    def _schedule(self):
+        while True:
+            with self._condition:
+                delivery = self._next_delivery()
+                self._pending_deliveries += 1
+            self._deliver(*delivery)
+
+    def _next_delivery(self) -> tuple:
+        while True:
+            now = time.monotonic()
+            if not self._deliveries or self._pending_deliveries >= self._max_pending_deliveries:
+                self._condition.wait()
+                continue
+
+            send_at = max(self._deliveries[0][0], self._next_slot)
+            if send_at > now:
+                self._condition.wait(send_at - now)
+                continue
+
+            _, _, broadcast, chat_id, reply_markup = heapq.heappop(self._deliveries)
+            chat_next_slot = self._chat_next_slots.get(chat_id, 0)
+            if chat_next_slot > now:
+                heapq.heappush(self._deliveries, (chat_next_slot, next(self._sequence), broadcast, chat_id,
+                                                  reply_markup))
+                continue
+
+            self._next_slot = now + self._interval_in_seconds
+            self._chat_next_slots[chat_id] = now + (self._group_chat_interval_in_seconds if chat_id < 0
+                                                    else self._user_chat_interval_in_seconds)
+            return broadcast, chat_id, reply_markup
+
+    def _deliver(self, broadcast: Broadcast, chat_id: int, reply_markup: str):
+        if isinstance(self._bot, MQBot):
+            # The bulk lane of the message queue lets alerts and replies of other chats go first
+            try:
+                future = self._bot.send_message(chat_id, broadcast.text, parse_mode='markdown',
+                                                reply_markup=reply_markup, isgroup=chat_id < 0, priority=Priority.BULK)
+            except Exception as e:
+                self._on_delivered(broadcast, chat_id, reply_markup, error=e)
+                return
+            future.add_done_callback(
+                lambda f: self._on_delivered(broadcast, chat_id, reply_markup,
+                                             error=None if f.cancelled() else f.exception()))
+            return
+
+        try:
+            self._bot.send_message(chat_id, broadcast.text, parse_mode='markdown', reply_markup=reply_markup)
+        except Exception as e:
+            self._on_delivered(broadcast, chat_id, reply_markup, error=e)
+            return
+        self._on_delivered(broadcast, chat_id, reply_markup, error=None)
+
+    def _on_delivered(self, broadcast: Broadcast, chat_id: int, reply_markup: str, error: Exception = None):
+        with self._condition:
+            self._pending_deliveries -= 1
+            if isinstance(error, RetryAfter):
+                self._next_slot = max(self._next_slot, time.monotonic() + error.retry_after)
+                heapq.heappush(self._deliveries, (0, next(self._sequence), broadcast, chat_id, reply_markup))
+            self._condition.notify()
+
+        if isinstance(error, RetryAfter):
+            return
+        if isinstance(error, TelegramError):
+            if 'bot was blocked by the user' in error.message and self._on_chat_blocked is not None:
+                self._on_chat_blocked(chat_id)
+            else:
+                logger.warning(f"Broadcast to chat {chat_id} failed: {error}")
+        elif error is not None:
+            logger.error(f"Broadcast to chat {chat_id} failed.", exc_info=error)
+
+        broadcast.record_delivery(chat_id, error=error)
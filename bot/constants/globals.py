@@ -47,9 +47,18 @@ HEALTH_EMOJIS = {
 # Paths
 storage_path = os.sep.join(
     [os.path.dirname(os.path.realpath(__file__)), os.path.pardir, os.path.pardir, 'storage'])
+# session.data is the file of the former PicklePersistence and only read to migrate it
 session_data_path = os.sep.join([storage_path, 'session.data'])
+session_db_path = os.sep.join([storage_path, 'session.sqlite'])
 
 CONNECTION_TIMEOUT = 10
+# Number of hosts that keep a pool of alive connections and number of connections kept per host
+HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', 200))
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 10))
+# Broadcasts are sent in the bulk lane of the message queue, which sends at most 20 messages per second in total
+BROADCAST_MESSAGES_PER_SECOND = float(os.environ.get('BROADCAST_MESSAGES_PER_SECOND', 20))
+# Alerts for a chat are collected during a monitoring tick and sent as one digest, at the latest after this time
+ALERT_DIGEST_WINDOW_IN_SECONDS = 5
 MISSING_FUNDS_THRESHOLD = 10  # Number of cycles that thorchain can be insolvent before a message is sent
 
 REQUEST_POSTFIX = '?height=0'  # currently needed to get correct results due to a bug in thornodes
@@ -58,6 +67,39 @@ REQUEST_POSTFIX = '?height=0'  # currently needed to get correct results due to
 
 MONITORED_STATUSES = ["STANDBY", "READY", "ACTIVE"]
 JOB_INTERVAL_IN_SECONDS = 5 if DEBUG else 30
+# Node probes are shared by all checks and chats. Must be shorter than the job interval, otherwise a tick
+# could read the probe of the previous tick and report a stuck block height.
+NODE_PROBE_MAX_AGE_IN_SECONDS = JOB_INTERVAL_IN_SECONDS / 2
+# The node accounts are shared by all jobs and handlers. Shorter than the job interval for the same reason, the
+# snapshot is only stamped once the download is done and would still be fresh at the next tick otherwise.
+NODE_ACCOUNTS_MAX_AGE_IN_SECONDS = JOB_INTERVAL_IN_SECONDS / 2
+# Number of THORNodes that are probed at the same time and time after which a tick stops waiting for probes
+THORNODE_PROBE_CONCURRENCY = int(os.environ.get('THORNODE_PROBE_CONCURRENCY', 32))
+THORNODE_PROBE_DEADLINE_IN_SECONDS = float(os.environ.get('THORNODE_PROBE_DEADLINE_IN_SECONDS',
+                                                          JOB_INTERVAL_IN_SECONDS * 2 / 3))
+# Follow the blocks of monitored THORNodes over their Tendermint websocket and only poll /status as fallback
+THORNODE_BLOCK_SUBSCRIPTIONS = os.environ.get('THORNODE_BLOCK_SUBSCRIPTIONS', 'False') == 'True'
+# THORChain produces a block about every 5 seconds. A node whose socket is silent for longer gets polled again.
+THORNODE_BLOCK_MAX_SILENCE_IN_SECONDS = 30
+# Nodes whose newest block is older than this are considered catching up
+THORNODE_CATCHING_UP_BLOCK_AGE_IN_SECONDS = 60
+# Follow the heads of Ethereum nodes over eth_subscribe("newHeads") on the websocket at their ip and port
+ETHEREUM_HEAD_SUBSCRIPTIONS = os.environ.get('ETHEREUM_HEAD_SUBSCRIPTIONS', 'False') == 'True'
+# Ethereum produces a block about every 13 seconds. A node that misses this many blocks in a row is stalled.
+ETHEREUM_EXPECTED_BLOCK_TIME_IN_SECONDS = 13
+ETHEREUM_MISSED_BLOCKS_UNTIL_STALLED = 6
+# Number of nodes per chain (Bitcoin, Ethereum, ...) that are probed at the same time and time after which
+# a check stops waiting for probes
+OTHER_NODES_PROBE_CONCURRENCY_PER_CHAIN = int(os.environ.get('OTHER_NODES_PROBE_CONCURRENCY_PER_CHAIN', 4))
+OTHER_NODES_PROBE_DEADLINE_IN_SECONDS = float(os.environ.get('OTHER_NODES_PROBE_DEADLINE_IN_SECONDS',
+                                                             JOB_INTERVAL_IN_SECONDS * 2 / 3))
+# The Binance DEX API allows 5 account requests per second and ip. Balances are shared by all solvency checks of a
+# tick, so asgard and yggdrasil vaults that use the same address are fetched once.
+BINANCE_DEX_REQUESTS_PER_SECOND = float(os.environ.get('BINANCE_DEX_REQUESTS_PER_SECOND', 5))
+BINANCE_BALANCE_MAX_AGE_IN_SECONDS = JOB_INTERVAL_IN_SECONDS / 2
+# The solvency job updates the report every job interval. The solvency stats only check the vaults themselves if the
+# report is older, e.g. because the last check failed.
+SOLVENCY_REPORT_MAX_AGE_IN_SECONDS = JOB_INTERVAL_IN_SECONDS * 2
 
 # Thorchain
 NETWORK_TYPES = ["TESTNET", "CHAOSNET"]
@@ -73,3 +115,8 @@ DEFAULT_SEED_LIST = "https://seed.thorchain.info/" \
 SEED_LIST_URL = os.environ.get("SEED_LIST_URL", DEFAULT_SEED_LIST)
 if SEED_LIST_URL == '':
     SEED_LIST_URL = DEFAULT_SEED_LIST
+
+SEED_LIST_MAX_AGE_IN_SECONDS = 10 * 60
+SEED_NODE_POOL_SIZE = 10  # Number of seed nodes that are probed and scored in the background
+SEED_NODE_EVICTION_TIME_IN_SECONDS = 5 * 60  # Time until a failed seed node gets probed again
+SEED_NODE_REQUEST_ATTEMPTS = 3
@@ -29,13 +29,13 @@ def get_network_health_warning(network_health_status: NetworkHealthStatus) -> st
 
 
 def get_node_healthy_again_message(node_data) -> str:
-    return f"⚕️Node is healthy again⚕️\nAddress: {node_data['node_address']}\nIP: {node_data['ip_address']}\n" \
+    return f"⚕️Node is healthy again⚕️\nAddress: {node_data.node_address}\nIP: {node_data.ip_address}\n" \
 
 
 
 def get_node_health_warning_message(node_data) -> str:
     return "⚠️   ️⚠ ️  ️⚠️  ️ ⚠   ️⚠   ⚠️   ️⚠   ️⚠  ⚠️   ️⚠ ️  ️⚠️  ️ ⚠   ️⚠   ⚠️ \n" \
-           f"Node is *not responding*!\nAddress: {node_data['node_address']}\nIP: {node_data['ip_address']}\n" \
+           f"Node is *not responding*!\nAddress: {node_data.node_address}\nIP: {node_data.ip_address}\n" \
            "\nCheck it's health immediately\n" \
            "⚠️   ️⚠ ️  ️⚠️  ️ ⚠   ️⚠   ⚠️   ️⚠   ️⚠  ⚠️   ️⚠ ️  ️⚠️  ️ ⚠   ️⚠   ⚠️"
 
@@ -2,18 +2,10 @@ import itertools
 from typing import List
 
 from constants.node_ips import *
+from data.singleton import Singleton
 from models.nodes import *
 
 
-class Singleton(type):
-    _instances = {}
-
-    def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
-            cls._instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
-        return cls._instances[cls]
-
-
 class OtherNodesDao(metaclass=Singleton):
     other_nodes = None
 
@@ -0,0 +1,127 @@
+import os
+import pickle
+import sqlite3
+import threading
+from collections import defaultdict
+
+from telegram.ext import BasePersistence
+
+from constants.globals import logger
+
+
+class SqlitePersistence(BasePersistence):
+    """
+    Stores every chat and user in its own row of a SQLite database in WAL mode.
+    PicklePersistence rewrites the whole file on every update. Here an update serializes only the given chat and
+    writes it only if it differs from what is stored already, so most updates don't touch the disk at all.
+    If the database is new and a file of PicklePersistence exists, its data is migrated on start.
+    """
+
+    def __init__(self, filename: str, pickle_filename: str = None, store_user_data=True, store_chat_data=True,
+                 store_bot_data=True):
+        super().__init__(store_user_data=store_user_data,
+                         store_chat_data=store_chat_data,
+                         store_bot_data=store_bot_data)
+        self.filename = filename
+        self._lock = threading.Lock()
+        # Serialized data as stored in the database to find out whether an update changed anything
+        self._stored = {'chat_data': {}, 'user_data': {}, 'bot_data': {}, 'conversations': {}}
+
+        self._connection = sqlite3.connect(filename, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        for table in self._stored:
+            self._connection.execute(f"CREATE TABLE IF NOT EXISTS {table} (id PRIMARY KEY, data BLOB NOT NULL)")
+
+        if pickle_filename and os.path.exists(pickle_filename) and self._is_empty():
+            self._migrate_pickle_file(pickle_filename)
+
+        for table in self._stored:
+            self._stored[table] = dict(self._connection.execute(f"SELECT id, data FROM {table}"))
+
+    def get_user_data(self):
+        return defaultdict(dict, self._load_all('user_data'))
+
+    def get_chat_data(self):
+        return defaultdict(dict, self._load_all('chat_data'))
+
+    def get_bot_data(self):
+        return self._load('bot_data', 'bot_data', {})
+
+    def get_conversations(self, name):
+        return self._load('conversations', name, {})
+
+    def update_user_data(self, user_id, data):
+        self._store('user_data', user_id, data)
+
+    def update_chat_data(self, chat_id, data):
+        self._store('chat_data', chat_id, data)
+
+    def update_bot_data(self, data):
+        self._store('bot_data', 'bot_data', data)
+
+    def update_conversation(self, name, key, new_state):
+        conversations = self.get_conversations(name)
+        if new_state is None:
+            conversations.pop(key, None)
+        else:
+            conversations[key] = new_state
+        self._store('conversations', name, conversations)
+
+    def drop_chat_data(self, chat_id):
+        self._delete('chat_data', chat_id)
+
+    def drop_user_data(self, user_id):
+        self._delete('user_data', user_id)
+
+    def flush(self):
+        with self._lock:
+            self._connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def _load(self, table, key, default):
+        data = self._stored[table].get(key)
+        return default if data is None else pickle.loads(data)
+
+    def _load_all(self, table) -> dict:
+        return {key: pickle.loads(data) for key, data in self._stored[table].items()}
+
+    def _store(self, table, key, data):
+        serialized = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            if self._stored[table].get(key) == serialized:
+                return
+
+            self._connection.execute(f"INSERT OR REPLACE INTO {table} (id, data) VALUES (?, ?)", (key, serialized))
+            self._stored[table][key] = serialized
+
+    def _delete(self, table, key):
+        with self._lock:
+            self._connection.execute(f"DELETE FROM {table} WHERE id = ?", (key,))
+            self._stored[table].pop(key, None)
+
+    def _is_empty(self) -> bool:
+        return not any(self._connection.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone()
+                       for table in self._stored)
+
+    def _migrate_pickle_file(self, pickle_filename):
+        logger.info(f"Migrating {pickle_filename} to {self.filename}.")
+
+        with open(pickle_filename, 'rb') as file:
+            data = pickle.load(file)
+
+        rows = {
+            'chat_data': data.get('chat_data', {}).items(),
+            'user_data': data.get('user_data', {}).items(),
+            'bot_data': [('bot_data', data.get('bot_data', {}))],
+            'conversations': (data.get('conversations') or {}).items()
+        }
+
+        with self._connection:
+            self._connection.execute("BEGIN")
+            for table, items in rows.items():
+                self._connection.executemany(
+                    f"INSERT OR REPLACE INTO {table} (id, data) VALUES (?, ?)",
+                    [(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)) for key, value in items])
+
+        # Keep the old file as a backup, but make sure it isn't migrated again
+        os.replace(pickle_filename, pickle_filename + '.migrated')
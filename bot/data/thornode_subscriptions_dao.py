@@ -0,0 +1,53 @@
+import threading
+from collections import defaultdict
+from typing import List, Set, Tuple
+
+from data.singleton import Singleton
+
+
+class ThornodeSubscriptionsDao(metaclass=Singleton):
+    """
+    Reverse index of the monitored THORNodes: node address -> ids of the chats that monitor the node.
+    Must be updated whenever a node is added to or removed from the chat_data of a chat.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._chat_ids_by_address = defaultdict(set)
+
+    def subscribe(self, chat_id: int, address: str):
+        with self._lock:
+            self._chat_ids_by_address[address].add(chat_id)
+
+    def unsubscribe(self, chat_id: int, address: str):
+        with self._lock:
+            self._discard(chat_id, address)
+
+    def unsubscribe_chat(self, chat_id: int, addresses):
+        with self._lock:
+            for address in addresses:
+                self._discard(chat_id, address)
+
+    def get_chat_ids(self, address: str) -> Set[int]:
+        with self._lock:
+            return set(self._chat_ids_by_address.get(address, ()))
+
+    def get_subscriptions(self) -> List[Tuple[str, Set[int]]]:
+        with self._lock:
+            return [(address, set(chat_ids)) for address, chat_ids in self._chat_ids_by_address.items()]
+
+    def rebuild(self, chat_data: dict):
+        with self._lock:
+            self._chat_ids_by_address = defaultdict(set)
+            for chat_id, data in chat_data.items():
+                for address in data.get('nodes', {}):
+                    self._chat_ids_by_address[address].add(chat_id)
+
+    def _discard(self, chat_id: int, address: str):
+        chat_ids = self._chat_ids_by_address.get(address)
+        if chat_ids is None:
+            return
+
+        chat_ids.discard(chat_id)
+        if not chat_ids:
+            del self._chat_ids_by_address[address]
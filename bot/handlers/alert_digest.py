@@ -0,0 +1,90 @@
+import threading
+from typing import List
+
+from constants.globals import ALERT_DIGEST_WINDOW_IN_SECONDS
+from handlers.chat_helpers import try_message_with_home_menu
+from message_queue import Priority
+
+# Telegram rejects longer messages. It counts in UTF-16 code units, so most emojis count twice.
+MAX_MESSAGE_LENGTH = 4096
+ALERT_SEPARATOR = '\n\n➖➖➖\n\n'
+
+
+class AlertAggregator:
+    """
+    Collects the alerts for each chat and sends them as one digest instead of one message per node and condition.
+    The monitoring scheduler flushes the alerts at the end of every tick. Alerts that are added outside of a tick
+    are sent at the latest window_in_seconds after the first of them.
+    """
+
+    def __init__(self, window_in_seconds: float = ALERT_DIGEST_WINDOW_IN_SECONDS):
+        self.window_in_seconds = window_in_seconds
+        self._lock = threading.Lock()
+        self._alerts = {}
+
+    def add(self, context, chat_id, text: str):
+        with self._lock:
+            if not self._alerts:
+                context.job_queue.run_once(self.flush, self.window_in_seconds)
+            self._alerts.setdefault(chat_id, []).append(text)
+
+    def flush(self, context):
+        with self._lock:
+            alerts, self._alerts = self._alerts, {}
+
+        for chat_id, texts in alerts.items():
+            for message in render_alert_digest(texts):
+                try_message_with_home_menu(context=context, chat_id=chat_id, text=message, priority=Priority.CRITICAL)
+
+
+alert_aggregator = AlertAggregator()
+
+
+def render_alert_digest(alerts: List[str], max_length=MAX_MESSAGE_LENGTH) -> List[str]:
+    """
+    Joins the alerts into as few messages as possible. Alerts are only split if a single one is too long.
+    """
+
+    messages = []
+    message = ''
+    for alert in alerts:
+        for part in split_text(alert, max_length):
+            if message and get_telegram_length(message + ALERT_SEPARATOR + part) > max_length:
+                messages.append(message)
+                message = part
+            else:
+                message = message + ALERT_SEPARATOR + part if message else part
+
+    if message:
+        messages.append(message)
+
+    return messages
+
+
+def split_text(text: str, max_length=MAX_MESSAGE_LENGTH) -> List[str]:
+    """
+    Splits the text at line breaks into parts of at most max_length. Single lines that are too long are cut.
+    """
+
+    parts = []
+    part = ''
+    for line in text.split('\n'):
+        while get_telegram_length(line) > max_length:
+            # A character is at most 2 UTF-16 code units long
+            parts.extend(filter(None, [part, line[:max_length // 2]]))
+            part, line = '', line[max_length // 2:]
+
+        if part and get_telegram_length(part + '\n' + line) > max_length:
+            parts.append(part)
+            part = line
+        else:
+            part = part + '\n' + line if part else line
+
+    if part:
+        parts.append(part)
+
+    return parts
+
+
+def get_telegram_length(text: str) -> int:
+    return len(text.encode('utf-16-le')) // 2
@@ -1,19 +1,46 @@
+import threading
+
 from telegram import KeyboardButton, ReplyKeyboardMarkup, InlineKeyboardMarkup, TelegramError
+
+from broadcaster import Broadcaster, Broadcast
 from constants.globals import *
+from data.thornode_subscriptions_dao import ThornodeSubscriptionsDao
+from message_queue import Priority
+
+broadcaster = None
+broadcaster_lock = threading.Lock()
 
 
-def try_message_with_home_menu(context, chat_id, text):
+def try_message_with_home_menu(context, chat_id, text, priority=Priority.INTERACTIVE):
     keyboard = get_home_menu_buttons()
     try_message(context=context,
                 chat_id=chat_id,
                 text=text,
                 reply_markup=ReplyKeyboardMarkup(keyboard,
-                resize_keyboard=True))
+                resize_keyboard=True),
+                priority=priority)
 
 
-def try_message_to_all_users(context, text):
-    for chat_id in context.dispatcher.chat_data.keys():
-        try_message_with_home_menu(context, chat_id=chat_id, text=text)
+def try_message_to_all_users(context, text) -> Broadcast:
+    """
+    Send a message with the home menu to all chats in the background
+    """
+
+    return get_broadcaster(context).broadcast(chat_ids=list(context.dispatcher.chat_data.keys()),
+                                              text=text,
+                                              reply_markup=ReplyKeyboardMarkup(get_home_menu_buttons(),
+                                                                               resize_keyboard=True))
+
+
+def get_broadcaster(context) -> Broadcaster:
+    global broadcaster
+    with broadcaster_lock:
+        if broadcaster is None:
+            dispatcher = context.dispatcher
+            broadcaster = Broadcaster(bot=context.bot,
+                                      on_chat_blocked=lambda chat_id: remove_blocked_chat(dispatcher, chat_id))
+
+        return broadcaster
 
 
 def get_home_menu_buttons():
@@ -39,9 +66,10 @@ def show_text_input_message(update, text):
     query.edit_message_text(text)
 
 
-def try_message(context, chat_id, text, reply_markup=None):
+def try_message(context, chat_id, text, reply_markup=None, priority=Priority.INTERACTIVE):
     """
     Send a message to a user.
+    Alerts use Priority.CRITICAL, so they are sent before replies and bulk messages of other chats.
     """
 
     try:
@@ -49,27 +77,24 @@ def try_message(context, chat_id, text, reply_markup=None):
                                  text,
                                  parse_mode='markdown',
                                  reply_markup=reply_markup,
-                                 isgroup=is_group_chat(chat_id))
+                                 isgroup=is_group_chat(chat_id),
+                                 priority=priority)
     except TelegramError as e:
         if 'bot was blocked by the user' in e.message:
-            print("Telegram user " + str(chat_id) +
-                  " blocked me; removing him from the user list")
-            del context.dispatcher.chat_data[chat_id]
-            del context.dispatcher.chat_data[chat_id]
-            del context.dispatcher.persistence.chat_data[chat_id]
-            del context.dispatcher.persistence.chat_data[chat_id]
-
-            # Somehow session.data does not get updated if all users block the bot.
-            # That makes problems on bot restart. That's why we delete the file ourselves.
-            if len(context.dispatcher.persistence.chat_data) == 0:
-                if os.path.exists(session_data_path):
-                    os.remove(session_data_path)
-            context.job.schedule_removal()
+            remove_blocked_chat(context.dispatcher, chat_id)
         else:
             print("Got Error\n" + str(e) + "\nwith telegram user " +
                   str(chat_id))
 
 
+def remove_blocked_chat(dispatcher, chat_id):
+    print("Telegram user " + str(chat_id) +
+          " blocked me; removing him from the user list")
+    chat_data = dispatcher.chat_data.pop(chat_id, {})
+    dispatcher.persistence.drop_chat_data(chat_id)
+    ThornodeSubscriptionsDao().unsubscribe_chat(chat_id, chat_data.get('nodes', {}))
+
+
 # TODO remove/fix me
 def show_confirmation_menu(update, text, keyboard):
     """
@@ -0,0 +1,170 @@
+import hashlib
+from collections import Counter
+from concurrent.futures import Future
+
+from telegram import InlineKeyboardMarkup
+from telegram.error import BadRequest, TelegramError
+
+from constants.globals import logger, STATUS_EMOJIS, HEALTH_EMOJIS
+from handlers.alert_digest import MAX_MESSAGE_LENGTH, get_telegram_length, split_text
+from handlers.chat_helpers import remove_blocked_chat, is_group_chat
+from handlers.settings_handlers import get_settings_keyboard
+from message_queue import Priority
+from models.node_accounts import NodeAccounts
+from service.thorchain_network_service import get_node_accounts, get_probed_block_height
+
+DASHBOARD_FOOTER = "\n_Updated by the bot after every check. Turn it off in the settings._"
+
+
+def toggle_dashboard(update, context):
+    """
+    Turn the live dashboard of the chat on or off.
+    The dashboard is one pinned message that the monitoring tick edits whenever its content changes.
+    """
+
+    chat_id = update.effective_chat.id
+    dashboard = context.chat_data.pop('dashboard', None)
+
+    if dashboard is not None:
+        try:
+            context.bot.unpin_chat_message(chat_id, message_id=dashboard['message_id'])
+        except TelegramError as e:
+            logger.warning(f"Couldn't unpin the dashboard of chat {chat_id}: {e}")
+    else:
+        show_dashboard(context, chat_id)
+
+    # The settings stay open with the new state of the button
+    update.callback_query.edit_message_reply_markup(reply_markup=InlineKeyboardMarkup(get_settings_keyboard(context)))
+
+
+def show_dashboard(context, chat_id):
+    """
+    Send the dashboard of the chat and pin it
+    """
+
+    try:
+        network_summary = get_network_summary(context, get_node_accounts())
+    except Exception as e:
+        logger.exception(e)
+        network_summary = None
+
+    text = render_dashboard(context.chat_data.get('nodes', {}), network_summary)
+    message = context.bot.send_message(chat_id, text, parse_mode='markdown', isgroup=is_group_chat(chat_id),
+                                       priority=Priority.INTERACTIVE)
+    # The message queue returns a Future of the message
+    if isinstance(message, Future):
+        message = message.result()
+    context.chat_data['dashboard'] = {'message_id': message.message_id, 'content_hash': get_content_hash(text)}
+
+    try:
+        context.bot.pin_chat_message(chat_id, message.message_id, disable_notification=True)
+    except TelegramError as e:
+        # E.g. the bot isn't allowed to pin messages in a group
+        logger.warning(f"Couldn't pin the dashboard of chat {chat_id}: {e}")
+
+
+def update_dashboards(context, chats, node_accounts: NodeAccounts):
+    """
+    Updates the dashboards of the (chat_id, chat_data) that turned it on. The network summary is shared by all chats.
+    """
+
+    chats = [(chat_id, chat_data) for chat_id, chat_data in chats if 'dashboard' in chat_data]
+    if not chats:
+        return
+
+    network_summary = get_network_summary(context, node_accounts)
+    for chat_id, chat_data in chats:
+        try:
+            update_dashboard(context, chat_id, chat_data, network_summary)
+        except Exception as e:
+            logger.exception(e)
+            logger.error(f"Updating the dashboard of chat {chat_id} failed.")
+
+
+def update_dashboard(context, chat_id, chat_data, network_summary: [str, None]) -> bool:
+    """
+    Queues an edit of the dashboard message in the bulk lane if its content changed, so the tick doesn't wait for
+    Telegram. Returns whether an edit was queued.
+    """
+
+    dashboard = chat_data['dashboard']
+    text = render_dashboard(chat_data.get('nodes', {}), network_summary)
+    content_hash = get_content_hash(text)
+    if content_hash == dashboard['content_hash']:
+        return False
+
+    # Stored right away, so the next tick doesn't queue the same edit again while this one waits
+    dashboard['content_hash'] = content_hash
+    edit = context.bot.edit_message_text(text,
+                                         chat_id=chat_id,
+                                         message_id=dashboard['message_id'],
+                                         parse_mode='markdown',
+                                         queued=True,
+                                         isgroup=is_group_chat(chat_id),
+                                         priority=Priority.BULK)
+    edit.add_done_callback(lambda e: on_dashboard_edited(context.dispatcher, chat_id, chat_data, dashboard,
+                                                         error=None if e.cancelled() else e.exception()))
+
+    return True
+
+
+def on_dashboard_edited(dispatcher, chat_id, chat_data, dashboard: dict, error: Exception = None):
+    if error is None or (isinstance(error, BadRequest) and 'Message is not modified' in error.message):
+        return
+
+    if isinstance(error, BadRequest) and 'Message to edit not found' in error.message:
+        # The chat deleted the dashboard
+        if chat_data.get('dashboard') is dashboard:
+            chat_data.pop('dashboard', None)
+    elif isinstance(error, TelegramError) and 'bot was blocked by the user' in error.message:
+        remove_blocked_chat(dispatcher, chat_id)
+    else:
+        logger.error(f"Updating the dashboard of chat {chat_id} failed.", exc_info=error)
+        # Edited again in the next tick
+        dashboard['content_hash'] = None
+
+
+def get_network_summary(context, node_accounts: NodeAccounts) -> str:
+    """
+    Summarizes the network from the node accounts and the probes of the tick, so dashboards cause no extra requests
+    """
+
+    text = "🌎 *Network*\n"
+    statuses = Counter(node['status'] for node in node_accounts)
+    text += "  " + "  ".join(f"{STATUS_EMOJIS.get(status, STATUS_EMOJIS['Unknown'])} {count}"
+                             for status, count in sorted(statuses.items())) + f"  (total {len(node_accounts)})\n"
+
+    block_height = get_probed_block_height({node['ip_address'] for node in node_accounts if node['ip_address']})
+    if block_height is not None:
+        text += f"  Block height: *{block_height:,}*\n"
+
+    network_health_status = context.bot_data.get('network_health_status')
+    if network_health_status is not None:
+        text += f"  Network Security: *{network_health_status.value}*\n"
+
+    return text
+
+
+def render_dashboard(nodes: dict, network_summary: [str, None]) -> str:
+    text = "📌 *Live Dashboard*\n\n"
+
+    if not nodes:
+        text += "You do not monitor any THORNodes yet.\n"
+    for address, node in nodes.items():
+        is_healthy = None if node.is_catching_up is None else node.healthy is not False and not node.is_catching_up
+        text += f"{STATUS_EMOJIS.get(node.status, STATUS_EMOJIS['Unknown'])} *{node.alias}* " \
+                f"(...{address[-3:]}) [{HEALTH_EMOJIS[is_healthy]}]\n" \
+                f"  {node.status} · Block height: *{node.block_height or 0:,}*" \
+                f"{' · Midgard unhealthy ‼' if node.is_midgard_healthy is False else ''}\n"
+
+    if network_summary is not None:
+        text += "\n" + network_summary
+
+    if get_telegram_length(text + DASHBOARD_FOOTER) > MAX_MESSAGE_LENGTH:
+        text = split_text(text, MAX_MESSAGE_LENGTH - get_telegram_length(DASHBOARD_FOOTER) - 2)[0] + "\n…\n"
+
+    return text + DASHBOARD_FOOTER
+
+
+def get_content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
@@ -2,6 +2,7 @@ import re
 
 from telegram.error import BadRequest
 
+from handlers.dashboard import toggle_dashboard
 from handlers.network_info_handlers import *
 from handlers.other_nodes_handlers import *
 from handlers.settings_handlers import show_settings, set_threshold_menu, handle_change_threshold
@@ -19,7 +20,7 @@ def on_start_command(update, context):
 
     # Start job for user
     if 'job_started' not in context.chat_data:
-        start_user_job(context, update.message.chat.id)
+        start_user_job(context)
 
     text = f'Heil ok sæll! I am your THORNode Bot running on {NETWORK_TYPE}. 🤖\n\n'
     text += 'I will notify you about changes of your THORNode\'s\n' \
@@ -67,6 +68,10 @@ def dispatch_query(update, context):
         call = on_my_nodes_clicked
     elif data == 'show_all_thorchain_nodes':
         call = show_all_thorchain_nodes
+    elif data.startswith('show_all_thorchain_nodes-'):
+        # Browsing edits the page message itself, so its keyboard is kept
+        call = show_all_thorchain_nodes
+        edit = False
     elif data == 'show_network_stats':
         call = show_network_stats
     elif data.startswith('show_settings'):
@@ -101,6 +106,10 @@ def dispatch_query(update, context):
         call = show_other_nodes_details
     elif data == 'set_threshold':
         call = set_threshold_menu
+    elif data == 'toggle_dashboard':
+        # Updates the button in the settings itself, so their keyboard is kept
+        call = toggle_dashboard
+        edit = False
     else:
         edit = False
 
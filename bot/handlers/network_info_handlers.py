@@ -99,8 +99,7 @@ async def show_network_stats(update, context):
 def solvency_stats(update, context):
     logger.info("I'm getting the Solvency Stats...")
     try:
-        asgard_solvency = asgard_solvency_check()
-        yggdrasil_solvency = yggdrasil_solvency_check()
+        asgard_solvency, yggdrasil_solvency = get_solvency_reports()
     except Exception as e:
         logger.exception(e)
         try_message_with_home_menu(context, update.effective_chat.id, NETWORK_ERROR)
@@ -109,7 +108,7 @@ def solvency_stats(update, context):
     message = "💰 Solvency Check\n"
 
     message += "THORChain is *100% Solvent* ✅\n\n" \
-        if asgard_solvency['is_solvent'] and yggdrasil_solvency['is_solvent'] \
+        if asgard_solvency.is_solvent and yggdrasil_solvency.is_solvent \
         else "THORChain is *missing funds*! 😱\n\n"
 
     message += get_solvency_message(asgard_solvency, yggdrasil_solvency)
@@ -142,8 +141,7 @@ async def show_vault_key_addresses(update, context):
         logger.error("Couldn't get node accounts while showing vault_key_addresses.")
         return
 
-    monitored_node_accounts = list(
-        filter(lambda x: x['status'] == 'active', node_accounts))
+    monitored_node_accounts = node_accounts.with_status('active')
     ip_addresses = list(map(lambda x: x['ip_address'], monitored_node_accounts))
 
     await for_each_async(
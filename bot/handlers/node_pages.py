@@ -0,0 +1,111 @@
+import threading
+from datetime import timedelta
+from typing import List, Tuple, Dict
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from handlers.alert_digest import MAX_MESSAGE_LENGTH, get_telegram_length
+from models.node_accounts import NodeAccounts
+from service.thorchain_network_service import get_node_accounts, get_latest_block_height, \
+    get_thorchain_blocks_per_second
+from service.utils import tor_to_rune, format_to_days_and_hours
+
+ALL_NODES_TITLE = "Status of all THORNodes in the THORChain network:"
+# Aliases have at most 16 characters, i.e. at most 32 UTF-16 code units
+NODE_HEADER_MAX_LENGTH = get_telegram_length('THORNode: **\n') + 32
+# Room for the title and the page number
+PAGE_HEADER_MAX_LENGTH = get_telegram_length(ALL_NODES_TITLE) + 40
+
+# A page is a list of (node address, text of the node without the THORNode line)
+Page = List[Tuple[str, str]]
+
+
+class NodePages:
+    """
+    Renders all node accounts of a snapshot once into pages that fit into one message each.
+    The pages don't depend on the chat, so all chats that browse the nodes of the same snapshot share them.
+    The line with the alias of a monitored node is added per chat when a page is shown.
+    """
+
+    def __init__(self, max_length=MAX_MESSAGE_LENGTH):
+        self.max_length = max_length
+        self._lock = threading.Lock()
+        self._node_accounts = None
+        self._pages = []
+
+    def get_pages(self) -> List[Page]:
+        node_accounts = get_node_accounts()
+        with self._lock:
+            if node_accounts is not self._node_accounts:
+                self._pages = render_node_pages(node_accounts,
+                                                latest_block_height=get_latest_block_height(),
+                                                blocks_per_second=get_thorchain_blocks_per_second(),
+                                                max_length=self.max_length)
+                self._node_accounts = node_accounts
+
+            return self._pages
+
+
+node_pages = NodePages()
+
+
+def render_node_pages(node_accounts: NodeAccounts, latest_block_height: int, blocks_per_second: float,
+                      max_length=MAX_MESSAGE_LENGTH) -> List[Page]:
+    """
+    Packs as many nodes as possible into every page
+    """
+
+    pages = []
+    page = []
+    page_length = PAGE_HEADER_MAX_LENGTH
+    for node in node_accounts:
+        text = get_node_account_text(node, latest_block_height, blocks_per_second)
+        length = NODE_HEADER_MAX_LENGTH + get_telegram_length(text)
+        if page and page_length + length > max_length:
+            pages.append(page)
+            page = []
+            page_length = PAGE_HEADER_MAX_LENGTH
+        page.append((node['node_address'], text))
+        page_length += length
+
+    if page:
+        pages.append(page)
+
+    return pages
+
+
+def get_node_account_text(node: dict, latest_block_height: int, blocks_per_second: float) -> str:
+    status_since_in_seconds = (int(latest_block_height) - int(node['status_since'])) / blocks_per_second
+
+    return 'Address: *' + node['node_address'] + '*\n' + \
+           'Version: *' + node['version'] + '*\n' + \
+           'Status: *' + node['status'].capitalize() + '*\n' + \
+           'Bond: *' + tor_to_rune(node['bond']) + '*\n' + \
+           'Slash Points: ' + '*{:,}*'.format(int(node['slash_points'])) + '\n' + \
+           'Accrued Rewards: *' + tor_to_rune(node['current_award']) + '*\n' + \
+           node['status'].capitalize() + ' for *' + \
+           format_to_days_and_hours(timedelta(seconds=status_since_in_seconds)) + '*\n\n' + \
+           'Status Since Block: ' + '*{:,}*'.format(int(node['status_since'])) + '\n\n'
+
+
+def render_page(pages: List[Page], index: int, aliases: Dict[str, str]) -> Tuple[str, InlineKeyboardMarkup]:
+    """
+    Returns the text of the page with the aliases of the monitored nodes of a chat, and the buttons to browse.
+    """
+
+    index = min(max(index, 0), len(pages) - 1)
+    text = ALL_NODES_TITLE
+    if len(pages) > 1:
+        text += f" (page {index + 1}/{len(pages)})"
+    text += "\n\n"
+
+    for address, node_text in pages[index] if pages else []:
+        text += 'THORNode: *' + aliases.get(address, 'not monitored') + '*\n' + node_text
+
+    buttons = []
+    if index > 0:
+        buttons.append(InlineKeyboardButton('⬅️ PREVIOUS', callback_data=f'show_all_thorchain_nodes-{index - 1}'))
+    if index < len(pages) - 1:
+        buttons.append(InlineKeyboardButton('NEXT ➡️', callback_data=f'show_all_thorchain_nodes-{index + 1}'))
+
+    return text, InlineKeyboardMarkup([buttons] if buttons else [])
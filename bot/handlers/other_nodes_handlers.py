@@ -3,6 +3,7 @@ from telegram import InlineKeyboardButton
 from constants.messages import HEALTH_LEGEND
 from data.other_nodes_dao import OtherNodesDao
 from handlers.chat_helpers import *
+from jobs.other_nodes_jobs import other_nodes_prober
 
 
 def show_other_nodes_menu(update, context):
@@ -34,26 +35,18 @@ def show_other_nodes_details(update, context):
 
     text = f"Details of node: *{node.network_name}* (*{node.node_ip}*)\n\n "
 
-    try:
-        is_synced = node.is_fully_synced()
-    except Exception as e:
-        logger.debug(e, exc_info=True)
-        is_synced = 'currently unavailable'
+    # Probed like in the jobs, so the network block height of the chain is fetched once
+    for _ in other_nodes_prober.probe([node]):
+        pass
+    probe = node.probe()
+    if probe.error is not None:
+        logger.debug(probe.error)
 
+    is_synced = 'currently unavailable' if probe.is_synced is None else probe.is_synced
     text += f"Is fully synced: *{is_synced}*\n"
 
-    node_height = None
-    network_block_height = None
-
-    try:
-        node_height = node.get_block_height()
-    except Exception as e:
-        logger.debug(e, exc_info=True)
-
-    try:
-        network_block_height = node.get_network_block_count()
-    except Exception as e:
-        logger.debug(e, exc_info=True)
+    node_height = probe.block_height
+    network_block_height = probe.network_block_height
 
     text += f"Node block height:"
 
@@ -61,7 +54,7 @@ def show_other_nodes_details(update, context):
         if network_block_height:
             text += f"*{node_height}/{network_block_height}*"
         else:
-            text += f"*{node_height}"
+            text += f"*{node_height}*"
 
     else:
         text += f"*currently unavailable*"
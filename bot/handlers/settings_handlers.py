@@ -6,9 +6,7 @@ from service.utils import get_slash_points_threshold
 
 
 def show_settings(update, context):
-    current_threshold = get_slash_points_threshold(context)
-    keyboard = [[InlineKeyboardButton(f'🔪 ({current_threshold} points) Slash points notification threshold',
-                                      callback_data='set_threshold')]]
+    keyboard = get_settings_keyboard(context)
     was_back_button_clicked = hasattr(update.callback_query, 'data') and (
             update.callback_query.data.split("-")[-1] == "edit")
     title = 'Manage your *THORNode Bot* 🤖'
@@ -24,6 +22,16 @@ def show_settings(update, context):
                     text=title)
 
 
+def get_settings_keyboard(context) -> list:
+    current_threshold = get_slash_points_threshold(context)
+    is_dashboard_on = 'dashboard' in context.chat_data
+
+    return [[InlineKeyboardButton(f'🔪 ({current_threshold} points) Slash points notification threshold',
+                                  callback_data='set_threshold')],
+            [InlineKeyboardButton(f"📌 Live dashboard: {'ON' if is_dashboard_on else 'OFF'}",
+                                  callback_data='toggle_dashboard')]]
+
+
 def set_threshold_menu(update, context):
     query = update.callback_query
     current_threshold = get_slash_points_threshold(context)
@@ -1,8 +1,11 @@
 import math
 
 from telegram import InlineKeyboardButton
+from telegram.error import BadRequest
+
 from constants.messages import NETWORK_ERROR, HEALTH_LEGEND
 from handlers.chat_helpers import *
+from handlers.node_pages import node_pages, render_page
 from service.utils import *
 from datetime import timedelta
 
@@ -74,7 +77,7 @@ def handle_add_node(update, context):
         context.chat_data['expected'] = 'add_node'
         return
 
-    add_thornode_to_chat_data(context.chat_data, address, node)
+    add_thornode_to_chat_data(update.effective_chat.id, context.chat_data, address, node)
 
     # Send message
     update.message.reply_text('Got it! 👌')
@@ -97,7 +100,7 @@ def handle_change_alias(update, context):
         return
 
     context.chat_data.setdefault('nodes', {})[
-        context.chat_data['selected_node_address']]['alias'] = alias
+        context.chat_data['selected_node_address']].alias = alias
 
     # Send message
     update.message.reply_text('Got it! 👌')
@@ -117,7 +120,7 @@ def confirm_thornode_deletion(update, context):
                              callback_data='thornode_details-' + address)
     ]]
     text = '⚠️ Do you really want to remove this node from your monitoring list? ⚠\n️' + \
-           "*" + context.chat_data['nodes'][address]['alias'] + "*\n" + \
+           "*" + context.chat_data['nodes'][address].alias + "*\n" + \
            "*" + address + "*"
 
     return show_confirmation_menu(update=update, text=text, keyboard=keyboard)
@@ -132,10 +135,10 @@ def delete_thornode(update, context):
     address = context.chat_data['selected_node_address']
 
     text = "❌ Thornode got deleted! ❌\n" + \
-           "*" + context.chat_data['nodes'][address]['alias'] + "*\n" + \
+           "*" + context.chat_data['nodes'][address].alias + "*\n" + \
            "*" + address + "*"
 
-    del context.chat_data['nodes'][address]
+    remove_thornode_from_chat_data(update.effective_chat.id, context.chat_data, address)
 
     query.edit_message_text(text, parse_mode='markdown')
     show_my_thorchain_nodes_menu(update, context)
@@ -166,7 +169,7 @@ def add_all_thornodes(update, context):
     for node in nodes:
         address = node['node_address']
         if address not in context.chat_data.get('nodes', {}):
-            add_thornode_to_chat_data(context.chat_data, address, node)
+            add_thornode_to_chat_data(update.effective_chat.id, context.chat_data, address, node)
 
     # Send message
     query.edit_message_text('Added all THORNodes! 👌')
@@ -180,7 +183,8 @@ def delete_all_thornodes(update, context):
 
     query = update.callback_query
 
-    context.chat_data.clear()
+    ThornodeSubscriptionsDao().unsubscribe_chat(update.effective_chat.id, context.chat_data.get('nodes', {}))
+    context.chat_data['nodes'] = {}
 
     text = '❌ Deleted all THORNodes! ❌'
     # Send message
@@ -191,13 +195,15 @@ def delete_all_thornodes(update, context):
 
 def show_all_thorchain_nodes(update, context):
     """
-    Show the status of all Thornodes in the whole Thorchain network
+    Show the status of all Thornodes in the whole Thorchain network.
+    The nodes are shown page by page in one message, the buttons below it edit the message to show another page.
     """
 
+    query = update.callback_query
+    is_page_click = query is not None and query.data.startswith('show_all_thorchain_nodes-')
+
     try:
-        nodes = get_node_accounts()
-        latest_block_height = get_latest_block_height()
-        blocks_per_second = get_thorchain_blocks_per_second()
+        pages = node_pages.get_pages()
     except Exception as e:
         logger.exception(e)
         try_message_with_home_menu(context=context,
@@ -205,54 +211,28 @@ def show_all_thorchain_nodes(update, context):
                                    text=NETWORK_ERROR)
         return
 
-    text = "Status of all THORNodes in the THORChain network:\n\n"
+    index = int(query.data.split('-')[1]) if is_page_click else 0
+    aliases = {address: node.alias for address, node in context.chat_data.get('nodes', {}).items()}
+    text, reply_markup = render_page(pages, index, aliases)
 
-    for node in nodes:
-        try:
-            monitored_address = next(
-                filter(
-                    lambda a: a == node[
-                        'node_address'], context.chat_data.get('nodes', {})), None)
-            text += 'THORNode: *'
-
-            if monitored_address:
-                text += context.chat_data['nodes'][monitored_address]['alias']
-            else:
-                text += "not monitored"
-            text += "*\n"
-
-            status_since_in_seconds = (int(latest_block_height) - int(
-                node['status_since'])) / blocks_per_second
-
-            text += 'Address: *' + node['node_address'] + '*\n' + \
-                    'Version: *' + node['version'] + '*\n' + \
-                    'Status: *' + node['status'].capitalize() + '*\n' + \
-                    'Bond: *' + tor_to_rune(node['bond']) + '*\n' + \
-                    'Slash Points: ' + '*{:,}*'.format(int(node['slash_points'])) + '\n' + \
-                    'Accrued Rewards: *' + tor_to_rune(node['current_award']) + '*\n' + \
-                    node['status'].capitalize() + ' for *' + \
-                    format_to_days_and_hours(timedelta(seconds=status_since_in_seconds)) + '*\n\n' + \
-                    'Status Since Block: ' + '*{:,}*'.format(int(node['status_since'])) + '\n\n'
+    if not is_page_click:
+        try_message(context=context,
+                    chat_id=update.effective_chat.id,
+                    text=text,
+                    reply_markup=reply_markup)
+        return
 
-            try_message(context=context,
-                        chat_id=update.effective_chat.id,
-                        text=text)
-            text = ''
-        except Exception as e:
-            logger.exception(e)
-            text += '\nError while getting more data about this node.\n'
-            try_message(context=context,
-                        chat_id=update.effective_chat.id,
-                        text=text)
-            text = ''
+    try:
+        query.edit_message_text(text=text, parse_mode='markdown', reply_markup=reply_markup)
+    except BadRequest as e:
+        # Clicked twice on the same button
+        if 'Message is not modified' not in e.message:
+            raise
 
 
 def show_my_thorchain_nodes_menu(update, context):
     PAGE_SIZE = 30
-    chat_data = context.chat_data if context.chat_data else context.job.context[
-        'chat_data']
-
-    keyboard = get_thornode_menu_buttons(chat_data=chat_data)
+    keyboard = get_thornode_menu_buttons(chat_data=context.chat_data)
 
     if len(keyboard) > 2:
         text = '*Node statuses*:\n'
@@ -283,13 +263,13 @@ def get_thornode_menu_buttons(chat_data):
     buttons = []
     for address in chat_data.get('nodes', {}).keys():
         node = chat_data['nodes'][address]
-        status_emoji = STATUS_EMOJIS.get(node['status'], STATUS_EMOJIS["Unknown"])
+        status_emoji = STATUS_EMOJIS.get(node.status, STATUS_EMOJIS["Unknown"])
         truncated_address = f"...{address[-3:]}"
-        is_catching_up = node.get('is_catching_up', None)
+        is_catching_up = node.is_catching_up
         is_healthy = None if is_catching_up is None else not is_catching_up
         is_healthy_emoji = HEALTH_EMOJIS[is_healthy]
 
-        button_text = f"{status_emoji} {node['alias']} ({truncated_address}) [{is_healthy_emoji}]"
+        button_text = f"{status_emoji} {node.alias} ({truncated_address}) [{is_healthy_emoji}]"
 
         buttons.append(InlineKeyboardButton(button_text, callback_data='thornode_details-' + address))
 
@@ -330,7 +310,7 @@ def show_detail_menu(update, context):
         show_my_thorchain_nodes_menu(update, context)
         return
 
-    text = 'THORNode: *' + context.chat_data['nodes'][address]['alias'] + '*\n' + \
+    text = 'THORNode: *' + context.chat_data['nodes'][address].alias + '*\n' + \
            'Address: *' + address + '*\n' + \
            'Version: *' + node['version'] + '*\n\n' + \
            'Status: *' + node['status'].capitalize() + '*\n' + \
@@ -1,15 +1,22 @@
+from jobs.monitoring_scheduler import monitoring_scheduler
 from jobs.other_nodes_jobs import *
-from jobs.thorchain_network_jobs import check_network_security_job, check_thorchain_constants_job
+from jobs.thorchain_network_jobs import check_network_security_job, check_thorchain_constants_job, \
+    refresh_seed_node_pool_job
 from jobs.thorchain_node_jobs import *
 
 
 def setup_bot_jobs(dispatcher):
+    monitoring_scheduler.start(dispatcher.job_queue)
+    if not DEBUG:
+        dispatcher.job_queue.run_repeating(refresh_seed_node_pool_job,
+                                           interval=JOB_INTERVAL_IN_SECONDS,
+                                           first=0)
     dispatcher.job_queue.run_repeating(general_bot_checks,
                                        interval=JOB_INTERVAL_IN_SECONDS)
-    dispatcher.job_queue.run_repeating(check_bitcoin_height_increase_job,
-                                       interval=BitcoinNode.max_time_for_block_height_increase_in_seconds)
-    dispatcher.job_queue.run_repeating(check_ethereum_height_increase_job,
-                                       interval=EthereumNode.max_time_for_block_height_increase_in_seconds)
+    schedule_block_height_increase_jobs(dispatcher.job_queue, OtherNodesDao().get_all_nodes())
+    if ETHEREUM_HEAD_SUBSCRIPTIONS:
+        ethereum_head_tracker.track_only(
+            node.node_ip for node in OtherNodesDao().get_nodes_by_network_names([EthereumNode.network_name]))
 
     dispatcher.job_queue.run_repeating(check_other_nodes_syncing_job,
                                        interval=120)
@@ -21,24 +28,12 @@ def setup_bot_jobs(dispatcher):
                                        interval=3600)
 
 
-def start_user_job(context, chat_id):
-    context.job_queue.run_repeating(user_specific_checks,
-                                    interval=JOB_INTERVAL_IN_SECONDS,
-                                    context={
-                                        'chat_id': chat_id,
-                                        'chat_data': context.chat_data
-                                    })
-
-    context.chat_data['job_started'] = True
-
-
-def user_specific_checks(context):
+def start_user_job(context):
     """
-    Periodic checks of nodes that the user monitors
+    Add the chat to the chats that are checked by the monitoring scheduler
     """
 
-    check_versions_status(context)
-    check_thornodes(context)
+    context.chat_data['job_started'] = True
 
 
 def general_bot_checks(context):
@@ -0,0 +1,151 @@
+import asyncio
+import time
+from collections import defaultdict
+from concurrent import futures
+
+from constants.globals import logger, JOB_INTERVAL_IN_SECONDS, MONITORED_STATUSES, THORNODE_PROBE_CONCURRENCY, \
+    THORNODE_PROBE_DEADLINE_IN_SECONDS, THORNODE_BLOCK_SUBSCRIPTIONS
+from data.thornode_subscriptions_dao import ThornodeSubscriptionsDao
+from handlers.alert_digest import alert_aggregator
+from handlers.dashboard import update_dashboards
+from jobs.thorchain_node_jobs import check_versions_status, check_thornode, get_highest_version
+from service.async_http_client import async_http_client
+from service.thorchain_network_service import get_node_accounts, probe_node_async, tendermint_block_tracker
+
+
+class MonitoringScheduler:
+    """
+    Runs the monitoring of all chats in a single repeating job.
+    Each tick probes every monitored THORNode once and then hands the shared results to the chats that subscribed
+    to the node, so the cost grows with the number of unique nodes and not with the number of chats.
+    Nodes are probed concurrently on the async http client and checked as soon as their probe is done, so many
+    probes are in flight without tying up threads. Nodes that didn't answer until the probe deadline only get their
+    status checked in this tick. The alerts of a tick are sent as one digest per chat at its end, then edits of the
+    live dashboards whose content changed are queued.
+    """
+
+    def __init__(self,
+                 interval_in_seconds=JOB_INTERVAL_IN_SECONDS,
+                 probe_concurrency=THORNODE_PROBE_CONCURRENCY,
+                 probe_deadline_in_seconds=THORNODE_PROBE_DEADLINE_IN_SECONDS):
+        self.interval_in_seconds = interval_in_seconds
+        self.probe_concurrency = probe_concurrency
+        self.probe_deadline_in_seconds = probe_deadline_in_seconds
+        self.tick_count = 0
+        self.last_tick_duration = None  # Seconds the last tick took
+        self.last_tick_lag = None  # Seconds the last tick started later than scheduled
+        self.last_tick_missed_probes = 0  # Node ips that didn't answer until the probe deadline
+        self._last_tick_started_at = None
+        self._probe_semaphore = None
+
+    def start(self, job_queue):
+        job_queue.run_repeating(self.tick, interval=self.interval_in_seconds)
+
+    def tick(self, context):
+        started_at = time.monotonic()
+        if self._last_tick_started_at is not None:
+            self.last_tick_lag = max(0.0, started_at - self._last_tick_started_at - self.interval_in_seconds)
+        self._last_tick_started_at = started_at
+
+        chat_data = context.dispatcher.chat_data
+        monitored_chats = [(chat_id, data) for chat_id, data in list(chat_data.items())
+                           if data.get('job_started', False)]
+
+        try:
+            node_accounts = get_node_accounts()
+        except Exception as e:
+            logger.exception(e)
+            logger.error("I couldn't get the node accounts for the monitoring tick.")
+        else:
+            highest_version = get_highest_version(node_accounts)
+            for chat_id, data in monitored_chats:
+                try:
+                    check_versions_status(context, chat_id, data, highest_version)
+                except Exception as e:
+                    logger.exception(e)
+
+            self._check_subscriptions(context, node_accounts, get_monitored_subscriptions(chat_data))
+            alert_aggregator.flush(context)
+            update_dashboards(context, monitored_chats, node_accounts)
+
+        self.tick_count += 1
+        self.last_tick_duration = time.monotonic() - started_at
+        if self.last_tick_duration > self.interval_in_seconds:
+            logger.warning(f"Monitoring tick took {self.last_tick_duration:.1f}s which is longer than the "
+                           f"interval of {self.interval_in_seconds}s (lag: {self.last_tick_lag or 0:.1f}s).")
+        else:
+            logger.info(f"Monitoring tick of {len(monitored_chats)} chats took {self.last_tick_duration:.1f}s "
+                        f"(lag: {self.last_tick_lag or 0:.1f}s).")
+
+    def _check_subscriptions(self, context, node_accounts, subscriptions):
+        checks_by_node_ip = defaultdict(list)
+        for address, subscribers in subscriptions:
+            remote_node = node_accounts.get(address)
+            for chat_id, data in subscribers:
+                try:
+                    local_node = data['nodes'][address]
+                    is_monitored_status = local_node.status.upper() in MONITORED_STATUSES
+                except Exception as e:
+                    logger.exception(e)
+                    logger.error(f"Skipping THORNode {address} of chat {chat_id}, its chat data is malformed.")
+                    continue
+
+                if is_monitored_status:
+                    checks_by_node_ip[local_node.ip_address].append((chat_id, data, address, remote_node))
+                else:
+                    run_check(context, chat_id, data, address, remote_node)
+
+        if THORNODE_BLOCK_SUBSCRIPTIONS:
+            tendermint_block_tracker.track_only(checks_by_node_ip.keys())
+
+        probes = {async_http_client.submit(self._probe(node_ip)): node_ip for node_ip in checks_by_node_ip}
+        try:
+            for probe in futures.as_completed(probes, timeout=self.probe_deadline_in_seconds):
+                for chat_id, data, address, remote_node in checks_by_node_ip.pop(probes[probe]):
+                    run_check(context, chat_id, data, address, remote_node)
+        except futures.TimeoutError:
+            logger.warning(f"{len(checks_by_node_ip)} THORNode ips didn't answer within "
+                           f"{self.probe_deadline_in_seconds}s.")
+
+        self.last_tick_missed_probes = len(checks_by_node_ip)
+        for checks in checks_by_node_ip.values():
+            for chat_id, data, address, remote_node in checks:
+                run_check(context, chat_id, data, address, remote_node, check_health=False)
+
+    async def _probe(self, node_ip):
+        # Created lazily so that it belongs to the loop of the async http client
+        if self._probe_semaphore is None:
+            self._probe_semaphore = asyncio.Semaphore(self.probe_concurrency)
+
+        async with self._probe_semaphore:
+            await probe_node_async(node_ip)
+
+
+def get_monitored_subscriptions(chat_data) -> list:
+    """
+    Returns the monitored node addresses with the (chat_id, chat_data) of each subscribed chat
+    """
+
+    subscriptions = []
+    for address, chat_ids in ThornodeSubscriptionsDao().get_subscriptions():
+        subscribers = []
+        for chat_id in chat_ids:
+            data = chat_data.get(chat_id)
+            if data is not None and data.get('job_started', False) and address in data.get('nodes', {}):
+                subscribers.append((chat_id, data))
+
+        if subscribers:
+            subscriptions.append((address, subscribers))
+
+    return subscriptions
+
+
+def run_check(context, chat_id, chat_data, address, remote_node, check_health=True):
+    try:
+        check_thornode(context, chat_id, chat_data, address, remote_node, check_health=check_health)
+    except Exception as e:
+        logger.exception(e)
+        logger.error(f"Checking THORNode {address} for chat {chat_id} failed.")
+
+
+monitoring_scheduler = MonitoringScheduler()
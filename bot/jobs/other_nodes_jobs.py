@@ -1,24 +1,120 @@
+import threading
+import time
+from concurrent import futures
+from functools import partial
+from typing import List, Iterator, Iterable, Dict
+
 from data.other_nodes_dao import OtherNodesDao
 from handlers.chat_helpers import *
 from models.nodes import *
 
 
+class OtherNodesProber:
+    """
+    Probes chain nodes concurrently before their checks run. Every chain gets its own pool of workers,
+    so a chain with many unreachable nodes doesn't hold up the nodes of the other chains.
+    Chains whose nodes can't tell the network block height get it fetched once on their pool and passed into every
+    probe. If it isn't there within the first half of the deadline, the probes use the last known one and still
+    make the deadline.
+    Nodes are handed to the checks as soon as their probe is done. Nodes that didn't answer until the deadline
+    are skipped until the next check.
+    """
+
+    def __init__(self,
+                 concurrency_per_chain=OTHER_NODES_PROBE_CONCURRENCY_PER_CHAIN,
+                 deadline_in_seconds=OTHER_NODES_PROBE_DEADLINE_IN_SECONDS):
+        self.concurrency_per_chain = concurrency_per_chain
+        self.deadline_in_seconds = deadline_in_seconds
+        self.last_missed_probes = 0  # Nodes that didn't answer until the deadline of the last call
+        self._lock = threading.Lock()
+        self._executors = {}
+        self._last_network_block_heights = {}
+
+    def probe(self, nodes: List[Node]) -> Iterator[Node]:
+        network_block_height_deadline = time.monotonic() + self.deadline_in_seconds / 2
+        network_block_heights = self._submit_network_block_heights(node for node in nodes
+                                                                   if not node.is_probe_fresh())
+        probes = {}
+        for node in nodes:
+            get_network_block_height = None
+            if node.network_name in network_block_heights:
+                get_network_block_height = partial(self._await_network_block_height, node.network_name,
+                                                   network_block_heights[node.network_name],
+                                                   network_block_height_deadline)
+            probes[self._get_executor(node.network_name).submit(node.probe, get_network_block_height)] = node
+
+        try:
+            for probe in futures.as_completed(probes, timeout=self.deadline_in_seconds):
+                yield probes.pop(probe)
+        except futures.TimeoutError:
+            logger.warning(f"{', '.join(node.to_string() for node in probes.values())} didn't answer within "
+                           f"{self.deadline_in_seconds}s.")
+
+        self.last_missed_probes = len(probes)
+
+    def _submit_network_block_heights(self, nodes: Iterable[Node]) -> Dict[str, futures.Future]:
+        """
+        Fetches the network block height once per chain instead of once per node
+        """
+
+        network_block_heights = {}
+        for node in nodes:
+            if node.network_name not in network_block_heights:
+                network_block_heights[node.network_name] = self._get_executor(node.network_name).submit(
+                    self._fetch_network_block_height, node)
+
+        return network_block_heights
+
+    def _fetch_network_block_height(self, node: Node) -> [int, None]:
+        try:
+            network_block_height = node.fetch_network_block_height()
+        except Exception as e:
+            # The nodes can still be probed, only the comparison with the network is unavailable
+            logger.warning(f"Couldn't get the {node.network_name} network block height: {e}")
+            return None
+
+        if network_block_height is not None:
+            self._last_network_block_heights[node.network_name] = network_block_height
+
+        return network_block_height
+
+    def _await_network_block_height(self, network_name: str, network_block_height: futures.Future,
+                                    deadline: float) -> [int, None]:
+        try:
+            return network_block_height.result(timeout=max(0.0, deadline - time.monotonic()))
+        except futures.TimeoutError:
+            logger.warning(f"The {network_name} network block height didn't arrive within "
+                           f"{self.deadline_in_seconds / 2}s, the probes use the last known one.")
+            return self._last_network_block_heights.get(network_name)
+
+    def _get_executor(self, network_name: str) -> futures.ThreadPoolExecutor:
+        with self._lock:
+            if network_name not in self._executors:
+                self._executors[network_name] = futures.ThreadPoolExecutor(
+                    max_workers=self.concurrency_per_chain,
+                    thread_name_prefix=f"{network_name.lower().replace(' ', '-')}-probe")
+
+            return self._executors[network_name]
+
+
+other_nodes_prober = OtherNodesProber()
+
+
 def check_other_nodes_health(context):
-    for node in OtherNodesDao().get_all_nodes():
+    for node in other_nodes_prober.probe(OtherNodesDao().get_all_nodes()):
         message = check_health(node, context)
         if message:
             try_message_to_all_users(context, text=message)
 
 
 def check_health(node: Node, context) -> [str, None]:
-    try:
-        is_node_currently_healthy = node.is_healthy()
-    except UnauthorizedException:
-        return f"😱 Your {node.to_string()} returns 401 - Unauthorized! 😱\n" \
-               f" Please make sure the credentials you set are correct!"
-    except Exception as e:
-        logger.error(e)
-        return None
+    probe = node.probe()
+    if isinstance(probe.error, UnauthorizedException):
+        return get_unauthorized_message(node)
+    elif probe.error is not None:
+        logger.error(f"Probing {node.to_string()} failed: {probe.error}")
+
+    is_node_currently_healthy = probe.healthy
 
     was_node_healthy = context.bot_data.setdefault(node.node_id, {}).setdefault('health', True)
 
@@ -36,34 +132,50 @@ def check_health(node: Node, context) -> [str, None]:
         return None
 
 
-def check_bitcoin_height_increase_job(context):
-    nodes = OtherNodesDao().get_nodes_by_network_names([BitcoinNode.network_name])
+def schedule_block_height_increase_jobs(job_queue, nodes: List[Node]):
+    """
+    Schedule a height check for every node at the cadence of its chain (block_height_check_interval_in_seconds).
+    The first checks of the nodes of a chain are spread evenly over one interval so that they don't run at once.
+    """
 
+    nodes_by_network = {}
     for node in nodes:
-        message = check_block_height_increase(context, node)
-        if message:
-            try_message_to_all_users(context, message)
+        nodes_by_network.setdefault(node.network_name, []).append(node)
 
+    for network_nodes in nodes_by_network.values():
+        for index, node in enumerate(network_nodes):
+            interval = node.block_height_check_interval_in_seconds
+            schedule_block_height_increase_job(job_queue, node, when=interval * index / len(network_nodes))
 
-def check_ethereum_height_increase_job(context):
-    nodes = OtherNodesDao().get_nodes_by_network_names([EthereumNode.network_name])
 
-    for node in nodes:
-        message = check_block_height_increase(context, node)
-        if message:
-            try_message_to_all_users(context, message)
+def schedule_block_height_increase_job(job_queue, node: Node, when: float):
+    job_queue.run_once(check_block_height_increase_job,
+                       when=when,
+                       context=node,
+                       name=f"block_height_increase-{node.node_id}")
 
 
-def check_block_height_increase(context, node: Node) -> [str, None]:
+def check_block_height_increase_job(context):
+    node = context.job.context
     try:
-        current_block_height = node.get_block_height()
-    except UnauthorizedException:
-        return f"😱 Your {node.to_string()} returns 401 - Unauthorized! 😱\n" \
-               f" Please make sure the credentials you set are correct!"
-    except Exception as e:
-        logger.error(e)
+        for probed_node in other_nodes_prober.probe([node]):
+            message = check_block_height_increase(context, probed_node)
+            if message:
+                try_message_to_all_users(context, message)
+    finally:
+        # The interval can change between checks, e.g. while the head subscription of an Ethereum node is down
+        schedule_block_height_increase_job(context.job_queue, node, when=node.block_height_check_interval_in_seconds)
+
+
+def check_block_height_increase(context, node: Node) -> [str, None]:
+    probe = node.probe()
+    if isinstance(probe.error, UnauthorizedException):
+        return get_unauthorized_message(node)
+    elif probe.block_height is None:
         return None
 
+    current_block_height = probe.block_height
+
     # Stuck count:
     # 0 == everything's alright
     # 1 == just got stuck
@@ -74,7 +186,15 @@ def check_block_height_increase(context, node: Node) -> [str, None]:
     last_block_height = node_data.get('block_height', float('-inf'))
     message = None
 
-    if current_block_height <= last_block_height:
+    was_pushed = node_data.get('is_block_pushed', False)
+    node_data['is_block_pushed'] = probe.is_stalled is not None
+    if was_pushed and probe.is_stalled is None:
+        # The subscription dropped since the last check, which was too recent to compare a polled height with
+        node_data['block_height'] = current_block_height
+        return None
+
+    is_stuck = current_block_height <= last_block_height if probe.is_stalled is None else probe.is_stalled
+    if is_stuck:
         node_data['block_height_stuck_count'] = node_data.get('block_height_stuck_count', 0) + 1
     elif node_data.get('block_height_stuck_count', 0) > 0:
         message = f"Block height is increasing again! 👌\n" \
@@ -97,18 +217,20 @@ def check_other_nodes_syncing_job(context):
 
     nodes = OtherNodesDao().get_nodes_by_network_names([EthereumNode.network_name, BitcoinNode.network_name])
 
-    for node in nodes:
+    for node in other_nodes_prober.probe(nodes):
         message = check_other_nodes_syncing(node, context)
         if message:
             try_message_to_all_users(context, text=message)
 
 
 def check_other_nodes_syncing(node: Node, context) -> [str, None]:
-    try:
-        is_synced = node.is_fully_synced()
-    except UnauthorizedException:
-        return f"😱 Your {node.to_string()} returns 401 - Unauthorized! 😱\n" \
-               f" Please make sure the credentials you set are correct!"
+    probe = node.probe()
+    if isinstance(probe.error, UnauthorizedException):
+        return get_unauthorized_message(node)
+    elif probe.is_synced is None:
+        return None
+
+    is_synced = probe.is_synced
 
     was_synced = context.bot_data.setdefault(node.node_id, {}).get('syncing', True)
 
@@ -122,3 +244,8 @@ def check_other_nodes_syncing(node: Node, context) -> [str, None]:
         return message
     else:
         return None
+
+
+def get_unauthorized_message(node: Node) -> str:
+    return f"😱 Your {node.to_string()} returns 401 - Unauthorized! 😱\n" \
+           f" Please make sure the credentials you set are correct!"
@@ -1,7 +1,7 @@
 from constants.globals import logger
 from constants.messages import NetworkHealthStatus, NETWORK_HEALTHY_AGAIN, get_network_health_warning
 from handlers.chat_helpers import try_message_to_all_users
-from service.thorchain_network_service import get_network_data, get_thorchain_network_constants
+from service.thorchain_network_service import get_network_data, get_thorchain_network_constants, seed_node_pool
 from service.utils import network_security_ratio_to_string, get_network_security_ratio, flatten_dictionary
 
 
@@ -80,3 +80,14 @@ def check_thorchain_constants(context) -> [str, None]:
     except:
         context.bot_data["constants"] = None
         return None
+
+
+def refresh_seed_node_pool_job(context):
+    """
+    Probe the seed nodes in the background so that requests can pick the best seed node right away
+    """
+
+    try:
+        seed_node_pool.refresh()
+    except Exception as e:
+        logger.exception(e)
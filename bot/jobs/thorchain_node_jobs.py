@@ -1,91 +1,81 @@
 from constants.messages import get_node_health_warning_message, get_node_healthy_again_message
 from handlers.chat_helpers import try_message_with_home_menu, try_message_to_all_users
+from handlers.alert_digest import alert_aggregator
+from message_queue import Priority
 from packaging import version
 
 from service.utils import *
 
 
-def check_thornodes(context):
-    chat_id = context.job.context['chat_id']
-    chat_data = context.job.context['chat_data']
-
-    inactive_nodes = []
-
-    for node_address, local_node in chat_data.get('nodes', {}).items():
-
-        try:
-            remote_node = get_thornode_object_or_none(address=node_address)
-        except HTTPError as e:
-            logger.exception(e)
-            continue
+def check_thornode(context, chat_id, chat_data, node_address, remote_node, check_health=True):
+    """
+    Check a THORNode that the chat monitors against its remote node account.
+    With check_health=False the node itself is not contacted, e.g. because it didn't answer in time.
+    """
 
-        if remote_node is None:
-            text = 'THORNode ' + local_node['alias'] + ' is not active anymore! 💀' + '\n' + \
-                   'Address: ' + node_address + '\n\n' + \
-                   'Please enter another THORNode address.'
+    local_node = chat_data['nodes'][node_address]
 
-            inactive_nodes.append(node_address)
+    if remote_node is None:
+        text = 'THORNode ' + local_node.alias + ' is not active anymore! 💀' + '\n' + \
+               'Address: ' + node_address + '\n\n' + \
+               'Please enter another THORNode address.'
 
-            try_message_with_home_menu(context=context,
-                                       chat_id=chat_id,
-                                       text=text)
-            continue
+        remove_thornode_from_chat_data(chat_id, chat_data, node_address)
 
-        is_not_blocked = float(local_node['last_notification_timestamp']) < \
-                         datetime.timestamp(
-                             datetime.now() - timedelta(seconds=local_node['notification_timeout_in_seconds']))
-        if is_not_blocked:
-            message = build_notification_message_for_active_node(local_node, remote_node, context)
+        alert_aggregator.add(context, chat_id, text)
+        return
 
-            if message:
-                # Update data
-                local_node['status'] = remote_node['status']
-                local_node['bond'] = remote_node['bond']
-                local_node['slash_points'] = remote_node['slash_points']
-                local_node['ip_address'] = remote_node['ip_address']
-                local_node['last_notification_timestamp'] = datetime.timestamp(datetime.now())
-                local_node['notification_timeout_in_seconds'] *= NOTIFICATION_TIMEOUT_MULTIPLIER
+    is_not_blocked = float(local_node.last_notification_timestamp) < \
+                     datetime.timestamp(
+                         datetime.now() - timedelta(seconds=local_node.notification_timeout_in_seconds))
+    if is_not_blocked:
+        message = build_notification_message_for_active_node(local_node, remote_node, context)
 
-                try_message_with_home_menu(context=context,
-                                           chat_id=chat_id,
-                                           text=message)
+        if message:
+            # Update data
+            local_node.status = remote_node['status']
+            local_node.bond = remote_node['bond']
+            local_node.slash_points = remote_node['slash_points']
+            local_node.ip_address = remote_node['ip_address']
+            local_node.last_notification_timestamp = datetime.timestamp(datetime.now())
+            local_node.notification_timeout_in_seconds *= NOTIFICATION_TIMEOUT_MULTIPLIER
 
-            else:
-                local_node['notification_timeout_in_seconds'] = INITIAL_NOTIFICATION_TIMEOUT
+            alert_aggregator.add(context, chat_id, message)
 
-        if local_node['status'].upper() in MONITORED_STATUSES and is_thornode_healthy(context, node_address):
-            check_thorchain_block_height(context, node_address=node_address)
-            check_thorchain_catch_up_status(context, node_address=node_address)
-            check_thorchain_midgard_api(context, node_address=node_address)
+        else:
+            local_node.notification_timeout_in_seconds = INITIAL_NOTIFICATION_TIMEOUT
 
-    for node_address in inactive_nodes:
-        del chat_data['nodes'][node_address]
+    if check_health and local_node.status.upper() in MONITORED_STATUSES and \
+            is_thornode_healthy(context, chat_id, local_node):
+        check_thorchain_block_height(context, chat_id, local_node, node_address=node_address)
+        check_thorchain_catch_up_status(context, chat_id, local_node, node_address=node_address)
+        check_thorchain_midgard_api(context, chat_id, local_node, node_address=node_address)
 
 
 def build_notification_message_for_active_node(local_node, remote_node, context) -> [str, None]:
     changed_fields = [
         field for field in ['status', 'bond', 'slash_points']
-        if local_node[field] != remote_node[field]
+        if getattr(local_node, field) != remote_node[field]
     ]
     threshold = get_slash_points_threshold(context)
 
-    slash_point_change = abs(int(local_node['slash_points']) - int(remote_node['slash_points']))
+    slash_point_change = abs(int(local_node.slash_points) - int(remote_node['slash_points']))
     if (len(changed_fields) <= 1) and ('slash_points' in changed_fields) and (slash_point_change <= threshold):
         return None
 
     if len(changed_fields) > 0:
-        text = f"THORNode: {local_node['alias']}\n" \
-               f"Address: {local_node['node_address']}\n" \
-               f"Status: {local_node['status'].capitalize()}"
+        text = f"THORNode: {local_node.alias}\n" \
+               f"Address: {local_node.node_address}\n" \
+               f"Status: {local_node.status.capitalize()}"
 
         if 'status' in changed_fields:
             text += f' ➡️ {remote_node["status"].capitalize()}'
 
-        text += f"\nBond: {tor_to_rune(int(local_node['bond']))}"
+        text += f"\nBond: {tor_to_rune(int(local_node.bond))}"
         if 'bond' in changed_fields:
             text += f" ➡️ {tor_to_rune(int(remote_node['bond']))}"
 
-        text += '\nSlash Points: ' + '{:,}'.format(int(local_node['slash_points']))
+        text += '\nSlash Points: ' + '{:,}'.format(int(local_node.slash_points))
         if 'slash_points' in changed_fields:
             text += ' ➡️ ' + '{:,}'.format(int(remote_node['slash_points']))
 
@@ -94,32 +84,34 @@ def build_notification_message_for_active_node(local_node, remote_node, context)
         return None
 
 
-def check_versions_status(context):
-    chat_data = context.job.context['chat_data']
+def get_highest_version(node_accounts) -> [str, None]:
+    return max((node['version'] for node in node_accounts), key=version.parse, default=None)
 
-    try:
-        node_accounts = get_node_accounts()
-    except Exception as e:
-        logger.exception(e)
-        logger.error("I couldn't get the node accounts while checking version status.")
+
+def check_versions_status(context, chat_id, chat_data, highest_version: [str, None]):
+    """
+    Tell the chat about its nodes that run an older version than the highest one of the network.
+    The highest version is computed once per tick for all chats.
+    """
+
+    if highest_version is None:
         return
 
-    highest_version = max(map(lambda n: n['version'], node_accounts),
-                          key=lambda v: version.parse(v))
     last_newest_version = chat_data.get('newest_software_version', None)
 
     if last_newest_version is None or version.parse(
             highest_version) > version.parse(last_newest_version):
         chat_data['newest_software_version'] = highest_version
         for node in chat_data.get('nodes', {}).values():
-            if version.parse(node['version']) < version.parse(highest_version):
-                message = f"Consider updating the software on your node: *{node['alias']}*   ‼️\n" \
-                          f"Your software version is *{node['version']}* " \
+            if version.parse(node.version) < version.parse(highest_version):
+                message = f"Consider updating the software on your node: *{node.alias}*   ‼️\n" \
+                          f"Your software version is *{node.version}* " \
                           f"but one of the nodes already runs on *{highest_version}*"
                 try_message_with_home_menu(
                     context,
-                    chat_id=context.job.context['chat_id'],
-                    text=message)
+                    chat_id=chat_id,
+                    text=message,
+                    priority=Priority.BULK)
 
 
 def check_churning(context):
@@ -221,69 +213,60 @@ def did_churn_happen(validator, local_node_statuses, highest_churn_status_since)
     return False
 
 
-def is_thornode_healthy(context, node_address) -> bool:
-    chat_id = context.job.context['chat_id']
-    node_data = context.job.context['chat_data']['nodes'][node_address]
-
+def is_thornode_healthy(context, chat_id, node_data) -> bool:
     # If not initialized assuming node was healhty.
-    if "healthy" not in context.job.context['chat_data']['nodes'][node_address]:
-        context.job.context['chat_data']['nodes'][node_address]["healthy"] = True
-
-    was_healthy = node_data["healthy"]
+    was_healthy = node_data.healthy
 
     try:
         # Check whether node answers. If it doesn't we get an Exception.
-        get_latest_block_height(node_data['ip_address'])
+        get_latest_block_height(node_data.ip_address)
 
         if not was_healthy:
-            try_message_with_home_menu(context=context, chat_id=chat_id, text=get_node_healthy_again_message(node_data))
+            alert_aggregator.add(context, chat_id, get_node_healthy_again_message(node_data))
 
-        context.job.context['chat_data']['nodes'][node_address]["healthy"] = True
+        node_data.healthy = True
         return True
 
     except (Timeout, ConnectionError, BadStatusException, Exception):
         if was_healthy:
-            try_message_with_home_menu(context=context, chat_id=chat_id, text=get_node_health_warning_message(node_data))
+            alert_aggregator.add(context, chat_id, get_node_health_warning_message(node_data))
 
-        context.job.context['chat_data']['nodes'][node_address]["healthy"] = False
+        node_data.healthy = False
         return False
 
 
-def check_thorchain_block_height(context, node_address):
-    chat_id = context.job.context['chat_id']
-    node_data = context.job.context['chat_data']['nodes'][node_address]
-
+def check_thorchain_block_height(context, chat_id, node_data, node_address):
     try:
-        block_height = get_latest_block_height(node_data['ip_address'])
+        block_height = get_latest_block_height(node_data.ip_address)
     except (Timeout, ConnectionError):
-        logger.warning(f"Timeout or Connection error with {node_data['ip_address']}")
+        logger.warning(f"Timeout or Connection error with {node_data.ip_address}")
         return
 
-    is_stuck = block_height <= node_data.setdefault('block_height', 0)
-    block_height_stuck_count = node_data.setdefault("block_height_stuck_count", 0)
+    is_stuck = block_height <= node_data.block_height
+    block_height_stuck_count = node_data.block_height_stuck_count
 
     if is_stuck:
         block_height_stuck_count += 1
         if block_height_stuck_count == 1:
             text = 'Block height is not increasing anymore! 💀' + '\n' + \
-                   'IP: ' + node_data['ip_address'] + '\n' + \
-                   'THORNode: ' + node_data['alias'] + '\n' + \
+                   'IP: ' + node_data.ip_address + '\n' + \
+                   'THORNode: ' + node_data.alias + '\n' + \
                    'Node address: ' + node_address + '\n' + \
-                   'Block height stuck at: ' + block_height + '\n\n' + \
+                   'Block height stuck at: ' + str(block_height) + '\n\n' + \
                    'Please check your Thornode immediately!'
-            try_message_with_home_menu(context=context, chat_id=chat_id, text=text)
+            alert_aggregator.add(context, chat_id, text)
     else:
         if block_height_stuck_count >= 1:
             text = f"Block height is increasing again! 👌\n" + \
-                   f"IP: {node_data['ip_address']}\n" + \
-                   f"THORNode: {node_data['alias']}\n" + \
+                   f"IP: {node_data.ip_address}\n" + \
+                   f"THORNode: {node_data.alias}\n" + \
                    f"Node address: {node_address}\n" + \
                    f"Block height now at: {block_height}\n"
-            try_message_with_home_menu(context=context, chat_id=chat_id, text=text)
+            alert_aggregator.add(context, chat_id, text)
         block_height_stuck_count = 0
 
-    node_data['block_height'] = block_height
-    node_data["block_height_stuck_count"] = block_height_stuck_count
+    node_data.block_height = block_height
+    node_data.block_height_stuck_count = block_height_stuck_count
 
 
 def check_solvency_job(context):
@@ -303,7 +286,7 @@ def check_solvency(context) -> [str, None]:
         logger.exception(e)
         return None
 
-    is_solvent = asgard_solvency['is_solvent'] and yggdrasil_solvency['is_solvent']
+    is_solvent = asgard_solvency.is_solvent and yggdrasil_solvency.is_solvent
     insolvency_count = context.bot_data.setdefault("insolvency_count", 0)
 
     message = None
@@ -322,74 +305,68 @@ def check_solvency(context) -> [str, None]:
     return message
 
 
-def check_thorchain_catch_up_status(context, node_address):
+def check_thorchain_catch_up_status(context, chat_id, node_data, node_address):
     """
     Check if node is some blocks behind with catch up status
     """
 
-    chat_id = context.job.context['chat_id']
-    node_data = context.job.context['chat_data']['nodes'][node_address]
-
-    if 'is_catching_up' not in node_data:
-        node_data['is_catching_up'] = False
+    if node_data.is_catching_up is None:
+        node_data.is_catching_up = False
 
     try:
         is_currently_catching_up = is_thorchain_catching_up(
-            node_data['ip_address'])
+            node_data.ip_address)
     except (Timeout, ConnectionError):
-        logger.warning(f"Timeout or Connection error with {node_data['ip_address']}")
+        logger.warning(f"Timeout or Connection error with {node_data.ip_address}")
         return
 
-    if node_data['is_catching_up'] != is_currently_catching_up:
+    if node_data.is_catching_up != is_currently_catching_up:
         try:
-            block_height = get_latest_block_height(node_data['ip_address'])
+            block_height = get_latest_block_height(node_data.ip_address)
         except (Timeout, ConnectionError):
-            logger.warning(f"Timeout or Connection error with {node_data['ip_address']}")
+            logger.warning(f"Timeout or Connection error with {node_data.ip_address}")
             block_height = "currently unavailable"
 
         if is_currently_catching_up:
-            node_data['is_catching_up'] = True
+            node_data.is_catching_up = True
             text = 'The Node is behind the latest block height and catching up! 💀 ' + '\n' + \
-                   'IP: ' + node_data['ip_address'] + '\n' + \
-                   'THORNode: ' + node_data['alias'] + '\n' + \
+                   'IP: ' + node_data.ip_address + '\n' + \
+                   'THORNode: ' + node_data.alias + '\n' + \
                    'Node address: ' + node_address + '\n' + \
-                   'Current block height: ' + block_height + '\n\n' + \
+                   'Current block height: ' + str(block_height) + '\n\n' + \
                    'Please check your Thornode immediately!'
         else:
-            node_data['is_catching_up'] = False
+            node_data.is_catching_up = False
             text = 'The node caught up to the latest block height again! 👌' + '\n' + \
-                   'IP: ' + node_data['ip_address'] + '\n' + \
-                   'THORNode: ' + node_data['alias'] + '\n' + \
+                   'IP: ' + node_data.ip_address + '\n' + \
+                   'THORNode: ' + node_data.alias + '\n' + \
                    'Node address: ' + node_address + '\n' + \
-                   'Current block height: ' + block_height
-        try_message_with_home_menu(context=context, chat_id=chat_id, text=text)
+                   'Current block height: ' + str(block_height)
+        alert_aggregator.add(context, chat_id, text)
 
 
-def check_thorchain_midgard_api(context, node_address):
+def check_thorchain_midgard_api(context, chat_id, node_data, node_address):
     """
     Check that Midgard API is ok
     """
+    was_healthy = node_data.is_midgard_healthy
 
-    chat_id = context.job.context['chat_id']
-    node_data = context.job.context['chat_data']['nodes'][node_address]
-    was_healthy = node_data.setdefault('is_midgard_healthy', True)
-
-    is_midgard_healthy = is_midgard_api_healthy(node_data['ip_address'])
+    is_midgard_healthy = is_midgard_api_healthy(node_data.ip_address)
 
     if was_healthy != is_midgard_healthy:
         if is_midgard_healthy:
             text = 'Midgard API is healthy again! 👌' + '\n' + \
-                   'IP: ' + node_data['ip_address'] + '\n' + \
-                   'THORNode: ' + node_data['alias'] + '\n' + \
+                   'IP: ' + node_data.ip_address + '\n' + \
+                   'THORNode: ' + node_data.alias + '\n' + \
                    'Node address: ' + node_address
-            try_message_with_home_menu(context, chat_id=chat_id, text=text)
+            alert_aggregator.add(context, chat_id, text)
         else:
             text = 'Midgard API is not healthy anymore! 💀' + '\n' + \
-                   'IP: ' + node_data['ip_address'] + '\n' + \
-                   'THORNode: ' + node_data['alias'] + '\n' + \
+                   'IP: ' + node_data.ip_address + '\n' + \
+                   'THORNode: ' + node_data.alias + '\n' + \
                    'Node address: ' + node_address + '\n\n' + \
                    'Please check your Thornode immediately!'
-            try_message_with_home_menu(context, chat_id=chat_id, text=text)
+            alert_aggregator.add(context, chat_id, text)
 
-        node_data['is_midgard_healthy'] = is_midgard_healthy
+        node_data.is_midgard_healthy = is_midgard_healthy
 
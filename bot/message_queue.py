@@ -1,9 +1,135 @@
 # This approach to message queues if taken from the official wiki
 # https://github.com/python-telegram-bot/python-telegram-bot/wiki/Avoiding-flood-limits
+# The MessageQueue of the library is replaced by a PriorityMessageQueue, so alerts don't wait behind bulk messages.
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from enum import IntEnum
+from functools import partial
+from typing import NamedTuple, Dict
 
-from functools import wraps
 import telegram.bot
-from telegram.ext import messagequeue as mq
+
+
+class Priority(IntEnum):
+    CRITICAL = 0  # Alerts about a node of the chat
+    INTERACTIVE = 1  # Replies to what a user did
+    BULK = 2  # Broadcasts to all chats and other notices
+
+
+class LaneStats(NamedTuple):
+    depth: int  # Messages waiting right now
+    sent: int
+    average_wait_in_seconds: float
+    max_wait_in_seconds: float
+
+
+class PriorityMessageQueue:
+    """
+    Sends messages from one thread within a rate budget: all_burst_limit messages per all_time_limit_ms in total and
+    group_burst_limit messages per group_time_limit_ms to groups, like the MessageQueue of the library.
+    Messages wait in one lane per priority and a message of a higher lane is always sent first.
+    Within a lane messages keep their order, except that group messages wait for the group budget.
+    """
+
+    def __init__(self, all_burst_limit=20, all_time_limit_ms=1000, group_burst_limit=2, group_time_limit_ms=7000):
+        self._all_window = _SlidingWindow(all_burst_limit, all_time_limit_ms / 1000)
+        self._group_window = _SlidingWindow(group_burst_limit, group_time_limit_ms / 1000)
+        self._condition = threading.Condition()
+        self._lanes = {priority: deque() for priority in Priority}
+        self._stats = {priority: [0, 0.0, 0.0] for priority in Priority}  # Sent, total wait, max wait
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='message-queue', daemon=True)
+        self._thread.start()
+
+    def put(self, send, is_group_msg=False, priority=Priority.INTERACTIVE) -> Future:
+        future = Future()
+        with self._condition:
+            self._lanes[priority].append((time.monotonic(), send, future, is_group_msg))
+            self._condition.notify()
+
+        return future
+
+    def get_stats(self) -> Dict[Priority, LaneStats]:
+        with self._condition:
+            return {priority: LaneStats(depth=len(self._lanes[priority]),
+                                        sent=sent,
+                                        average_wait_in_seconds=total_wait / sent if sent else 0.0,
+                                        max_wait_in_seconds=max_wait)
+                    for priority, (sent, total_wait, max_wait) in self._stats.items()}
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                message = self._next_message()
+                if message is None:
+                    return
+
+            _, send, future, _ = message
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(send())
+                except Exception as e:
+                    future.set_exception(e)
+
+    def _next_message(self):
+        while self._running:
+            now = time.monotonic()
+            wait_in_seconds = self._all_window.get_wait(now)
+            if wait_in_seconds == 0:
+                group_wait_in_seconds = self._group_window.get_wait(now)
+                for priority, lane in self._lanes.items():
+                    for index, message in enumerate(lane):
+                        if not message[3] or group_wait_in_seconds == 0:
+                            del lane[index]
+                            self._all_window.add(now)
+                            if message[3]:
+                                self._group_window.add(now)
+                            self._record_wait(priority, now - message[0])
+                            return message
+
+                # Only group messages are waiting, but the group budget is used up
+                wait_in_seconds = group_wait_in_seconds if any(self._lanes.values()) else None
+
+            self._condition.wait(wait_in_seconds)
+
+        return None
+
+    def _record_wait(self, priority: Priority, wait_in_seconds: float):
+        stats = self._stats[priority]
+        stats[0] += 1
+        stats[1] += wait_in_seconds
+        stats[2] = max(stats[2], wait_in_seconds)
+
+
+class _SlidingWindow:
+    """
+    Allows limit events within any period of time_limit_in_seconds
+    """
+
+    def __init__(self, limit: int, time_limit_in_seconds: float):
+        self._limit = limit
+        self._time_limit_in_seconds = time_limit_in_seconds
+        self._events = deque()
+
+    def get_wait(self, now: float) -> float:
+        while self._events and now - self._events[0] >= self._time_limit_in_seconds:
+            self._events.popleft()
+
+        if len(self._events) < self._limit:
+            return 0
+
+        return self._events[0] + self._time_limit_in_seconds - now
+
+    def add(self, now: float):
+        self._events.append(now)
 
 
 class MQBot(telegram.bot.Bot):
@@ -13,9 +139,8 @@ class MQBot(telegram.bot.Bot):
 
     def __init__(self, *args, is_queued_def=True, mqueue=None, **kwargs):
         super(MQBot, self).__init__(*args, **kwargs)
-        # below 2 attributes should be provided for decorator usage
         self._is_messages_queued_default = is_queued_def
-        self._msg_queue = mqueue or mq.MessageQueue()
+        self._msg_queue = mqueue or PriorityMessageQueue()
 
     def __del__(self):
         try:
@@ -23,11 +148,28 @@ class MQBot(telegram.bot.Bot):
         except:
             pass
 
-    @mq.queuedmessage
-    def send_message(self, *args, **kwargs):
+    def send_message(self, *args, queued=None, isgroup=False, priority=Priority.INTERACTIVE, **kwargs):
         """
-        Wrapped method would accept new `queued` and `isgroup`
-        OPTIONAL arguments
+        Accepts the OPTIONAL arguments `queued`, `isgroup` and `priority`.
+        Queued messages return a Future of the sent message.
         """
 
-        return super(MQBot, self).send_message(*args, **kwargs)
+        if not (self._is_messages_queued_default if queued is None else queued):
+            return super(MQBot, self).send_message(*args, **kwargs)
+
+        return self._msg_queue.put(partial(super(MQBot, self).send_message, *args, **kwargs),
+                                   is_group_msg=isgroup,
+                                   priority=priority)
+
+    def edit_message_text(self, *args, queued=False, isgroup=False, priority=Priority.INTERACTIVE, **kwargs):
+        """
+        Accepts the OPTIONAL arguments `queued`, `isgroup` and `priority` like send_message.
+        Edits are only queued if asked to, because handlers expect the edited message right away.
+        """
+
+        if not queued:
+            return super(MQBot, self).edit_message_text(*args, **kwargs)
+
+        return self._msg_queue.put(partial(super(MQBot, self).edit_message_text, *args, **kwargs),
+                                   is_group_msg=isgroup,
+                                   priority=priority)
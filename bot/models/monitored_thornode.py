@@ -0,0 +1,74 @@
+from datetime import datetime
+
+from constants.globals import INITIAL_NOTIFICATION_TIMEOUT
+
+
+class MonitoredThornode:
+    """
+    What a chat stores about a THORNode it monitors.
+    Only holds the fields the checks need instead of the whole node account (signer membership, pub keys, jail, ...),
+    because it is kept once per chat and node and persisted with the chat data.
+    """
+
+    __slots__ = ('node_address', 'alias', 'status', 'bond', 'slash_points', 'ip_address', 'version',
+                 'last_notification_timestamp', 'notification_timeout_in_seconds',
+                 'healthy', 'block_height', 'block_height_stuck_count', 'is_catching_up', 'is_midgard_healthy')
+
+    def __init__(self, node_address: str, alias: str, status: str, bond: str, slash_points: str, ip_address: str,
+                 version: str):
+        self.node_address = node_address
+        self.alias = alias
+        self.status = status
+        self.bond = bond
+        self.slash_points = slash_points
+        self.ip_address = ip_address
+        self.version = version
+        self.last_notification_timestamp = datetime.timestamp(datetime.now())
+        self.notification_timeout_in_seconds = INITIAL_NOTIFICATION_TIMEOUT
+        self.healthy = True
+        self.block_height = 0
+        self.block_height_stuck_count = 0
+        self.is_catching_up = None  # Unknown until the first check
+        self.is_midgard_healthy = True
+
+    @classmethod
+    def from_node_account(cls, node_account: dict, alias: str):
+        return cls(node_address=node_account['node_address'],
+                   alias=alias,
+                   status=node_account['status'],
+                   bond=node_account['bond'],
+                   slash_points=node_account['slash_points'],
+                   ip_address=node_account['ip_address'],
+                   version=node_account['version'])
+
+    @classmethod
+    def migrate(cls, node):
+        """
+        Sessions of older versions stored the whole node account dict with the chat specific fields mixed in.
+        Returns node unchanged if it was migrated already.
+        """
+
+        if isinstance(node, cls):
+            return node
+
+        monitored_node = cls.from_node_account(node, alias=node['alias'])
+        for field in cls.__slots__:
+            if field in node:
+                setattr(monitored_node, field, node[field])
+
+        return monitored_node
+
+    def update_from_node_account(self, node_account: dict):
+        self.status = node_account['status']
+        self.bond = node_account['bond']
+        self.slash_points = node_account['slash_points']
+        self.ip_address = node_account['ip_address']
+        self.version = node_account['version']
+
+    # Pickled as a plain tuple of values in the order of __slots__, so new fields must be appended at the end
+    def __getstate__(self):
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    def __setstate__(self, state):
+        for i, field in enumerate(self.__slots__):
+            setattr(self, field, state[i] if i < len(state) else None)
@@ -0,0 +1,38 @@
+from collections import defaultdict
+from typing import List
+
+
+class NodeAccounts:
+    """
+    Node accounts of a single fetch, indexed by node address, status and IP address.
+    Iterating yields the node accounts in the order the THORChain API returned them.
+    """
+
+    def __init__(self, node_accounts: List[dict]):
+        self._node_accounts = node_accounts
+        self._by_address = {}
+        self._by_status = defaultdict(list)
+        self._by_ip_address = defaultdict(list)
+
+        for node in node_accounts:
+            self._by_address[node['node_address']] = node
+            self._by_status[node['status'].lower()].append(node)
+            self._by_ip_address[node['ip_address']].append(node)
+
+    def __iter__(self):
+        return iter(self._node_accounts)
+
+    def __len__(self):
+        return len(self._node_accounts)
+
+    def __contains__(self, address):
+        return address in self._by_address
+
+    def get(self, address) -> [dict, None]:
+        return self._by_address.get(address, None)
+
+    def with_status(self, status: str) -> List[dict]:
+        return self._by_status.get(status.lower(), [])
+
+    def with_ip_address(self, ip_address: str) -> List[dict]:
+        return self._by_ip_address.get(ip_address, [])
@@ -1,38 +1,89 @@
 import abc
+import time
+from typing import NamedTuple, Callable
 
 from service.binance_network_service import *
 from service.ethereum_network_service import *
+from constants.globals import NODE_PROBE_MAX_AGE_IN_SECONDS, ETHEREUM_HEAD_SUBSCRIPTIONS
+from service.cache import TimedSnapshot
 from service.general_network_service import *
 
 
+class NodeProbe(NamedTuple):
+    """
+    Everything the checks need to know about a node at one point in time.
+    A probe that failed is not healthy and holds the error, e.g. an UnauthorizedException.
+    """
+
+    healthy: bool
+    block_height: int = None
+    network_block_height: int = None
+    is_synced: bool = None
+    latency: float = None
+    error: Exception = None
+    # Set by nodes that push their blocks. Replaces comparing the block height with the one of the last check.
+    is_stalled: bool = None
+
+
 class Node(abc.ABC):
     node_id: str
     node_ip: str
     network_name: str
     network_short_name: str
+    # Time in which a healthy node of the chain surely produces a new block. Also the cadence of its height check.
+    max_time_for_block_height_increase_in_seconds: int
 
     def __init__(self, node_ip, network_name, network_short_name):
         self.node_ip = node_ip
         self.network_name = network_name
         self.node_id = f'{network_name}-{node_ip}'
         self.network_short_name = network_short_name
+        self._probe_snapshot = TimedSnapshot(fetch=self._timed_probe, max_age_in_seconds=NODE_PROBE_MAX_AGE_IN_SECONDS)
 
-    @abc.abstractmethod
-    def is_healthy(self) -> bool:
-        pass
+    def probe(self, get_network_block_height: Callable[[], int] = None) -> NodeProbe:
+        """
+        Returns the probe of this tick. All checks of a node within one probe interval share it.
+        The prober passes a function that returns the network block height, which it fetches once for all nodes
+        of the chain. It's only called once the node answered, so the node's request doesn't wait for it.
+        """
 
-    @abc.abstractmethod
-    def is_fully_synced(self) -> bool:
-        pass
+        if get_network_block_height is not None and not self._probe_snapshot.is_fresh():
+            self._probe_snapshot.put(self._timed_probe(get_network_block_height))
 
-    @abc.abstractmethod
-    def get_block_height(self):
-        pass
+        return self._probe_snapshot.get()
+
+    def is_probe_fresh(self) -> bool:
+        return self._probe_snapshot.is_fresh()
+
+    @staticmethod
+    def fetch_network_block_height() -> [int, None]:
+        """
+        Block height of the whole network, for chains whose nodes can't tell it themselves
+        """
+
+        return None
+
+    @property
+    def block_height_check_interval_in_seconds(self) -> float:
+        return self.max_time_for_block_height_increase_in_seconds
 
     @abc.abstractmethod
-    def get_network_block_count(self):
+    def fetch_probe(self) -> NodeProbe:
         pass
 
+    def _timed_probe(self, get_network_block_height: Callable[[], int] = None) -> NodeProbe:
+        start = time.monotonic()
+        try:
+            probe = self.fetch_probe()
+        except Exception as e:
+            probe = NodeProbe(healthy=False, error=e)
+
+        probe = probe._replace(latency=time.monotonic() - start)
+        if probe.healthy and probe.network_block_height is None and get_network_block_height is not None:
+            probe = probe._replace(network_block_height=get_network_block_height())
+
+        return probe
+
     def __hash__(self):
         return hash(self.node_id)
 
@@ -40,41 +91,46 @@ class Node(abc.ABC):
         return f"{self.network_name} node ({self.node_ip})"
 
 
-class BitcoinNode(Node):
+class BitcoinLikeNode(Node):
+    """
+    Base of Bitcoin and its forks. Their daemons answer JSON-RPC batch arrays, so a probe is a single request.
+    """
+
     max_time_for_block_height_increase_in_seconds = 60 * 60  # 1 hour
-    network_name = "Bitcoin"
     ip_with_credentials: str = None
 
-    def __init__(self, address):
+    def __init__(self, address, network_name, network_short_name):
         self.ip_with_credentials = address
         ip = address.split("@")[-1].split(":")[0]
-        super().__init__(ip, self.network_name, "BTC")
-
-    def is_fully_synced(self) -> bool:
-        info = btc_rpc_request(address=self.ip_with_credentials, method='getblockchaininfo').json()['result']
-
-        return info['blocks'] == info['headers']
+        super().__init__(ip, network_name, network_short_name)
 
-    def get_block_height(self):
-        block_count_res = btc_rpc_request(address=self.ip_with_credentials, method='getblockcount')
-        if block_count_res.status_code == 401:
+    def fetch_probe(self) -> NodeProbe:
+        calls = [('getblockchaininfo', []), ('getblockcount', [])]
+        response = rpc_batch_request(url=f'http://{self.ip_with_credentials}', calls=calls, jsonrpc_version="1.0")
+        if response.status_code == 401:
             raise UnauthorizedException()
+        if not response.ok:
+            raise BadStatusException(response)
 
-        return block_count_res.json()['result']
+        blockchain_info, block_count = parse_rpc_batch_response(response, len(calls))
+        error = blockchain_info.get('error') or block_count.get('error')
+        if error:
+            raise Exception(f"{self.to_string()} responded with error: {error}")
 
-    def is_healthy(self) -> bool:
-        res = btc_rpc_request(address=self.ip_with_credentials,
-                              method='getblockchaininfo')
-        if res.status_code == 401:
-            raise UnauthorizedException()
+        return NodeProbe(healthy=True,
+                         block_height=block_count['result'],
+                         network_block_height=blockchain_info['result']['headers'],
+                         is_synced=self.is_synced(blockchain_info['result'], block_count['result']))
+
+    def is_synced(self, blockchain_info: dict, block_count: int) -> bool:
+        return blockchain_info['blocks'] == blockchain_info['headers']
 
-        return res.ok
 
-    def get_network_block_count(self):
-        info = btc_rpc_request(address=self.ip_with_credentials,
-                               method='getblockchaininfo').json()
+class BitcoinNode(BitcoinLikeNode):
+    network_name = "Bitcoin"
 
-        return info['result']['headers']
+    def __init__(self, address):
+        super().__init__(address, self.network_name, "BTC")
 
     @staticmethod
     def from_ips(ips) -> list:
@@ -93,17 +149,29 @@ class EthereumNode(Node):
     def __init__(self, node_ip):
         super().__init__(node_ip, self.network_name, "ETH")
 
-    def is_fully_synced(self) -> bool:
-        return is_eth_node_fully_synced(self.node_ip)
+    @property
+    def block_height_check_interval_in_seconds(self) -> float:
+        # Pushed heads are in memory, so a stall can be reported as soon as the probe sees it. Without an open
+        # subscription the check compares polled heights, which need the full time of the chain to increase.
+        if ETHEREUM_HEAD_SUBSCRIPTIONS and ethereum_head_tracker.get_head(self.node_ip) is not None:
+            return NODE_PROBE_MAX_AGE_IN_SECONDS
 
-    def get_block_height(self):
-        return get_eth_node_block_height(self.node_ip)
+        return self.max_time_for_block_height_increase_in_seconds
 
-    def is_healthy(self) -> bool:
-        return is_eth_node_healthy(self.node_ip)
+    def fetch_probe(self) -> NodeProbe:
+        head = ethereum_head_tracker.get_head(self.node_ip)
+        if head is not None:
+            return NodeProbe(healthy=True,
+                             block_height=head.height,
+                             is_synced=ethereum_head_tracker.is_synced(head),
+                             is_stalled=ethereum_head_tracker.is_stalled(head))
 
-    def get_network_block_count(self):
-        return get_eth_network_block_count(self.node_ip)
+        block_height, network_block_height, is_synced = get_eth_node_sync_state(self.node_ip)
+
+        return NodeProbe(healthy=True,
+                         block_height=block_height,
+                         network_block_height=network_block_height,
+                         is_synced=is_synced)
 
     @staticmethod
     def from_ips(ips) -> list:
@@ -111,63 +179,33 @@ class EthereumNode(Node):
 
 
 class BinanceNode(Node):
+    max_time_for_block_height_increase_in_seconds = 60  # 1 min
     network_name = "Binance"
 
     def __init__(self, node_ip):
         super().__init__(node_ip, self.network_name, "BNB")
 
-    def is_fully_synced(self) -> bool:
-        return not is_binance_node_syncing(self.node_ip)
+    def fetch_probe(self) -> NodeProbe:
+        block_height, is_catching_up = get_binance_node_sync_state(self.node_ip)
 
-    def get_block_height(self):
-        return get_binance_node_block_height(self.node_ip)
+        return NodeProbe(healthy=True,
+                         block_height=block_height,
+                         is_synced=not is_catching_up)
 
-    def is_healthy(self) -> bool:
-        return is_binance_node_healthy(self.node_ip)
+    @staticmethod
+    def fetch_network_block_height() -> int:
+        return int(get_binance_network_block_count())
 
     @staticmethod
     def from_ips(ips) -> list:
         return list(map(lambda n: BinanceNode(n), ips))
 
-    def get_network_block_count(self):
-        return get_binance_network_block_count()
-
 
-class BitcoinCashNode(Node):
-    max_time_for_block_height_increase_in_seconds = 60 * 60  # 1 hour
+class BitcoinCashNode(BitcoinLikeNode):
     network_name = "Bitcoin Cash"
-    ip_with_credentials: str = None
 
     def __init__(self, address):
-        self.ip_with_credentials = address
-        ip = address.split("@")[-1].split(":")[0]
-        super().__init__(ip, self.network_name, "BCH")
-
-    def is_fully_synced(self) -> bool:
-        info = bch_rpc_request(address=self.ip_with_credentials, method='getblockchaininfo').json()['result']
-
-        return info['blocks'] == info['headers']
-
-    def get_block_height(self):
-        block_count_res = bch_rpc_request(address=self.ip_with_credentials, method='getblockcount')
-        if block_count_res.status_code == 401:
-            raise UnauthorizedException()
-
-        return block_count_res.json()['result']
-
-    def is_healthy(self) -> bool:
-        res = bch_rpc_request(address=self.ip_with_credentials, method='getblockchaininfo')
-        if res.status_code == 401:
-            raise UnauthorizedException()
-
-        return res.ok
-
-    def get_network_block_count(self):
-        res = bch_rpc_request(address=self.ip_with_credentials, method='getblockchaininfo')
-        if res.status_code == 401:
-            raise UnauthorizedException()
-
-        return res.json()['result']['headers']
+        super().__init__(address, self.network_name, "BCH")
 
     @staticmethod
     def from_ips(ips) -> list:
@@ -178,42 +216,14 @@ class BitcoinCashNode(Node):
         return bch_nodes
 
 
-class LiteCoinNode(Node):
-    max_time_for_block_height_increase_in_seconds = 60 * 60  # 1 hour
+class LiteCoinNode(BitcoinLikeNode):
     network_name = "Litecoin"
-    ip_with_credentials: str = None
 
     def __init__(self, address):
-        self.ip_with_credentials = address
-        ip = address.split("@")[-1].split(":")[0]
-        super().__init__(ip, self.network_name, "LTC")
-
-    def is_fully_synced(self) -> bool:
-        node_height = self.get_block_height()
-        network_height = self.get_network_block_count()
-
-        return node_height == network_height
-
-    def get_block_height(self):
-        res = ltc_rpc_request(address=self.ip_with_credentials, method='getblockcount')
-        if res.status_code == 401:
-            raise UnauthorizedException()
-
-        return res.json()['result']
-
-    def is_healthy(self) -> bool:
-        res = ltc_rpc_request(address=self.ip_with_credentials, method='getblockchaininfo')
-        if res.status_code == 401:
-            raise UnauthorizedException()
-
-        return res.ok
-
-    def get_network_block_count(self):
-        res = ltc_rpc_request(address=self.ip_with_credentials, method='getblockchaininfo')
-        if res.status_code == 401:
-            raise UnauthorizedException()
+        super().__init__(address, self.network_name, "LTC")
 
-        return res.json()['result']['headers']
+    def is_synced(self, blockchain_info: dict, block_count: int) -> bool:
+        return block_count == blockchain_info['headers']
 
     @staticmethod
     def from_ips(ips) -> list:
@@ -0,0 +1,41 @@
+from typing import NamedTuple, Tuple, Dict
+
+
+class VaultBalance(NamedTuple):
+    """
+    Expected and actual amount of one asset of one vault in base units (1e-8 of a coin)
+    """
+
+    vault: str  # Pub key of the vault
+    chain: str
+    asset: str  # e.g. BNB.BUSD-BD1
+    expected: int
+    actual: int
+
+    @property
+    def delta(self) -> int:
+        return self.actual - self.expected
+
+    @property
+    def is_solvent(self) -> bool:
+        return self.actual >= self.expected
+
+
+class SolvencyReport(NamedTuple):
+    solvent_balances: Tuple[VaultBalance, ...]
+    insolvent_balances: Tuple[VaultBalance, ...]
+
+    @property
+    def is_solvent(self) -> bool:
+        return not self.insolvent_balances
+
+    def get_actual_amounts_by_asset(self) -> Dict[str, int]:
+        """
+        Actual amounts of the solvent balances summed up over all vaults
+        """
+
+        amounts = {}
+        for balance in self.solvent_balances:
+            amounts[balance.asset] = amounts.get(balance.asset, 0) + balance.actual
+
+        return amounts
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import Future
+
+import aiohttp
+
+from constants.globals import CONNECTION_TIMEOUT, HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE
+
+
+class AsyncResponse:
+    """
+    The parts of a requests.Response that callers of the service layer use,
+    read completely so that it stays valid after the aiohttp response is released.
+    """
+
+    def __init__(self, status_code: int, text: str):
+        self.status_code = status_code
+        self.text = text
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class AsyncHttpClient:
+    """
+    One long-lived aiohttp session that lives on its own event loop thread.
+    The loop thread is started on first use. Synchronous code hands coroutines over with submit() or run(),
+    coroutines of other event loops (e.g. handlers running asyncio.run) await them with call().
+    """
+
+    def __init__(self, connection_limit=HTTP_POOL_CONNECTIONS, connection_limit_per_host=HTTP_POOL_MAXSIZE):
+        self._connection_limit = connection_limit
+        self._connection_limit_per_host = connection_limit_per_host
+        self._lock = threading.Lock()
+        self._loop = None
+        self.session = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='async-http', daemon=True).start()
+                self.session = asyncio.run_coroutine_threadsafe(self._create_session(), loop).result()
+                self._loop = loop
+
+            return self._loop
+
+    def submit(self, coroutine) -> Future:
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run(self, coroutine, timeout=None):
+        """
+        Blocks until the coroutine finished on the client loop. Must not be called from the client loop itself.
+        """
+
+        return self.submit(coroutine).result(timeout)
+
+    async def call(self, coroutine):
+        loop = self.loop
+        if asyncio.get_running_loop() is loop:
+            return await coroutine
+
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, loop))
+
+    async def request(self, method: str, url: str, **kwargs) -> AsyncResponse:
+        async with self.session.request(method, url, **kwargs) as response:
+            return AsyncResponse(status_code=response.status, text=await response.text())
+
+    async def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(limit=self._connection_limit,
+                                         limit_per_host=self._connection_limit_per_host)
+        return aiohttp.ClientSession(connector=connector,
+                                     timeout=aiohttp.ClientTimeout(total=CONNECTION_TIMEOUT))
+
+
+class AsyncRateLimiter:
+    """
+    Spaces requests to an API evenly so that at most requests_per_second start per second.
+    Must only be used on one event loop, e.g. the one of the async http client.
+    """
+
+    def __init__(self, requests_per_second: float):
+        self._interval_in_seconds = 1 / requests_per_second
+        self._next_slot = 0
+
+    async def acquire(self):
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self._interval_in_seconds
+        await asyncio.sleep(slot - now)
+
+
+# Shared by all async service calls
+async_http_client = AsyncHttpClient()
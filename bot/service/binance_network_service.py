@@ -1,11 +1,42 @@
-from constants.globals import logger, DEBUG
+import asyncio
+from typing import Iterable
+
+from constants.globals import logger, DEBUG, BINANCE_DEX_REQUESTS_PER_SECOND, BINANCE_BALANCE_MAX_AGE_IN_SECONDS
 from constants.mock_values import *
 from constants.node_ips import BINANCE_DEX_ENDPOINT
-from service.general_network_service import get_request_json, get_request_json_with_retries
+from service.async_http_client import async_http_client, AsyncRateLimiter
+from service.cache import TimedCache
+from service.general_network_service import get_request_json, get_request_json_with_retries, \
+    get_request_json_with_retries_async
+
+# Shared by all requests to the account endpoint of the Binance DEX API
+binance_dex_rate_limiter = AsyncRateLimiter(requests_per_second=BINANCE_DEX_REQUESTS_PER_SECOND)
+
+binance_balance_cache = TimedCache(fetch=lambda address: async_http_client.run(get_binance_balance_async(address)),
+                                   max_age_in_seconds=BINANCE_BALANCE_MAX_AGE_IN_SECONDS)
 
 
 def get_binance_balance(address: str) -> dict:
-    return get_request_json_with_retries(url=f"{BINANCE_DEX_ENDPOINT}/api/v1/account/{address}")['balances']
+    return binance_balance_cache.get(address)
+
+
+def get_binance_balances(addresses: Iterable[str]) -> dict:
+    """
+    Returns the balances of all addresses by address. Addresses that aren't cached are fetched concurrently.
+    Raises the error of the first address that couldn't be fetched.
+    """
+
+    addresses = list(dict.fromkeys(addresses))
+    missing_addresses = [address for address in addresses if not binance_balance_cache.is_fresh(address)]
+    if missing_addresses:
+        results = async_http_client.run(get_binance_balances_async(missing_addresses))
+        for address, result in zip(missing_addresses, results):
+            if isinstance(result, Exception):
+                binance_balance_cache.put(address, error=result)
+            else:
+                binance_balance_cache.put(address, value=result)
+
+    return {address: binance_balance_cache.get(address) for address in addresses}
 
 
 def get_binance_network_block_count() -> dict:
@@ -38,6 +69,23 @@ def get_binance_node_block_height(binance_node_ip):
     return status['result']['sync_info']['latest_block_height']
 
 
+def get_binance_node_sync_state(binance_node_ip) -> tuple:
+    """
+    Returns the block height and whether the node is catching up from one /status request
+    """
+
+    if DEBUG:
+        if not binance_node_healthy_mock:
+            raise Exception("Binance node is not healthy")
+        return get_binance_node_block_height(binance_node_ip), binance_is_syncing_mock
+
+    status = get_request_json(url=f"http://{binance_node_ip}/status")
+    # The RPC endpoint wraps the status in 'result', the REST endpoint doesn't
+    sync_info = status.get('result', status)['sync_info']
+
+    return int(sync_info['latest_block_height']), sync_info['catching_up']
+
+
 def is_binance_node_healthy(binance_node_ip) -> bool:
     if DEBUG:
         return binance_node_healthy_mock
@@ -49,3 +97,19 @@ def is_binance_node_healthy(binance_node_ip) -> bool:
         return False
 
     return True
+
+
+async def get_binance_balance_async(address: str) -> dict:
+    response = await get_request_json_with_retries_async(url=f"{BINANCE_DEX_ENDPOINT}/api/v1/account/{address}",
+                                                         status_forcelist=(429, 500, 502, 504),
+                                                         rate_limiter=binance_dex_rate_limiter)
+    return response['balances']
+
+
+async def get_binance_balances_async(addresses: list) -> list:
+    """
+    Returns the balances in the order of addresses, or the error for an address that couldn't be fetched
+    """
+
+    return await asyncio.gather(*(get_binance_balance_async(address) for address in addresses),
+                                return_exceptions=True)
@@ -0,0 +1,97 @@
+import threading
+import time
+from typing import Callable, Any
+
+
+class TimedSnapshot:
+    """
+    Holds the result of an expensive fetch in memory and refreshes it at most once per max_age_in_seconds.
+    Concurrent callers that find the snapshot outdated wait for one shared fetch instead of fetching themselves.
+    If cache_errors is set, a failed fetch is remembered as well and raised again until it is outdated.
+    """
+
+    def __init__(self, fetch: Callable[[], Any], max_age_in_seconds: float, cache_errors=False):
+        self._fetch = fetch
+        self._max_age_in_seconds = max_age_in_seconds
+        self._cache_errors = cache_errors
+        self._lock = threading.Lock()
+        self._value = None
+        self._error = None
+        self._fetched_at = None
+
+    def get(self):
+        with self._lock:
+            if self._fetched_at is None or time.monotonic() - self._fetched_at >= self._max_age_in_seconds:
+                self._fetched_at = None
+                try:
+                    self._value, self._error = self._fetch(), None
+                except Exception as e:
+                    if not self._cache_errors:
+                        raise
+                    self._value, self._error = None, e
+                self._fetched_at = time.monotonic()
+
+            if self._error is not None:
+                raise self._error
+
+            return self._value
+
+    def put(self, value=None, error=None):
+        """
+        Stores the result of a fetch that was done elsewhere, e.g. asynchronously.
+        """
+
+        with self._lock:
+            self._value, self._error = value, error
+            self._fetched_at = time.monotonic()
+
+    def is_fresh(self) -> bool:
+        with self._lock:
+            return self._fetched_at is not None and time.monotonic() - self._fetched_at < self._max_age_in_seconds
+
+    def invalidate(self):
+        with self._lock:
+            self._fetched_at = None
+
+
+class TimedCache:
+    """
+    A TimedSnapshot per key, e.g. per node ip.
+    """
+
+    def __init__(self, fetch: Callable[[Any], Any], max_age_in_seconds: float, cache_errors=False):
+        self._fetch = fetch
+        self._max_age_in_seconds = max_age_in_seconds
+        self._cache_errors = cache_errors
+        self._lock = threading.Lock()
+        self._snapshots = {}
+
+    def get(self, key):
+        return self._get_snapshot(key).get()
+
+    def put(self, key, value=None, error=None):
+        self._get_snapshot(key).put(value=value, error=error)
+
+    def is_fresh(self, key) -> bool:
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+
+        return snapshot is not None and snapshot.is_fresh()
+
+    def invalidate(self, key):
+        with self._lock:
+            snapshot = self._snapshots.pop(key, None)
+
+        if snapshot is not None:
+            snapshot.invalidate()
+
+    def _get_snapshot(self, key) -> TimedSnapshot:
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is None:
+                snapshot = TimedSnapshot(fetch=lambda: self._fetch(key),
+                                         max_age_in_seconds=self._max_age_in_seconds,
+                                         cache_errors=self._cache_errors)
+                self._snapshots[key] = snapshot
+
+            return snapshot
@@ -0,0 +1,57 @@
+import time
+from typing import Callable
+
+from service.websocket_subscriptions import WebsocketSubscriptions, TrackedBlock
+
+
+class EthereumHeadTracker(WebsocketSubscriptions):
+    """
+    Follows the new heads of Ethereum nodes over eth_subscribe("newHeads").
+    A node stalls if its socket is open but no head arrived for max_missed_blocks expected block times.
+    """
+
+    def __init__(self,
+                 websocket_url: Callable[[str], str],
+                 expected_block_time_in_seconds: float,
+                 max_missed_blocks: int,
+                 max_reconnect_delay_in_seconds: float = 60):
+        super().__init__(websocket_url=websocket_url, max_reconnect_delay_in_seconds=max_reconnect_delay_in_seconds)
+        self._max_head_age_in_seconds = expected_block_time_in_seconds * max_missed_blocks
+
+    def get_subscription_request(self) -> dict:
+        return {
+            "jsonrpc": "2.0",
+            "method": "eth_subscribe",
+            "id": 1,
+            "params": ["newHeads"]
+        }
+
+    def parse_message(self, message: dict) -> [TrackedBlock, None]:
+        return parse_new_head_notification(message)
+
+    def get_head(self, node_ip: str) -> [TrackedBlock, None]:
+        return self.get_latest(node_ip)
+
+    def is_stalled(self, head: TrackedBlock) -> bool:
+        return time.monotonic() - head.received_at > self._max_head_age_in_seconds
+
+    def is_synced(self, head: TrackedBlock) -> bool:
+        # A syncing node imports old blocks, so the timestamps of its heads lag behind the wall clock
+        return time.time() - head.time <= self._max_head_age_in_seconds
+
+
+def parse_new_head_notification(message: dict) -> [TrackedBlock, None]:
+    """
+    Returns the head of an eth_subscription notification or None for other messages, e.g. the subscription id
+    """
+
+    if message.get('method') != 'eth_subscription':
+        return None
+
+    try:
+        head = message['params']['result']
+        return TrackedBlock(height=int(head['number'], 16),
+                            time=int(head['timestamp'], 16),
+                            received_at=time.monotonic())
+    except (KeyError, TypeError, ValueError):
+        return None
@@ -1,40 +1,96 @@
-from constants.globals import DEBUG
+from constants.globals import DEBUG, ETHEREUM_EXPECTED_BLOCK_TIME_IN_SECONDS, ETHEREUM_MISSED_BLOCKS_UNTIL_STALLED
 from constants.mock_values import *
-from service.general_network_service import eth_rpc_request
+from service.ethereum_head_tracker import EthereumHeadTracker
+from service.async_http_client import async_http_client
+from service.general_network_service import eth_rpc_request_async, rpc_batch_request_async, parse_rpc_batch_response, \
+    BadStatusException
+
+# Only follows nodes if ETHEREUM_HEAD_SUBSCRIPTIONS is enabled, otherwise probes poll the JSON-RPC
+ethereum_head_tracker = EthereumHeadTracker(
+    websocket_url=lambda node_ip: f"ws://{node_ip}",
+    expected_block_time_in_seconds=ETHEREUM_EXPECTED_BLOCK_TIME_IN_SECONDS,
+    max_missed_blocks=ETHEREUM_MISSED_BLOCKS_UNTIL_STALLED)
 
 
 def is_eth_node_fully_synced(node_ip) -> bool:
+    return async_http_client.run(is_eth_node_fully_synced_async(node_ip))
+
+
+def get_eth_node_block_height(node_ip):
+    return async_http_client.run(get_eth_node_block_height_async(node_ip))
+
+
+def is_eth_node_healthy(node_ip) -> bool:
+    return async_http_client.run(is_eth_node_healthy_async(node_ip))
+
+
+def get_eth_network_block_count(node_ip):
+    return async_http_client.run(get_eth_network_block_count_async(node_ip))
+
+
+def get_eth_node_sync_state(node_ip) -> tuple:
+    return async_http_client.run(get_eth_node_sync_state_async(node_ip))
+
+
+async def is_eth_node_fully_synced_async(node_ip) -> bool:
     if DEBUG:
         return not eth_is_syncing_mock
 
-    is_syncing = eth_rpc_request(node_ip, method="eth_syncing").json()['result']
+    is_syncing = (await eth_rpc_request_async(node_ip, method="eth_syncing")).json()['result']
 
     return not is_syncing
 
 
-def get_eth_node_block_height(node_ip):
+async def get_eth_node_block_height_async(node_ip):
     if DEBUG:
         global eth_last_block_mock
         eth_last_block_mock += 1
         return eth_last_block_mock
 
-    return int(eth_rpc_request(node_ip, method="eth_blockNumber").json()['result'], 16)
+    return int((await eth_rpc_request_async(node_ip, method="eth_blockNumber")).json()['result'], 16)
 
 
-def is_eth_node_healthy(node_ip) -> bool:
+async def is_eth_node_healthy_async(node_ip) -> bool:
     if DEBUG:
         return eth_node_healthy_mock
 
-    return eth_rpc_request(ip=node_ip, method="eth_protocolVersion").ok
+    return (await eth_rpc_request_async(ip=node_ip, method="eth_protocolVersion")).ok
 
 
-def get_eth_network_block_count(node_ip):
+async def get_eth_network_block_count_async(node_ip):
     if DEBUG:
         return eth_last_block_mock
 
-    syncing = eth_rpc_request(ip=node_ip, method="eth_syncing").json()['result']
+    syncing = (await eth_rpc_request_async(ip=node_ip, method="eth_syncing")).json()['result']
 
     if not syncing:
-        return get_eth_node_block_height(node_ip)
+        return await get_eth_node_block_height_async(node_ip)
     else:
         return int(syncing['highestBlock'], 16)
+
+
+async def get_eth_node_sync_state_async(node_ip) -> tuple:
+    """
+    Returns the block height, the network block height and whether the node is synced from one batch request
+    """
+
+    if DEBUG:
+        if not eth_node_healthy_mock:
+            raise Exception("Ethereum node is not healthy")
+        return await get_eth_node_block_height_async(node_ip), eth_last_block_mock, not eth_is_syncing_mock
+
+    calls = [('eth_syncing', []), ('eth_blockNumber', [])]
+    response = await rpc_batch_request_async(url=f'http://{node_ip}', calls=calls, jsonrpc_version="2.0")
+    if not response.ok:
+        raise BadStatusException(response)
+
+    syncing, block_number = parse_rpc_batch_response(response, len(calls))
+    error = syncing.get('error') or block_number.get('error')
+    if error:
+        raise Exception(f"Ethereum node {node_ip} responded with error: {error}")
+
+    block_height = int(block_number['result'], 16)
+    if not syncing['result']:
+        return block_height, block_height, True
+
+    return block_height, int(syncing['result']['highestBlock'], 16), False
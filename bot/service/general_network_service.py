@@ -1,20 +1,39 @@
+import asyncio
+from typing import List, Tuple
+
+import aiohttp
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3 import Retry
 
-from constants.globals import CONNECTION_TIMEOUT
+from constants.globals import CONNECTION_TIMEOUT, HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE
+from service.async_http_client import async_http_client, AsyncRateLimiter
 
 
 def get_request_json(url: str) -> dict:
-    response = requests.get(url=url, timeout=CONNECTION_TIMEOUT)
+    response = http_session.get(url=url, timeout=CONNECTION_TIMEOUT)
     return parse_response(response)
 
 
 def get_request_json_with_retries(url: str) -> dict:
-    response = requests_retry_session().get(url=url, timeout=CONNECTION_TIMEOUT)
+    response = http_retry_session.get(url=url, timeout=CONNECTION_TIMEOUT)
     return parse_response(response)
 
 
+def requests_pooled_session(max_retries=0, session=None):
+    """
+    Creates a request session that keeps connections alive in one connection pool per host.
+    """
+
+    session = session or requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS,
+                          pool_maxsize=HTTP_POOL_MAXSIZE,
+                          max_retries=max_retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
 def requests_retry_session(retries=6,
                            backoff_factor=1,
                            status_forcelist=(500, 502, 504),
@@ -25,17 +44,18 @@ def requests_retry_session(retries=6,
     https://gitlab.com/thorchain/devops/node-launcher/-/blob/master/telegram-bot/templates/configmap.yaml#L192-212
     """
 
-    session = session or requests.Session()
     retry = Retry(total=retries,
                   read=retries,
                   connect=retries,
                   backoff_factor=backoff_factor,
                   status_forcelist=status_forcelist)
 
-    adapter = HTTPAdapter(max_retries=retry)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
-    return session
+    return requests_pooled_session(max_retries=retry, session=session)
+
+
+# Shared by all service calls so that connections to the same host are reused
+http_session = requests_pooled_session()
+http_retry_session = requests_retry_session()
 
 
 def parse_response(response) -> dict:
@@ -45,37 +65,87 @@ def parse_response(response) -> dict:
     return response.json()
 
 
-def btc_rpc_request(address: str, method: str, params=None):
-    return rpc_request(url=f'http://{address}', jsonrpc_version="1.0", method=method,
-                       params=params)
+async def get_request_json_async(url: str) -> dict:
+    response = await async_http_client.request('GET', url)
+    return parse_response(response)
 
 
-def bch_rpc_request(address: str, method: str, params=None):
-    return rpc_request(url=f'http://{address}', jsonrpc_version="1.0", method=method,
-                       params=params)
+async def get_request_json_with_retries_async(url: str,
+                                              retries=6,
+                                              backoff_factor=1,
+                                              status_forcelist=(500, 502, 504),
+                                              rate_limiter: AsyncRateLimiter = None) -> dict:
+    """
+    Same retry policy as requests_retry_session, but waiting for the next attempt doesn't block a thread.
+    Every attempt waits for the rate limiter of the API if one is given.
+    """
 
+    for attempt in range(retries + 1):
+        if rate_limiter is not None:
+            await rate_limiter.acquire()
+        try:
+            response = await async_http_client.request('GET', url)
+            if response.status_code not in status_forcelist or attempt == retries:
+                return parse_response(response)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if attempt == retries:
+                raise
 
-def ltc_rpc_request(address: str, method: str, params=None):
-    return rpc_request(url=f'http://{address}', jsonrpc_version="1.0", method=method,
-                       params=params)
+        await asyncio.sleep(backoff_factor * (2 ** attempt))
 
 
 def eth_rpc_request(ip: str, method: str, params=None):
-    return rpc_request(url=f'http://{ip}', jsonrpc_version="2.0", method=method,
-                       params=params)
+    return async_http_client.run(eth_rpc_request_async(ip=ip, method=method, params=params))
 
 
 def rpc_request(url: str, method: str, jsonrpc_version: str, params=None):
+    return async_http_client.run(rpc_request_async(url=url, method=method, jsonrpc_version=jsonrpc_version,
+                                                   params=params))
+
+
+def rpc_batch_request(url: str, calls: List[Tuple[str, list]], jsonrpc_version: str):
+    return async_http_client.run(rpc_batch_request_async(url=url, calls=calls, jsonrpc_version=jsonrpc_version))
+
+
+async def eth_rpc_request_async(ip: str, method: str, params=None):
+    return await rpc_request_async(url=f'http://{ip}', jsonrpc_version="2.0", method=method, params=params)
+
+
+async def rpc_request_async(url: str, method: str, jsonrpc_version: str, params=None):
     if params is None:
         params = []
     json = {"jsonrpc": jsonrpc_version, "id": None, "method": method, "params": params}
 
-    return requests.post(url, json=json)
+    return await async_http_client.request('POST', url, json=json)
+
+
+async def rpc_batch_request_async(url: str, calls: List[Tuple[str, list]], jsonrpc_version: str):
+    """
+    Sends all (method, params) calls as one JSON-RPC batch array in a single POST.
+    Use parse_rpc_batch_response to get the replies in the order of the calls.
+    """
+
+    return await async_http_client.request('POST', url, json=build_rpc_batch(calls, jsonrpc_version))
+
+
+def build_rpc_batch(calls: List[Tuple[str, list]], jsonrpc_version: str) -> list:
+    return [{"jsonrpc": jsonrpc_version, "id": index, "method": method, "params": params or []}
+            for index, (method, params) in enumerate(calls)]
+
+
+def parse_rpc_batch_response(response, number_of_calls: int) -> list:
+    """
+    Returns the reply of each call of a batch in the order of the calls. Servers may reply in any order.
+    """
+
+    replies = {reply.get('id'): reply for reply in response.json()}
+
+    return [replies.get(index, {'result': None, 'error': 'Missing reply'}) for index in range(number_of_calls)]
 
 
 class BadStatusException(Exception):
 
-    def __init__(self, response: requests.Response):
+    def __init__(self, response):
         self.message = f"Error while network request.\n" \
                        f"Received status code: {str(response.status_code)}\n" \
                        f"Received response: {response.text}"
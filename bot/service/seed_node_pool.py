@@ -0,0 +1,127 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from statistics import median_low
+from typing import Callable, List
+
+from constants.globals import logger
+from service.cache import TimedSnapshot
+
+# Weight of the newest latency measurement in the rolling latency score
+LATENCY_SMOOTHING_FACTOR = 0.3
+
+
+class SeedNodeScore:
+
+    def __init__(self, latency: float, block_height: int):
+        self.latency = latency
+        self.block_height = block_height
+
+    def update(self, latency: float, block_height: int):
+        self.latency = LATENCY_SMOOTHING_FACTOR * latency + (1 - LATENCY_SMOOTHING_FACTOR) * self.latency
+        self.block_height = block_height
+
+
+class SeedNodePool:
+    """
+    Keeps a small pool of probed seed nodes so that requests without a specific node ip don't have to fetch
+    the seed list and check block heights first.
+    refresh() probes the pool members and is meant to run in a background job. Nodes that fail get evicted
+    and may be probed again once the eviction time is over.
+    """
+
+    def __init__(self,
+                 fetch_seed_list: Callable[[], List[str]],
+                 get_block_height: Callable[[str], int],
+                 pool_size: int,
+                 seed_list_max_age_in_seconds: float,
+                 eviction_time_in_seconds: float):
+        self._seed_list = TimedSnapshot(fetch=fetch_seed_list, max_age_in_seconds=seed_list_max_age_in_seconds)
+        self._get_block_height = get_block_height
+        self._pool_size = pool_size
+        self._eviction_time_in_seconds = eviction_time_in_seconds
+        self._lock = threading.Lock()
+        self._scores = {}
+        self._evicted_until = {}
+        self._best_node_ip = None
+
+    def get_best_node_ip(self) -> str:
+        best_node_ip = self._best_node_ip
+        if best_node_ip is None:
+            self.refresh()
+            best_node_ip = self._best_node_ip
+
+        if best_node_ip is None:
+            raise Exception("No seed node returned a valid response!")
+
+        return best_node_ip
+
+    def evict(self, node_ip: str):
+        with self._lock:
+            self._scores.pop(node_ip, None)
+            self._evicted_until[node_ip] = time.monotonic() + self._eviction_time_in_seconds
+            self._select_best_node()
+
+    def refresh(self):
+        candidates = self._get_candidates()
+
+        with ThreadPoolExecutor(max_workers=max(len(candidates), 1)) as executor:
+            results = list(executor.map(self._probe, candidates))
+
+        with self._lock:
+            for node_ip, latency, block_height in results:
+                if block_height is None:
+                    self._scores.pop(node_ip, None)
+                    self._evicted_until[node_ip] = time.monotonic() + self._eviction_time_in_seconds
+                elif node_ip in self._scores:
+                    self._scores[node_ip].update(latency, block_height)
+                else:
+                    self._scores[node_ip] = SeedNodeScore(latency, block_height)
+
+            self._select_best_node()
+
+    def _get_candidates(self) -> List[str]:
+        try:
+            seed_list = list(self._seed_list.get())
+        except Exception as e:
+            logger.warning(f"Couldn't get the seed list: {e}")
+            seed_list = []
+
+        with self._lock:
+            now = time.monotonic()
+            self._evicted_until = {ip: until for ip, until in self._evicted_until.items() if until > now}
+
+            candidates = list(self._scores.keys())
+            random.shuffle(seed_list)
+            for node_ip in seed_list:
+                if len(candidates) >= self._pool_size:
+                    break
+                if node_ip not in self._scores and node_ip not in self._evicted_until:
+                    candidates.append(node_ip)
+
+        return candidates
+
+    def _probe(self, node_ip: str):
+        start = time.monotonic()
+        try:
+            block_height = self._get_block_height(node_ip)
+        except Exception:
+            return node_ip, None, None
+
+        return node_ip, time.monotonic() - start, block_height
+
+    def _select_best_node(self):
+        if not self._scores:
+            self._best_node_ip = None
+            return
+
+        # Block heights within plus minus 1 block are considered equal (network latency could lead to one block
+        # difference). It's very unlikely that most of the pool is stuck at the same block height, so nodes that
+        # deviate from the median are most likely stuck.
+        median_block_height = median_low(score.block_height for score in self._scores.values())
+        healthy_node_ips = [
+            node_ip for node_ip, score in self._scores.items()
+            if abs(score.block_height - median_block_height) <= 1
+        ]
+        self._best_node_ip = min(healthy_node_ips, key=lambda node_ip: self._scores[node_ip].latency)
@@ -35,33 +35,28 @@ def setup_existing_users(dispatcher):
             logger.exception(f'USER {str(chat_id)}\n Error: {str(message_result.exception)}',
                              exc_info=True)
 
-        # Start monitoring jobs for all existing users
-        if 'job_started' not in dispatcher.chat_data[chat_id]:
-            dispatcher.chat_data[chat_id]['job_started'] = True
-        dispatcher.job_queue.run_repeating(
-            user_specific_checks,
-            interval=JOB_INTERVAL_IN_SECONDS,
-            context={
-                'chat_id': chat_id,
-                'chat_data': dispatcher.chat_data[chat_id]
-            })
+        # Let the monitoring scheduler check all existing users
+        dispatcher.chat_data[chat_id]['job_started'] = True
 
     for chat_id in blocked_ids:
         logger.info(f"Telegram chat {str(chat_id)} blocked me or is "
                     f"not Admin anymore; removing it from the chat list")
 
         if not is_group_chat(chat_id):
-            del dispatcher.user_data[chat_id]
-            del dispatcher.persistence.user_data[chat_id]
+            dispatcher.user_data.pop(chat_id, None)
+            dispatcher.persistence.drop_user_data(chat_id)
 
         del dispatcher.chat_data[chat_id]
-        del dispatcher.persistence.chat_data[chat_id]
+        dispatcher.persistence.drop_chat_data(chat_id)
 
-        # Somehow session.data does not get updated if all users block the bot.
-        # That's why we delete the file ourselves.
-        if len(dispatcher.persistence.chat_data) == 0:
-            if os.path.exists(session_data_path):
-                os.remove(session_data_path)
+    # Nodes of older sessions are stored as whole node account dicts and get migrated to MonitoredThornode.
+    # Done before anything can fail, because the monitoring expects MonitoredThornode.
+    for chat_id in dispatcher.chat_data.keys():
+        nodes = dispatcher.chat_data[chat_id].setdefault('nodes', {})
+        for address in list(nodes.keys()):
+            nodes[address] = MonitoredThornode.migrate(nodes[address])
+
+    ThornodeSubscriptionsDao().rebuild(dispatcher.chat_data)
 
     try:
         new_node_accounts = get_node_accounts()
@@ -71,29 +66,22 @@ def setup_existing_users(dispatcher):
             exc_info=True)
         return
 
-    # Delete all node addresses and add them again to ensure all chat_data fields are up to date
+    # Update all nodes to ensure all chat_data fields are up to date.
     for chat_id in dispatcher.chat_data.keys():
-        if 'nodes' not in dispatcher.chat_data[chat_id]:
-            dispatcher.chat_data[chat_id]['nodes'] = {}
-
-        local_node_addresses = list(dispatcher.chat_data[chat_id]['nodes'].keys())
-
-        for address in local_node_addresses:
-            try:
-                new_node = next(n for n in new_node_accounts
-                                if n['node_address'] == address)
-                del dispatcher.chat_data[chat_id]['nodes'][address]
-                add_thornode_to_chat_data(dispatcher.chat_data[chat_id],
-                                          address, new_node)
-            except StopIteration:
-                obsolete_node = dispatcher.chat_data[chat_id]['nodes'][address]
+        nodes = dispatcher.chat_data[chat_id]['nodes']
+
+        for address in list(nodes.keys()):
+            new_node = new_node_accounts.get(address)
+            if new_node is not None:
+                nodes[address].update_from_node_account(new_node)
+            else:
+                obsolete_node = nodes[address]
                 dispatcher.bot.send_message(
                     chat_id,
-                    f"Your node {obsolete_node['alias']} with address {address} "
+                    f"Your node {obsolete_node.alias} with address {address} "
                     f"is not present in the network! "
                     f"I'm removing it...")
-                del dispatcher.chat_data[chat_id]['nodes'][address]
-
+                remove_thornode_from_chat_data(chat_id, dispatcher.chat_data[chat_id], address)
 
 def setup_debug_processes():
     current_dir = os.path.dirname(os.path.realpath(__file__))
@@ -0,0 +1,212 @@
+import threading
+import time
+from itertools import chain
+from typing import Dict, Tuple, List, Iterable
+
+from constants.globals import SOLVENCY_REPORT_MAX_AGE_IN_SECONDS
+from models.solvency_report import VaultBalance, SolvencyReport
+from service.binance_network_service import get_binance_balances
+from service.thorchain_network_service import get_asgard_json, get_yggdrasil_json, get_pool_addresses_from_any_node
+
+# THORChain and the Binance DEX API both count in 1e-8 of a coin
+BASE_UNIT_DECIMALS = 8
+# Chains whose vault balances the bot can fetch. Coins of other chains are not checked.
+TRACKED_CHAINS = ('BNB',)
+
+# (vault pub key, chain, asset) -> amount in base units
+BalanceIndex = Dict[Tuple[str, str, str], int]
+
+
+def to_base_units(amount: str, decimals=BASE_UNIT_DECIMALS) -> int:
+    """
+    Converts a decimal string, e.g. '11.75096895', into an integer of base units without going through float
+    """
+
+    whole, _, fraction = amount.partition('.')
+    return int(whole or '0') * 10 ** decimals + int(fraction[:decimals].ljust(decimals, '0'))
+
+
+def format_base_units(amount: int, decimals=BASE_UNIT_DECIMALS) -> str:
+    return f"{amount // 10 ** decimals}.{amount % 10 ** decimals:0{decimals}d}"
+
+
+def index_vault_coins(vault: str, coins: List[dict]) -> BalanceIndex:
+    index = {}
+    for coin in coins:
+        chain = coin['asset'].split('.')[0]
+        if chain in TRACKED_CHAINS:
+            index[(vault, chain, coin['asset'])] = int(coin['amount'])
+
+    return index
+
+
+def index_binance_balances(vault: str, balances: List[dict]) -> BalanceIndex:
+    return {(vault, 'BNB', f"BNB.{balance['symbol']}"): to_base_units(balance['free']) for balance in balances}
+
+
+def evaluate_solvency(expected: BalanceIndex, actual: BalanceIndex) -> SolvencyReport:
+    """
+    Compares every expected amount with the actual one in a single pass. Missing actual amounts count as 0.
+    """
+
+    solvent_balances = []
+    insolvent_balances = []
+    for (vault, chain, asset), expected_amount in expected.items():
+        balance = VaultBalance(vault=vault, chain=chain, asset=asset,
+                               expected=expected_amount, actual=actual.get((vault, chain, asset), 0))
+        (solvent_balances if balance.is_solvent else insolvent_balances).append(balance)
+
+    return SolvencyReport(solvent_balances=tuple(solvent_balances), insolvent_balances=tuple(insolvent_balances))
+
+
+class SolvencyTracker:
+    """
+    Maintains the solvency report of a group of vaults, i.e. of Asgard or of Yggdrasil.
+    Vault contents only change when transactions land, so every vault is fingerprinted by its expected coins and
+    actual balances and only vaults with a new fingerprint are evaluated again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._vaults = {}  # Pub key -> (fingerprint, report of the vault)
+        self._report = None
+        self._updated_at = None
+
+    def update(self, vaults: Iterable[Tuple[str, List[dict], List[dict]]]) -> SolvencyReport:
+        """
+        Takes the vaults as (pub key, coins, Binance balances) and returns the report of all of them
+        """
+
+        with self._lock:
+            vault_reports = {}
+            for pub_key, coins, balances in vaults:
+                fingerprint = hash((tuple((coin['asset'], coin['amount']) for coin in coins),
+                                    tuple((balance['symbol'], balance['free']) for balance in balances)))
+                vault_report = self._vaults.get(pub_key)
+                if vault_report is None or vault_report[0] != fingerprint:
+                    vault_report = (fingerprint, evaluate_solvency(index_vault_coins(pub_key, coins),
+                                                                   index_binance_balances(pub_key, balances)))
+                vault_reports[pub_key] = vault_report
+
+            if self._report is None or vault_reports != self._vaults:
+                reports = [report for _, report in vault_reports.values()]
+                self._report = SolvencyReport(
+                    solvent_balances=tuple(chain.from_iterable(report.solvent_balances for report in reports)),
+                    insolvent_balances=tuple(chain.from_iterable(report.insolvent_balances for report in reports)))
+            self._vaults = vault_reports
+            self._updated_at = time.monotonic()
+
+            return self._report
+
+    def get_report(self, max_age_in_seconds: float) -> [SolvencyReport, None]:
+        with self._lock:
+            if self._updated_at is None or time.monotonic() - self._updated_at > max_age_in_seconds:
+                return None
+
+            return self._report
+
+
+asgard_solvency_tracker = SolvencyTracker()
+yggdrasil_solvency_tracker = SolvencyTracker()
+
+
+def vaults_solvency_check(vaults: Iterable[Tuple[str, List[dict], str]], tracker: SolvencyTracker) -> SolvencyReport:
+    """
+    Checks vaults given as (pub key, coins, Binance address). All balances are fetched at once.
+    """
+
+    vaults = list(vaults)
+    binance_balances = get_binance_balances(address for _, _, address in vaults if address)
+
+    return tracker.update((pub_key, coins, binance_balances[address] if address else [])
+                          for pub_key, coins, address in vaults)
+
+
+def asgard_solvency_check() -> SolvencyReport:
+    asgard_vaults = [vault for vault in get_asgard_json() if vault['status'] == 'active']
+
+    # Older THORNodes don't list the addresses of asgard vaults, their funds are at the inbound address
+    inbound_address = None
+    if any(get_binance_address(vault.get('addresses', [])) is None for vault in asgard_vaults):
+        inbound_address = get_binance_address(get_inbound_addresses())
+        if inbound_address is None:
+            raise Exception("THORChain has no inbound address for BNB")
+
+    return vaults_solvency_check(((vault['pub_key'], vault['coins'],
+                                   get_binance_address(vault.get('addresses', [])) or inbound_address)
+                                  for vault in asgard_vaults),
+                                 tracker=asgard_solvency_tracker)
+
+
+def yggdrasil_solvency_check() -> SolvencyReport:
+    return vaults_solvency_check(
+        ((vault['vault']['pub_key'], vault['vault']['coins'], get_binance_address(vault['addresses']))
+         for vault in get_yggdrasil_json()
+         if vault['status'] == 'active' and vault['vault']['status'] == 'active'),
+        tracker=yggdrasil_solvency_tracker)
+
+
+def get_solvency_reports() -> Tuple[SolvencyReport, SolvencyReport]:
+    """
+    Returns the Asgard and Yggdrasil reports that the solvency job keeps up to date.
+    Only checks the vaults itself if a report is outdated, e.g. right after the start.
+    """
+
+    asgard_solvency = asgard_solvency_tracker.get_report(SOLVENCY_REPORT_MAX_AGE_IN_SECONDS) \
+        or asgard_solvency_check()
+    yggdrasil_solvency = yggdrasil_solvency_tracker.get_report(SOLVENCY_REPORT_MAX_AGE_IN_SECONDS) \
+        or yggdrasil_solvency_check()
+
+    return asgard_solvency, yggdrasil_solvency
+
+
+def get_inbound_addresses() -> List[dict]:
+    inbound_addresses = get_pool_addresses_from_any_node()
+    # The mock API wraps the addresses in 'current'
+    if isinstance(inbound_addresses, dict):
+        return inbound_addresses.get('current', [])
+
+    return inbound_addresses
+
+
+def get_binance_address(addresses: List[dict]) -> [str, None]:
+    return next((address['address'] for address in addresses if address['chain'] == 'BNB'), None)
+
+
+def get_solvency_message(asgard_solvency: SolvencyReport, yggdrasil_solvency: SolvencyReport) -> str:
+    message = "Tracked Balances of *Asgard*:\n"
+    message += get_insolvent_coins_message(asgard_solvency, with_vault=False)
+    for asset, amount in asgard_solvency.get_actual_amounts_by_asset().items():
+        message += f"*{asset}*: {format_base_units(amount)}\n"
+
+    message += "\nTracked Balances of *Yggdrasil*:\n"
+    message += get_insolvent_coins_message(yggdrasil_solvency, with_vault=True)
+    for asset, amount in yggdrasil_solvency.get_actual_amounts_by_asset().items():
+        message += f"*{asset}*: {format_base_units(amount)}\n"
+
+    return message
+
+
+def get_insolvent_balances_message(asgard_solvency: SolvencyReport, yggdrasil_solvency: SolvencyReport) -> str:
+    message = ""
+    if not asgard_solvency.is_solvent:
+        message += "Insolvent Balances of *Asgard*:\n"
+        message += get_insolvent_coins_message(asgard_solvency, with_vault=False)
+
+    if not yggdrasil_solvency.is_solvent:
+        message += "\nInsolvent Balances of *Yggdrasil*:\n"
+        message += get_insolvent_coins_message(yggdrasil_solvency, with_vault=True)
+
+    return message
+
+
+def get_insolvent_coins_message(solvency: SolvencyReport, with_vault: bool) -> str:
+    message = ""
+    for balance in solvency.insolvent_balances:
+        if with_vault:
+            message += f"*{balance.vault}*:\n"
+        message += f"*{balance.asset}*:\n" \
+                   f"  Expected: {format_base_units(balance.expected)}\n" \
+                   f"  Actual:   {format_base_units(balance.actual)}\n"
+
+    return message
@@ -0,0 +1,60 @@
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+from service.websocket_subscriptions import WebsocketSubscriptions, TrackedBlock
+
+
+class TendermintBlockTracker(WebsocketSubscriptions):
+    """
+    Follows the NewBlock events of THORNodes over their Tendermint websocket.
+    get_block() only returns blocks that arrived within max_silence_in_seconds, so callers fall back to polling
+    /status as soon as a node stops sending blocks or its socket is down.
+    """
+
+    def __init__(self,
+                 websocket_url: Callable[[str], str],
+                 max_silence_in_seconds: float,
+                 catching_up_block_age_in_seconds: float,
+                 max_reconnect_delay_in_seconds: float = 60):
+        super().__init__(websocket_url=websocket_url, max_reconnect_delay_in_seconds=max_reconnect_delay_in_seconds)
+        self._max_silence_in_seconds = max_silence_in_seconds
+        self._catching_up_block_age_in_seconds = catching_up_block_age_in_seconds
+
+    def get_subscription_request(self) -> dict:
+        return {
+            "jsonrpc": "2.0",
+            "method": "subscribe",
+            "id": 0,
+            "params": {"query": "tm.event='NewBlock'"}
+        }
+
+    def parse_message(self, message: dict) -> [TrackedBlock, None]:
+        return parse_new_block_event(message)
+
+    def get_block(self, node_ip: str) -> [TrackedBlock, None]:
+        block = self.get_latest(node_ip)
+        if block is None or time.monotonic() - block.received_at > self._max_silence_in_seconds:
+            return None
+
+        return block
+
+    def is_catching_up(self, block: TrackedBlock) -> bool:
+        # A node that is catching up applies old blocks, so their header time lags behind the wall clock
+        return time.time() - block.time > self._catching_up_block_age_in_seconds
+
+
+def parse_new_block_event(message: dict) -> [TrackedBlock, None]:
+    """
+    Returns the block of a NewBlock event or None for other messages, e.g. the empty reply to the subscription
+    """
+
+    try:
+        header = message['result']['data']['value']['block']['header']
+    except (KeyError, TypeError):
+        return None
+
+    # RFC 3339 with nanoseconds, e.g. 2021-03-04T10:00:00.123456789Z
+    block_time = datetime.strptime(header['time'][:19], '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc)
+
+    return TrackedBlock(height=int(header['height']), time=block_time.timestamp(), received_at=time.monotonic())
@@ -1,22 +1,47 @@
-import random
+import asyncio
 from time import sleep
+from typing import Iterable
 
-import aiohttp
-import requests
 from requests.exceptions import Timeout, ConnectionError, HTTPError
 
 from constants.mock_values import thorchain_last_block_mock
-from service.general_network_service import get_request_json, BadStatusException
+from models.node_accounts import NodeAccounts
+from service.cache import TimedSnapshot, TimedCache
+from service.async_http_client import async_http_client
+from service.general_network_service import get_request_json, get_request_json_async, BadStatusException
+from service.seed_node_pool import SeedNodePool
+from service.tendermint_block_tracker import TendermintBlockTracker
 from constants.globals import *
 from constants.node_ips import *
 
 
-def get_node_accounts():
+def get_node_accounts() -> NodeAccounts:
+    """
+    Returns the node accounts of the shared snapshot.
+    All jobs and handlers read from it, so the node list is downloaded once per tick and not once per check.
+    """
+
+    return node_accounts_snapshot.get()
+
+
+def fetch_node_accounts() -> NodeAccounts:
     path = ":8080/nodeaccounts.json" if DEBUG else ":1317/thorchain/nodes"
-    return get_request_json_thorchain(url_path=path)
+    return NodeAccounts(get_request_json_thorchain(url_path=path))
+
+
+node_accounts_snapshot = TimedSnapshot(fetch=fetch_node_accounts, max_age_in_seconds=NODE_ACCOUNTS_MAX_AGE_IN_SECONDS)
 
 
 def get_node_status(node_ip=None):
+    """
+    Returns the /status of a node. Every check and every chat shares one cached status per node ip,
+    so a node gets probed at most once per tick.
+    """
+
+    return node_status_cache.get(node_ip)
+
+
+def fetch_node_status(node_ip=None):
     status_path = {
         "TESTNET": ":26657/status",
         "CHAOSNET": ":27147/status"
@@ -25,37 +50,126 @@ def get_node_status(node_ip=None):
     return get_request_json_thorchain(url_path=status_path, node_ip=node_ip)
 
 
+async def fetch_node_status_async(node_ip=None):
+    status_path = {
+        "TESTNET": ":26657/status",
+        "CHAOSNET": ":27147/status"
+    }[NETWORK_TYPE]
+
+    return await get_request_json_thorchain_async(url_path=status_path, node_ip=node_ip)
+
+
+node_status_cache = TimedCache(fetch=fetch_node_status,
+                               max_age_in_seconds=NODE_PROBE_MAX_AGE_IN_SECONDS,
+                               cache_errors=True)
+
+
+def get_tendermint_websocket_url(node_ip) -> str:
+    rpc_port = {
+        "TESTNET": ":26657",
+        "CHAOSNET": ":27147"
+    }[NETWORK_TYPE]
+
+    return f"ws://{node_ip}{rpc_port}/websocket"
+
+
+# Only follows nodes if THORNODE_BLOCK_SUBSCRIPTIONS is enabled, otherwise all calls fall back to /status
+tendermint_block_tracker = TendermintBlockTracker(
+    websocket_url=get_tendermint_websocket_url,
+    max_silence_in_seconds=THORNODE_BLOCK_MAX_SILENCE_IN_SECONDS,
+    catching_up_block_age_in_seconds=THORNODE_CATCHING_UP_BLOCK_AGE_IN_SECONDS)
+
+
 def get_latest_block_height(node_ip=None) -> int:
+    block = tendermint_block_tracker.get_block(node_ip)
+    if block is not None:
+        return block.height
+
     return int(get_node_status(node_ip)['result']['sync_info']['latest_block_height'])
 
 
-def is_block_height_stuck(main_node_ip, reference_node_ip) -> bool:
-    main_block_height = get_latest_block_height(main_node_ip)
-    reference_block_height = get_latest_block_height(reference_node_ip)
+def fetch_latest_block_height(node_ip) -> int:
+    """
+    Requests the block height from the node itself, without the shared probes, e.g. to measure its latency
+    """
+
+    return int(fetch_node_status(node_ip)['result']['sync_info']['latest_block_height'])
 
-    # Block heights within plus minus 1 block are considered equal (network latency could lead to one block difference).
-    # If both nodes have the same blockheight it's very likely that they are "good" nodes. It's very unlikely
-    # that two nodes get stuck at the same block height.
-    block_height_difference = abs(main_block_height - reference_block_height)
-    return block_height_difference > 1
+
+def get_probed_block_height(node_ips: Iterable[str]) -> [int, None]:
+    """
+    Returns the highest block height that the probes of this tick have seen without requesting anything.
+    None if none of the node ips was probed.
+    """
+
+    block_heights = []
+    for node_ip in node_ips:
+        block = tendermint_block_tracker.get_block(node_ip)
+        if block is not None:
+            block_heights.append(block.height)
+        elif node_status_cache.is_fresh(node_ip):
+            try:
+                block_heights.append(int(node_status_cache.get(node_ip)['result']['sync_info']['latest_block_height']))
+            except Exception:
+                # The probe of the node failed
+                continue
+
+    return max(block_heights, default=None)
 
 
 def is_thorchain_catching_up(node_ip=None) -> bool:
+    block = tendermint_block_tracker.get_block(node_ip)
+    if block is not None:
+        return tendermint_block_tracker.is_catching_up(block)
+
     return get_node_status(node_ip)['result']['sync_info']['catching_up']
 
 
 def is_midgard_api_healthy(node_ip) -> bool:
     try:
-        get_request_json_thorchain(url_path=":8080/v2/health", node_ip=node_ip)
+        midgard_health_cache.get(node_ip)
     except (Timeout, ConnectionError, HTTPError):
         logger.warning(f"Timeout or Connection error with {node_ip}")
         return False
     except (BadStatusException, Exception) as e:
-        logger.info(f"Error {e.message} in 'is_midgard_api_healthy({node_ip}).")
+        logger.info(f"Error {e} in 'is_midgard_api_healthy({node_ip}).")
         return False
     return True
 
 
+def fetch_midgard_health(node_ip):
+    return get_request_json_thorchain(url_path=":8080/v2/health", node_ip=node_ip)
+
+
+async def fetch_midgard_health_async(node_ip):
+    return await get_request_json_thorchain_async(url_path=":8080/v2/health", node_ip=node_ip)
+
+
+midgard_health_cache = TimedCache(fetch=fetch_midgard_health,
+                                  max_age_in_seconds=NODE_PROBE_MAX_AGE_IN_SECONDS,
+                                  cache_errors=True)
+
+
+async def probe_node_async(node_ip):
+    """
+    Fetches the /status and the Midgard health of a node ip on the async http client and fills the probe caches
+    with the results, so that the synchronous checks afterwards only read them.
+    /status is skipped while the websocket of the node delivers blocks.
+    """
+
+    if tendermint_block_tracker.get_block(node_ip) is None:
+        try:
+            node_status_cache.put(node_ip, value=await fetch_node_status_async(node_ip))
+        except Exception as e:
+            node_status_cache.put(node_ip, error=e)
+            return
+
+    try:
+        midgard_health_cache.put(node_ip, value=await fetch_midgard_health_async(node_ip))
+    except Exception as e:
+        midgard_health_cache.put(node_ip, error=e)
+
+
 def get_number_of_unconfirmed_transactions(node_ip) -> int:
     unconfirmed_txs_path = {
         "TESTNET": ":26657/num_unconfirmed_txs",
@@ -114,18 +228,7 @@ def get_pool_addresses_from_any_node() -> dict:
 
 
 async def get_pool_addresses_from_node(node_ip: str):
-
-    async with aiohttp.ClientSession() as session:
-        async with session.get(
-                f'http://{node_ip}:1317/thorchain/inbound_addresses',
-                timeout=CONNECTION_TIMEOUT) as response:
-            if response.status != 200:
-                raise Exception(
-                    f"Error while getting pool address. " +
-                    "Endpoint responded with: {await resp.text()} \n"
-                    "Code: ${str(resp.status)}")
-
-            return await response.json()
+    return await async_http_client.call(get_request_json_async(f'http://{node_ip}:1317/thorchain/inbound_addresses'))
 
 
 def get_request_json_thorchain(url_path: str, node_ip: str = None) -> dict:
@@ -135,28 +238,43 @@ def get_request_json_thorchain(url_path: str, node_ip: str = None) -> dict:
     if node_ip:
         return get_request_json(url=f"http://{node_ip}{url_path}{REQUEST_POSTFIX}")
 
-    available_node_ips = requests.get(url=SEED_LIST_URL, timeout=CONNECTION_TIMEOUT).json()
+    for _ in range(SEED_NODE_REQUEST_ATTEMPTS):
+        seed_node_ip = seed_node_pool.get_best_node_ip()
+        try:
+            return get_request_json(url=f"http://{seed_node_ip}{url_path}{REQUEST_POSTFIX}")
+        except Exception:
+            seed_node_pool.evict(seed_node_ip)
+    raise Exception("No seed node returned a valid response!")
 
-    random.shuffle(available_node_ips)
-    for index in range(0, len(available_node_ips)):
-        random_node_ip = available_node_ips[index]
 
-        # Most performant way at hand to use a different node ip in the list.
-        # If index + 1 is out of bounce, it becomes 0 due to remainder division.
-        reference_index = (index + 1) % len(available_node_ips)
-        reference_node_ip = available_node_ips[reference_index]
+async def get_request_json_thorchain_async(url_path: str, node_ip: str = None) -> dict:
+    if DEBUG:
+        node_ip = 'localhost'
 
-        if not is_block_height_stuck(random_node_ip, reference_node_ip):
-            try:
-                return get_request_json(url=f"http://{random_node_ip}{url_path}{REQUEST_POSTFIX}")
-            except Exception:
-                continue
+    if node_ip:
+        return await get_request_json_async(url=f"http://{node_ip}{url_path}{REQUEST_POSTFIX}")
+
+    loop = asyncio.get_running_loop()
+    for _ in range(SEED_NODE_REQUEST_ATTEMPTS):
+        # The pool may have to probe the seed nodes first, which must not block the event loop
+        seed_node_ip = await loop.run_in_executor(None, seed_node_pool.get_best_node_ip)
+        try:
+            return await get_request_json_async(url=f"http://{seed_node_ip}{url_path}{REQUEST_POSTFIX}")
+        except Exception:
+            seed_node_pool.evict(seed_node_ip)
     raise Exception("No seed node returned a valid response!")
 
 
-def get_thornode_object_or_none(address):
-    nodes = get_node_accounts()
+def get_seed_list() -> list:
+    return get_request_json(url=SEED_LIST_URL)
 
-    node = next(filter(lambda n: n['node_address'] == address, nodes), None)
 
-    return node
+seed_node_pool = SeedNodePool(fetch_seed_list=get_seed_list,
+                              get_block_height=fetch_latest_block_height,
+                              pool_size=SEED_NODE_POOL_SIZE,
+                              seed_list_max_age_in_seconds=SEED_LIST_MAX_AGE_IN_SECONDS,
+                              eviction_time_in_seconds=SEED_NODE_EVICTION_TIME_IN_SECONDS)
+
+
+def get_thornode_object_or_none(address):
+    return get_node_accounts().get(address)
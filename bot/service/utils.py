@@ -3,7 +3,10 @@ from collections import defaultdict
 from datetime import datetime, timedelta
 from typing import Callable, Awaitable
 
-from service.binance_network_service import get_binance_balance
+from data.thornode_subscriptions_dao import ThornodeSubscriptionsDao
+from models.monitored_thornode import MonitoredThornode
+from service.solvency import asgard_solvency_check, yggdrasil_solvency_check, get_solvency_reports, \
+    get_solvency_message, get_insolvent_balances_message
 from service.thorchain_network_service import *
 from constants.messages import NetworkHealthStatus
 
@@ -65,151 +68,6 @@ def format_to_days_and_hours(duration: timedelta) -> str:
     return result
 
 
-def asgard_solvency_check() -> dict:
-    solvency_report = {'is_solvent': True}
-    asgard_actual = defaultdict(lambda: {"json": {}})
-    asgard_expected = get_asgard_json()
-
-    pool_addresses = get_pool_addresses_from_any_node()
-
-    for chain_data in pool_addresses:
-        chain = chain_data['chain']
-        if chain == 'BNB':
-            asgard_actual[chain]['json'] = get_binance_balance(chain_data['address'])
-            break
-
-    for chain_key, chain_value in asgard_actual.items():
-        if chain_key == 'BNB':
-            for balance in chain_value['json']:
-                chain_value[balance['symbol']] = balance['free']
-            break
-
-    for chain in asgard_expected:
-        if chain['status'] == 'active':
-            for coin in chain['coins']:
-                asset = coin['asset'].split('.')
-                actual_amount_formatted = (asgard_actual.get(asset[0]).
-                                           setdefault(asset[1], "0").replace(".", ""))
-                expected_amount_formatted = (coin['amount'].replace(".", ""))
-                if int(actual_amount_formatted) < int(expected_amount_formatted):
-                    solvency_report['is_solvent'] = False
-                    if 'insolvent_coins' not in solvency_report:
-                        solvency_report['insolvent_coins'] = {}
-                    solvency_report['insolvent_coins'][coin['asset']] = {
-                        "expected": coin['amount'],
-                        "actual": asgard_actual[asset[0]][asset[1]]
-                    }
-                else:
-                    if 'solvent_coins' not in solvency_report:
-                        solvency_report['solvent_coins'] = {}
-                    solvency_report['solvent_coins'][coin['asset']] = asgard_actual[asset[0]][asset[1]]
-
-    return solvency_report
-
-
-def yggdrasil_solvency_check() -> dict:
-    solvency_report = {'is_solvent': True}
-    yggdrasil_actual = {}
-
-    yggdrasil_expected = get_yggdrasil_json()
-    for vault in yggdrasil_expected:
-        if vault['status'] == 'active' and vault['vault']['status'] == 'active':
-            for chain in vault['addresses']:
-                if chain['chain'] == 'BNB':
-                    public_key = vault['vault']['pub_key']
-                    if public_key not in yggdrasil_actual:
-                        yggdrasil_actual[public_key] = {}
-                    if chain['chain'] not in yggdrasil_actual[public_key]:
-                        yggdrasil_actual[public_key][chain['chain']] = {}
-                    yggdrasil_actual[public_key][chain['chain']] = {"json": {}}
-                    yggdrasil_actual[public_key][chain['chain']]['json'] = get_binance_balance(chain['address'])
-
-    for vault in yggdrasil_actual:
-        for chain_key, chain_value in yggdrasil_actual[vault].items():
-            if chain_key == 'BNB':
-                for balance in chain_value['json']:
-                    chain_value[balance['symbol']] = balance['free']
-
-    for vault in yggdrasil_expected:
-        if vault['status'] == 'active' and vault['vault']['status'] == 'active':
-            for coin in vault['vault']['coins']:
-                asset = coin['asset'].split('.')
-                actual_amount = (yggdrasil_actual[vault['vault']['pub_key']].get(asset[0]).setdefault(asset[1], "0")
-                                 .replace(".", ""))
-                expected_amount = (coin['amount'].replace(".", ""))
-                if int(actual_amount) < int(expected_amount):
-                    solvency_report['is_solvent'] = False
-                    if 'insolvent_coins' not in solvency_report:
-                        solvency_report['insolvent_coins'] = {}
-                    if vault['vault']['pub_key'] not in solvency_report['insolvent_coins']:
-                        solvency_report['insolvent_coins'][vault['vault']['pub_key']] = {}
-                    solvency_report['insolvent_coins'][vault['vault']['pub_key']][coin['asset']] = \
-                        {
-                            "expected": coin['amount'],
-                            "actual": yggdrasil_actual[vault['vault']['pub_key']][asset[0]][asset[1]]
-                        }
-                else:
-                    if 'solvent_coins' not in solvency_report:
-                        solvency_report['solvent_coins'] = {}
-                    if coin['asset'] in solvency_report['solvent_coins']:
-                        solvency_report['solvent_coins'][coin['asset']] += \
-                            float(yggdrasil_actual[vault['vault']['pub_key']][asset[0]][asset[1]])
-                    else:
-                        solvency_report['solvent_coins'][coin['asset']] = \
-                            float(yggdrasil_actual[vault['vault']['pub_key']][asset[0]][asset[1]])
-
-    return solvency_report
-
-
-def get_solvency_message(asgard_solvency, yggdrasil_solvency) -> str:
-    message = "Tracked Balances of *Asgard*:\n"
-    if 'insolvent_coins' in asgard_solvency:
-        for coin_key, coin_value in asgard_solvency['insolvent_coins'].items():
-            message += f"*{coin_key}*:\n" \
-                       f"  Expected: {coin_value['expected']}\n" \
-                       f"  Actual:   {coin_value['actual']}\n"
-
-    if 'solvent_coins' in asgard_solvency:
-        for coin_key, coin_value in asgard_solvency['solvent_coins'].items():
-            message += f"*{coin_key}*: {coin_value}\n"
-
-    message += "\nTracked Balances of *Yggdrasil*:\n"
-    if 'insolvent_coins' in yggdrasil_solvency:
-        for pub_key, coins in yggdrasil_solvency['insolvent_coins'].items():
-            for coin_key, coin_value in coins.items():
-                message += f"*{pub_key}*:\n" \
-                           f"*{coin_key}*:\n" \
-                           f"  Expected: {coin_value['expected']}\n" \
-                           f"  Actual:   {coin_value['actual']}\n"
-
-    if 'solvent_coins' in yggdrasil_solvency:
-        for coin_key, coin_value in yggdrasil_solvency['solvent_coins'].items():
-            message += f"*{coin_key}*: {coin_value}\n"
-
-    return message
-
-
-def get_insolvent_balances_message(asgard_solvency, yggdrasil_solvency) -> str:
-    message = ""
-    if 'insolvent_coins' in asgard_solvency:
-        message += "Insolvent Balances of *Asgard*:\n"
-        for coin_key, coin_value in asgard_solvency['insolvent_coins'].items():
-            message += f"*{coin_key}*:\n" \
-                       f"  Expected: {coin_value['expected']}\n" \
-                       f"  Actual:   {coin_value['actual']}\n"
-
-    if 'insolvent_coins' in yggdrasil_solvency:
-        message += "\nInsolvent Balances of *Yggdrasil*:\n"
-        for pub_key, coins in yggdrasil_solvency['insolvent_coins'].items():
-            for coin_key, coin_value in coins.items():
-                message += f"*{pub_key}*:\n" \
-                           f"*{coin_key}*:\n" \
-                           f"  Expected: {coin_value['expected']}\n" \
-                           f"  Actual:   {coin_value['actual']}\n"
-
-    return message
-
-
 def network_security_ratio_to_string(network_security_ratio):
     """
     Converts the network security ratio to an understandable english string
@@ -255,26 +113,33 @@ def tor_to_rune(tor):
         return '{:.4f} RUNE'.format(tor / 100000000)
 
 
-def add_thornode_to_chat_data(chat_data, address, node):
+def add_thornode_to_chat_data(chat_id, chat_data, address, node):
     """
     Add a node in the user specific dictionary
     """
 
     nodes = chat_data.setdefault('nodes', {})
     # Find an alias that does not exist yet
+    taken_aliases = {node.alias for node in nodes.values()}
     i = 0
     while True:
         i += 1
         alias = "Thor-" + str(i)
-        if not next(filter(lambda current_address: nodes[current_address]['alias'] == alias, nodes), None):
+        if alias not in taken_aliases:
             break
 
-    nodes[address] = node
-    nodes[address]['alias'] = alias
-    nodes[address][
-        'last_notification_timestamp'] = datetime.timestamp(datetime.now())
-    nodes[address][
-        'notification_timeout_in_seconds'] = INITIAL_NOTIFICATION_TIMEOUT
+    nodes[address] = MonitoredThornode.from_node_account(node, alias=alias)
+
+    ThornodeSubscriptionsDao().subscribe(chat_id, address)
+
+
+def remove_thornode_from_chat_data(chat_id, chat_data, address):
+    """
+    Remove a node from the user specific dictionary
+    """
+
+    del chat_data['nodes'][address]
+    ThornodeSubscriptionsDao().unsubscribe(chat_id, address)
 
 
 def get_slash_points_threshold(context):
@@ -0,0 +1,92 @@
+import abc
+import asyncio
+from typing import Callable, Iterable, NamedTuple, Any
+
+import aiohttp
+
+from constants.globals import logger
+from service.async_http_client import async_http_client
+
+
+class TrackedBlock(NamedTuple):
+    height: int
+    time: float  # Timestamp of the block header
+    received_at: float  # time.monotonic() when the block arrived
+
+
+class WebsocketSubscriptions(abc.ABC):
+    """
+    Keeps one websocket subscription per node on the loop of the async http client and remembers the newest
+    value each node pushed. Dropped sockets are reconnected with exponential backoff.
+    Subclasses define the subscription request and how to read a value from a message.
+    """
+
+    def __init__(self, websocket_url: Callable[[str], str], max_reconnect_delay_in_seconds: float = 60):
+        self._websocket_url = websocket_url
+        self._max_reconnect_delay_in_seconds = max_reconnect_delay_in_seconds
+        self._latest = {}
+        self._subscriptions = {}
+
+    @abc.abstractmethod
+    def get_subscription_request(self) -> dict:
+        pass
+
+    @abc.abstractmethod
+    def parse_message(self, message: dict) -> Any:
+        """
+        Returns the value of a pushed message or None for messages without one, e.g. the subscription reply
+        """
+        pass
+
+    def track_only(self, node_ips: Iterable[str]):
+        """
+        Subscribe to all given node ips and unsubscribe from all others
+        """
+
+        node_ips = set(filter(None, node_ips))
+        for node_ip in set(self._subscriptions) - node_ips:
+            self.untrack(node_ip)
+        for node_ip in node_ips - set(self._subscriptions):
+            self.track(node_ip)
+
+    def track(self, node_ip: str):
+        if node_ip not in self._subscriptions:
+            self._subscriptions[node_ip] = async_http_client.submit(self._follow(node_ip))
+
+    def untrack(self, node_ip: str):
+        subscription = self._subscriptions.pop(node_ip, None)
+        if subscription is not None:
+            subscription.cancel()
+        self._latest.pop(node_ip, None)
+
+    def get_latest(self, node_ip: str):
+        """
+        Returns the newest value of the node while its socket is open, otherwise None
+        """
+
+        return self._latest.get(node_ip)
+
+    async def _follow(self, node_ip: str):
+        reconnect_delay = 1
+        while True:
+            try:
+                async with async_http_client.session.ws_connect(self._websocket_url(node_ip)) as websocket:
+                    await websocket.send_json(self.get_subscription_request())
+                    async for message in websocket:
+                        if message.type != aiohttp.WSMsgType.TEXT:
+                            break
+
+                        value = self.parse_message(message.json())
+                        if value is not None:
+                            self._latest[node_ip] = value
+                            reconnect_delay = 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug(f"Websocket of node {node_ip} failed: {e}")
+            finally:
+                # Values of a dropped socket are outdated, callers fall back to polling until the next one arrives
+                self._latest.pop(node_ip, None)
+
+            await asyncio.sleep(reconnect_delay)
+            reconnect_delay = min(reconnect_delay * 2, self._max_reconnect_delay_in_seconds)
@@ -1,10 +1,11 @@
 from telegram.error import InvalidToken
-from telegram.ext import (Updater, CommandHandler, PicklePersistence,
-                          CallbackQueryHandler, MessageHandler, Filters, messagequeue)
+from telegram.ext import (Updater, CommandHandler,
+                          CallbackQueryHandler, MessageHandler, Filters)
 from telegram.utils.request import Request
 
+from data.sqlite_persistence import SqlitePersistence
 from handlers.handlers import *
-from message_queue import MQBot
+from message_queue import MQBot, PriorityMessageQueue
 from service.setup import *
 
 
@@ -14,10 +15,8 @@ def main():
     if DEBUG:
         setup_debug_processes()
 
-    # M messages/N milliseconds is set as M burst_limit and N time_limit_ms
-    # We cannot set burst_limit to 1, because of some off-by-one if check in the library
-    m_queue = messagequeue.MessageQueue(all_burst_limit=20, all_time_limit_ms=1000,
-                                        group_burst_limit=2, group_time_limit_ms=7000)
+    # The defaults allow 20 messages per second in total and 2 messages per 7 seconds to groups
+    m_queue = PriorityMessageQueue()
     # set connection pool size for bot because
     # it only happens automatically when creating Updater() with the telegram token.
     # But we use the mq_bot to create the Updater() instance.
@@ -32,8 +31,8 @@ def main():
                      " correct Telegram bot token. Check project docs for more details.", exc_info=True)
         raise
 
-    bot = Updater(bot=mq_bot, persistence=PicklePersistence(filename=session_data_path, store_bot_data=False),
-                  workers=8)
+    persistence = SqlitePersistence(filename=session_db_path, pickle_filename=session_data_path, store_bot_data=False)
+    bot = Updater(bot=mq_bot, persistence=persistence, workers=8)
 
     dispatcher = bot.dispatcher
 
@@ -39,8 +39,10 @@ class ThornodeBot(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         # Delete previous sessions for clean testing
-        if os.path.exists("../storage/session.data"):
-            os.remove("../storage/session.data")
+        for session_file in ["../storage/session.data", "../storage/session.sqlite",
+                             "../storage/session.sqlite-wal", "../storage/session.sqlite-shm"]:
+            if os.path.exists(session_file):
+                os.remove(session_file)
 
         # Authenticate Telegram Client of this testing suite
         try:
@@ -1,6 +1,35 @@
+import asyncio
+import os
+import pickle
+import tempfile
+import threading
+import time
 import unittest
 from datetime import timedelta
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock, patch
 
+from aiohttp import web
+from telegram import ReplyKeyboardMarkup
+from telegram.error import Unauthorized, RetryAfter, BadRequest
+
+from broadcaster import Broadcaster
+from constants.globals import CONNECTION_TIMEOUT, HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE
+from data.sqlite_persistence import SqlitePersistence
+from handlers.node_pages import NodePages, render_page
+from message_queue import PriorityMessageQueue, Priority, MQBot
+from models.node_accounts import NodeAccounts
+from service.async_http_client import AsyncHttpClient, AsyncRateLimiter, async_http_client
+from service.binance_network_service import get_binance_balances
+from service.ethereum_head_tracker import EthereumHeadTracker
+from service.ethereum_network_service import get_eth_node_sync_state
+from service.general_network_service import get_request_json, get_request_json_with_retries, http_session, \
+    http_retry_session
+from service.tendermint_block_tracker import TendermintBlockTracker
+from service.cache import TimedSnapshot, TimedCache
+from service.seed_node_pool import SeedNodePool
+from service.thorchain_network_service import fetch_latest_block_height, node_status_cache
 from service.utils import format_to_days_and_hours
 
 
@@ -16,3 +45,451 @@ class UnitTests(unittest.TestCase):
         self.assertEqual(format_to_days_and_hours(timedelta(days=69)), '69 days')
         self.assertEqual(format_to_days_and_hours(timedelta(days=1 + 12 / 24)), '1 day 12 hours')
         self.assertEqual(format_to_days_and_hours(timedelta(days=1 + 1 / 24)), '1 day 1 hour')
+
+    def test_timed_snapshot_fetches_once_per_max_age(self):
+        fetch = Mock(side_effect=[['first'], ['second']])
+        snapshot = TimedSnapshot(fetch=fetch, max_age_in_seconds=60)
+
+        self.assertEqual(snapshot.get(), ['first'])
+        self.assertEqual(snapshot.get(), ['first'])
+        self.assertEqual(fetch.call_count, 1)
+
+        snapshot.invalidate()
+        self.assertEqual(snapshot.get(), ['second'])
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_timed_snapshot_does_not_keep_failed_fetch(self):
+        fetch = Mock(side_effect=[Exception("Timeout"), ['nodes']])
+        snapshot = TimedSnapshot(fetch=fetch, max_age_in_seconds=60)
+
+        with self.assertRaises(Exception):
+            snapshot.get()
+        self.assertEqual(snapshot.get(), ['nodes'])
+
+    def test_timed_cache_shares_results_and_errors_per_key(self):
+        def fetch_status(node_ip):
+            if node_ip == 'dead':
+                raise ConnectionError()
+            return {'ip': node_ip}
+
+        fetch = Mock(side_effect=fetch_status)
+        cache = TimedCache(fetch=fetch, max_age_in_seconds=60, cache_errors=True)
+
+        for _ in range(3):
+            self.assertEqual(cache.get('1.1.1.1'), {'ip': '1.1.1.1'})
+            with self.assertRaises(ConnectionError):
+                cache.get('dead')
+        self.assertEqual(fetch.call_count, 2)
+
+        cache.invalidate('1.1.1.1')
+        cache.get('1.1.1.1')
+        self.assertEqual(fetch.call_count, 3)
+
+        cache.put('2.2.2.2', value={'ip': 'put'})
+        self.assertEqual(cache.get('2.2.2.2'), {'ip': 'put'})
+        self.assertEqual(fetch.call_count, 3)
+
+    def test_binance_balances_are_fetched_concurrently_once_per_address(self):
+        fetched_addresses = []
+
+        async def get_balance(address):
+            fetched_addresses.append(address)
+            await asyncio.sleep(0.2)
+            if address == 'bnb-dead':
+                raise ConnectionError()
+            return [{'symbol': 'BNB', 'free': address}]
+
+        cache = TimedCache(fetch=Mock(), max_age_in_seconds=60)
+        with patch('service.binance_network_service.get_binance_balance_async', side_effect=get_balance), \
+                patch('service.binance_network_service.binance_balance_cache', cache):
+            start = time.monotonic()
+            balances = get_binance_balances(['bnb1', 'bnb2', 'bnb1', 'bnb3'])
+            self.assertLess(time.monotonic() - start, 0.4)
+            self.assertEqual(balances['bnb2'], [{'symbol': 'BNB', 'free': 'bnb2'}])
+
+            get_binance_balances(['bnb3', 'bnb2'])
+            self.assertEqual(fetched_addresses, ['bnb1', 'bnb2', 'bnb3'])
+
+            with self.assertRaises(ConnectionError):
+                get_binance_balances(['bnb1', 'bnb-dead'])
+
+    def test_async_rate_limiter_spaces_requests(self):
+        async def acquire_all(rate_limiter):
+            start = time.monotonic()
+            await asyncio.gather(*(rate_limiter.acquire() for _ in range(5)))
+            return time.monotonic() - start
+
+        self.assertGreaterEqual(async_http_client.run(acquire_all(AsyncRateLimiter(requests_per_second=20))), 0.2)
+
+    def test_service_calls_reuse_one_keep_alive_session(self):
+        client_ports = []
+
+        class StatusHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                client_ports.append(self.client_address[1])
+                body = b'{"ok": true}'
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StatusHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/status"
+        try:
+            with patch.object(http_session, 'get', wraps=http_session.get) as mock_get:
+                self.assertEqual([get_request_json(url) for _ in range(3)], [{'ok': True}] * 3)
+            self.assertEqual(get_request_json_with_retries(url), {'ok': True})
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        # One connection per session and host, reused for all calls
+        self.assertEqual(len(client_ports), 4)
+        self.assertEqual(len(set(client_ports[:3])), 1)
+        self.assertTrue(all(c.kwargs['timeout'] == CONNECTION_TIMEOUT for c in mock_get.call_args_list))
+
+        adapter = http_session.get_adapter(url)
+        self.assertIs(http_session.get_adapter('https://other.host'), adapter)
+        self.assertEqual((adapter._pool_connections, adapter._pool_maxsize),
+                         (HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE))
+        self.assertEqual(adapter.max_retries.total, 0)
+        retry = http_retry_session.get_adapter(url).max_retries
+        self.assertEqual((retry.total, retry.connect, retry.read, retry.backoff_factor), (6, 6, 6, 1))
+        self.assertEqual(set(retry.status_forcelist), {500, 502, 504})
+
+    def test_async_http_client_runs_coroutines_on_one_loop(self):
+        client = AsyncHttpClient()
+
+        async def get_loop():
+            return asyncio.get_running_loop()
+
+        client_loop = client.run(get_loop())
+        self.assertIs(client.submit(get_loop()).result(), client_loop)
+        self.assertIs(asyncio.run(client.call(get_loop())), client_loop)
+        self.assertIsNotNone(client.session)
+
+    def test_node_accounts_index(self):
+        node_accounts = NodeAccounts([
+            {'node_address': 'thor1', 'status': 'active', 'ip_address': '1.1.1.1'},
+            {'node_address': 'thor2', 'status': 'standby', 'ip_address': '2.2.2.2'},
+            {'node_address': 'thor3', 'status': 'active', 'ip_address': '1.1.1.1'}
+        ])
+
+        self.assertEqual(len(node_accounts), 3)
+        self.assertEqual([n['node_address'] for n in node_accounts], ['thor1', 'thor2', 'thor3'])
+        self.assertEqual(node_accounts.get('thor2')['ip_address'], '2.2.2.2')
+        self.assertIsNone(node_accounts.get('thor42'))
+        self.assertIn('thor3', node_accounts)
+        self.assertEqual([n['node_address'] for n in node_accounts.with_status('Active')], ['thor1', 'thor3'])
+        self.assertEqual(node_accounts.with_status('disabled'), [])
+        self.assertEqual(len(node_accounts.with_ip_address('1.1.1.1')), 2)
+
+    def test_node_pages_fit_into_messages_and_are_shared_per_snapshot(self):
+        node_accounts = NodeAccounts([
+            {'node_address': f"thor{i}", 'status': 'active', 'ip_address': f"1.1.1.{i}", 'version': '0.23.0',
+             'bond': '100000000000', 'slash_points': '42', 'current_award': '1000000000', 'status_since': '1000'}
+            for i in range(120)
+        ])
+
+        with patch('handlers.node_pages.get_node_accounts', return_value=node_accounts) as mock_get_node_accounts, \
+                patch('handlers.node_pages.get_latest_block_height', return_value=100000), \
+                patch('handlers.node_pages.get_thorchain_blocks_per_second',
+                      return_value=0.2) as mock_get_thorchain_blocks_per_second:
+            node_pages = NodePages()
+            pages = node_pages.get_pages()
+            self.assertIs(node_pages.get_pages(), pages)
+            self.assertEqual(mock_get_thorchain_blocks_per_second.call_count, 1)
+
+            mock_get_node_accounts.return_value = NodeAccounts(list(node_accounts)[:10])
+            self.assertEqual(len(node_pages.get_pages()), 1)
+            self.assertEqual(mock_get_thorchain_blocks_per_second.call_count, 2)
+
+        self.assertGreater(len(pages), 1)
+        self.assertEqual([address for page in pages for address, _ in page], [f"thor{i}" for i in range(120)])
+
+        aliases = {address: '🦸' * 16 for page in pages for address, _ in page}
+        for index in range(len(pages)):
+            text, reply_markup = render_page(pages, index, aliases)
+            self.assertLessEqual(len(text.encode('utf-16-le')) // 2, 4096)
+
+        text, reply_markup = render_page(pages, 0, {'thor1': 'My Node'})
+        self.assertIn('THORNode: *not monitored*\nAddress: *thor0*', text)
+        self.assertIn('THORNode: *My Node*\nAddress: *thor1*', text)
+        self.assertEqual([button.callback_data for button in reply_markup.inline_keyboard[0]],
+                         ['show_all_thorchain_nodes-1'])
+
+        _, reply_markup = render_page(pages, len(pages), {})
+        self.assertEqual([button.callback_data for button in reply_markup.inline_keyboard[0]],
+                         [f"show_all_thorchain_nodes-{len(pages) - 2}"])
+
+    def test_seed_node_pool_skips_stuck_and_failing_nodes(self):
+        block_heights = {'1.1.1.1': 100, '2.2.2.2': 101, '3.3.3.3': 42, '4.4.4.4': None}
+
+        def get_block_height(node_ip):
+            if block_heights[node_ip] is None:
+                raise ConnectionError()
+            return block_heights[node_ip]
+
+        fetch_seed_list = Mock(return_value=list(block_heights.keys()))
+        pool = SeedNodePool(fetch_seed_list=fetch_seed_list,
+                            get_block_height=get_block_height,
+                            pool_size=4,
+                            seed_list_max_age_in_seconds=60,
+                            eviction_time_in_seconds=60)
+
+        self.assertIn(pool.get_best_node_ip(), ['1.1.1.1', '2.2.2.2'])
+
+        pool.evict('1.1.1.1')
+        pool.evict('2.2.2.2')
+        self.assertEqual(pool.get_best_node_ip(), '3.3.3.3')
+
+        pool.evict('3.3.3.3')
+        with self.assertRaises(Exception):
+            pool.get_best_node_ip()
+        self.assertEqual(fetch_seed_list.call_count, 1)
+
+    @patch('service.thorchain_network_service.get_request_json_thorchain')
+    def test_seed_nodes_are_probed_without_the_shared_status_cache(self, mock_get_request_json_thorchain):
+        mock_get_request_json_thorchain.return_value = {'result': {'sync_info': {'latest_block_height': '100'}}}
+        # Neither a cached status nor a cached error of the node decides about its score
+        node_status_cache.put('1.1.1.1', error=ConnectionError())
+
+        for _ in range(2):
+            self.assertEqual(fetch_latest_block_height('1.1.1.1'), 100)
+
+        self.assertEqual(mock_get_request_json_thorchain.call_count, 2)
+        node_status_cache.invalidate('1.1.1.1')
+
+    def test_sqlite_persistence_migrates_pickle_file_and_writes_changed_chats_only(self):
+        with tempfile.TemporaryDirectory() as storage_path:
+            pickle_path = os.path.join(storage_path, 'session.data')
+            db_path = os.path.join(storage_path, 'session.sqlite')
+            with open(pickle_path, 'wb') as file:
+                pickle.dump({'chat_data': {1: {'nodes': {'thor1': {}}}, 2: {}}, 'user_data': {1: {}},
+                             'bot_data': {}, 'conversations': {}}, file)
+
+            persistence = SqlitePersistence(filename=db_path, pickle_filename=pickle_path, store_bot_data=False)
+            self.assertFalse(os.path.exists(pickle_path))
+            chat_data = persistence.get_chat_data()
+            self.assertEqual(dict(chat_data), {1: {'nodes': {'thor1': {}}}, 2: {}})
+
+            connection = persistence._connection
+            persistence._connection = Mock(wraps=connection)
+            persistence.update_chat_data(1, chat_data[1])
+            persistence._connection.execute.assert_not_called()
+
+            chat_data[2]['job_started'] = True
+            persistence.update_chat_data(2, chat_data[2])
+            persistence.drop_chat_data(1)
+            self.assertEqual(persistence._connection.execute.call_count, 2)
+            persistence._connection = connection
+
+            reopened = SqlitePersistence(filename=db_path, pickle_filename=pickle_path, store_bot_data=False)
+            self.assertEqual(dict(reopened.get_chat_data()), {2: {'job_started': True}})
+            self.assertEqual(dict(reopened.get_user_data()), {1: {}})
+
+    def test_tendermint_block_tracker_follows_new_blocks(self):
+        async def websocket_handler(request):
+            websocket = web.WebSocketResponse()
+            await websocket.prepare(request)
+            subscription = await websocket.receive_json()
+            await websocket.send_json({'jsonrpc': '2.0', 'id': subscription['id'], 'result': {}})
+            for height in (41, 42):
+                await websocket.send_json({'jsonrpc': '2.0', 'id': subscription['id'], 'result': {
+                    'data': {'type': 'tendermint/event/NewBlock', 'value': {'block': {'header': {
+                        'height': str(height), 'time': '2021-03-04T10:00:00.123456789Z'}}}}}})
+            async for _ in websocket:
+                pass
+            return websocket
+
+        async def start_stand_in():
+            app = web.Application()
+            app.router.add_get('/websocket', websocket_handler)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, '127.0.0.1', 0, shutdown_timeout=0.1)
+            await site.start()
+            return runner
+
+        runner = async_http_client.run(start_stand_in())
+        port = runner.addresses[0][1]
+        tracker = TendermintBlockTracker(websocket_url=lambda node_ip: f"ws://{node_ip}:{port}/websocket",
+                                         max_silence_in_seconds=30,
+                                         catching_up_block_age_in_seconds=60)
+        try:
+            tracker.track_only(['127.0.0.1', ''])
+            for _ in range(50):
+                block = tracker.get_block('127.0.0.1')
+                if block is not None and block.height == 42:
+                    break
+                time.sleep(0.05)
+
+            self.assertEqual(block.height, 42)
+            self.assertTrue(tracker.is_catching_up(block))
+            self.assertIsNone(tracker.get_block('1.1.1.1'))
+
+            tracker.track_only([])
+            self.assertIsNone(tracker.get_block('127.0.0.1'))
+        finally:
+            async_http_client.run(runner.cleanup())
+
+    def test_ethereum_head_tracker_detects_stalls_and_dropped_sockets(self):
+        close_socket = None
+
+        async def websocket_handler(request):
+            websocket = web.WebSocketResponse()
+            await websocket.prepare(request)
+            subscription = await websocket.receive_json()
+            subscription_id = '0xcd0c3e8af590364c09d0fa6a1210faf5'
+            await websocket.send_json({'jsonrpc': '2.0', 'id': subscription['id'], 'result': subscription_id})
+            await websocket.send_json({'jsonrpc': '2.0', 'method': 'eth_subscription', 'params': {
+                'subscription': subscription_id,
+                'result': {'number': hex(12000000), 'timestamp': hex(int(time.time()))}}})
+            await close_socket.wait()
+            await websocket.close()
+            return websocket
+
+        async def start_stand_in():
+            nonlocal close_socket
+            close_socket = asyncio.Event()
+            app = web.Application()
+            app.router.add_get('/', websocket_handler)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, '127.0.0.1', 0, shutdown_timeout=0.1)
+            await site.start()
+            return runner
+
+        def wait_for_head():
+            for _ in range(50):
+                head = tracker.get_head(node_ip)
+                if head is not None:
+                    return head
+                time.sleep(0.05)
+
+        runner = async_http_client.run(start_stand_in())
+        node_ip = f"127.0.0.1:{runner.addresses[0][1]}"
+        tracker = EthereumHeadTracker(websocket_url=lambda ip: f"ws://{ip}/",
+                                      expected_block_time_in_seconds=0.1,
+                                      max_missed_blocks=2)
+        try:
+            tracker.track(node_ip)
+            head = wait_for_head()
+            self.assertEqual(head.height, 12000000)
+            self.assertFalse(tracker.is_stalled(head))
+
+            time.sleep(0.3)
+            self.assertTrue(tracker.is_stalled(head))
+
+            async_http_client.loop.call_soon_threadsafe(close_socket.set)
+            time.sleep(0.2)
+            self.assertIsNone(tracker.get_head(node_ip))
+        finally:
+            tracker.untrack(node_ip)
+            async_http_client.run(runner.cleanup())
+
+    def test_ethereum_service_sends_json_rpc_batches_over_the_async_client(self):
+        batches = []
+
+        async def json_rpc_handler(request):
+            batch = await request.json()
+            batches.append(batch)
+            results = {'eth_syncing': {'highestBlock': hex(12000010)}, 'eth_blockNumber': hex(12000000)}
+            # Servers may reply to a batch in any order
+            return web.json_response([{'jsonrpc': '2.0', 'id': call['id'], 'result': results[call['method']]}
+                                      for call in reversed(batch)])
+
+        async def start_stand_in():
+            app = web.Application()
+            app.router.add_post('/', json_rpc_handler)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, '127.0.0.1', 0, shutdown_timeout=0.1)
+            await site.start()
+            return runner
+
+        runner = async_http_client.run(start_stand_in())
+        node_ip = f"127.0.0.1:{runner.addresses[0][1]}"
+        try:
+            self.assertEqual(get_eth_node_sync_state(node_ip), (12000000, 12000010, False))
+            self.assertEqual([[call['method'] for call in batch] for batch in batches],
+                             [['eth_syncing', 'eth_blockNumber']])
+        finally:
+            async_http_client.run(runner.cleanup())
+
+    def test_broadcaster_delivers_in_background_and_reports_failures(self):
+        sent_at = {}
+        retried = []
+
+        def send_message(chat_id, text, parse_mode, reply_markup):
+            if chat_id == 2:
+                raise Unauthorized('Forbidden: bot was blocked by the user')
+            if chat_id == 3:
+                raise BadRequest('Chat not found')
+            if chat_id == 4 and not retried:
+                retried.append(chat_id)
+                raise RetryAfter(0.1)
+            sent_at.setdefault(chat_id, []).append((time.monotonic(), text, reply_markup))
+
+        message_queue = PriorityMessageQueue(all_burst_limit=100, all_time_limit_ms=1000)
+        bot = Mock(spec=MQBot)
+        bot.send_message.side_effect = lambda *args, isgroup, priority, **kwargs: message_queue.put(
+            partial(send_message, *args, **kwargs), is_group_msg=isgroup, priority=priority)
+        on_chat_blocked = Mock()
+        broadcaster = Broadcaster(bot=bot, messages_per_second=100, user_chat_interval_in_seconds=0.2,
+                                  max_pending_deliveries=2, on_chat_blocked=on_chat_blocked)
+        markup = ReplyKeyboardMarkup([['📡 MY NODES']], resize_keyboard=True)
+
+        first = broadcaster.broadcast(chat_ids=[1, 2, 3, 4], text='first', reply_markup=markup)
+        second = broadcaster.broadcast(chat_ids=[1], text='second')
+        self.assertTrue(first.wait(timeout=2))
+        self.assertTrue(second.wait(timeout=2))
+
+        self.assertEqual((first.delivered, sorted(first.failed), first.pending), (2, [2, 3], 0))
+        on_chat_blocked.assert_called_once_with(2)
+        self.assertEqual(sent_at[1][0][2], markup.to_json())
+        self.assertEqual([text for _, text, _ in sent_at[1]], ['first', 'second'])
+        # The scheduler spaces the hand-overs to the message queue, whose thread adds a little jitter
+        self.assertGreaterEqual(sent_at[1][1][0] - sent_at[1][0][0], 0.19)
+        self.assertEqual(retried, [4])
+        self.assertIn(4, sent_at)
+        self.assertTrue(all(c.kwargs['priority'] is Priority.BULK for c in bot.send_message.call_args_list))
+        message_queue.stop()
+
+    def test_priority_message_queue_sends_higher_lanes_first(self):
+        sent = []
+        message_queue = PriorityMessageQueue(all_burst_limit=1, all_time_limit_ms=100,
+                                             group_burst_limit=1, group_time_limit_ms=10000)
+        try:
+            # Uses up the budget, so all following messages are waiting at the same time
+            message_queue.put(lambda: sent.append('first'), priority=Priority.BULK).result(timeout=2)
+            futures = [message_queue.put(lambda i=i: sent.append(f'bulk {i}'), priority=Priority.BULK)
+                        for i in range(3)]
+            futures += [message_queue.put(lambda: sent.append('group 1'), is_group_msg=True,
+                                          priority=Priority.CRITICAL),
+                        message_queue.put(lambda: sent.append('group 2'), is_group_msg=True,
+                                          priority=Priority.CRITICAL),
+                        message_queue.put(lambda: sent.append('reply'), priority=Priority.INTERACTIVE)]
+
+            failing = message_queue.put(Mock(side_effect=BadRequest('Chat not found')), priority=Priority.BULK)
+            with self.assertRaises(BadRequest):
+                failing.result(timeout=2)
+            for future in futures[:4] + futures[5:]:
+                future.result(timeout=2)
+
+            # The second group message waits for the group budget, but doesn't hold up the other lanes
+            self.assertEqual(sent[:6], ['first', 'group 1', 'reply', 'bulk 0', 'bulk 1', 'bulk 2'])
+            stats = message_queue.get_stats()
+            self.assertEqual((stats[Priority.CRITICAL].sent, stats[Priority.CRITICAL].depth), (1, 1))
+            self.assertEqual(stats[Priority.BULK].sent, 5)
+            self.assertGreater(stats[Priority.BULK].max_wait_in_seconds,
+                               stats[Priority.INTERACTIVE].max_wait_in_seconds)
+        finally:
+            message_queue.stop()
@@ -1,14 +1,34 @@
+import asyncio
 import copy
+import pickle
+import time
 import unittest
+from concurrent.futures import Future
 from unittest.mock import Mock, patch
 
+from telegram.error import BadRequest
+
 from constants.messages import get_network_health_warning, NETWORK_HEALTHY_AGAIN, NetworkHealthStatus
 from jobs.other_nodes_jobs import *
 from jobs.thorchain_network_jobs import check_network_security, check_thorchain_constants
 from jobs.other_nodes_jobs import check_health
 from jobs.thorchain_node_jobs import check_solvency, check_churning
-from models.nodes import Node, UnauthorizedException
-from unit_tests.helpers import network_data
+from jobs.monitoring_scheduler import MonitoringScheduler
+from data.thornode_subscriptions_dao import ThornodeSubscriptionsDao
+from handlers.alert_digest import AlertAggregator, render_alert_digest, get_telegram_length, ALERT_SEPARATOR
+from handlers.dashboard import update_dashboard, render_dashboard, get_content_hash, get_network_summary, \
+    toggle_dashboard
+from message_queue import Priority
+from models.monitored_thornode import MonitoredThornode
+from models.node_accounts import NodeAccounts
+from models.nodes import Node, NodeProbe, UnauthorizedException
+from models.solvency_report import SolvencyReport, VaultBalance
+from service.setup import setup_existing_users
+from service.ethereum_network_service import ethereum_head_tracker
+from service.solvency import yggdrasil_solvency_check, SolvencyTracker, evaluate_solvency
+from service.thorchain_network_service import node_status_cache, node_accounts_snapshot
+from service.websocket_subscriptions import TrackedBlock
+from unit_tests.helpers import network_data, node_mock
 
 
 class ContextMock:
@@ -21,7 +41,7 @@ class JobTests(unittest.TestCase):
 
     def __init__(self, *args, **kwargs):
         super(JobTests, self).__init__(*args, **kwargs)
-        self.node_mock.get_block_height.return_value = 42
+        self.node_mock.probe.return_value = NodeProbe(healthy=True, block_height=42, is_synced=True)
         self.node_mock.node_id = "node_1234"
         self.node_mock.node_ip = "11.42.25.201"
         self.node_mock.network_name = "MoshbitChain"
@@ -36,33 +56,49 @@ class JobTests(unittest.TestCase):
         message = check_block_height_increase(self.context, self.node_mock)
         self.assertIs(message, None)
 
-        self.node_mock.get_block_height.return_value = 43
+        self.node_mock.probe.return_value = NodeProbe(healthy=True, block_height=43)
 
         message = check_block_height_increase(self.context, self.node_mock)
         self.assertIn("Block height is increasing again".lower(), message.lower())
 
-        self.node_mock.get_block_height.return_value = 44
+        self.node_mock.probe.return_value = NodeProbe(healthy=True, block_height=44)
 
         message = check_block_height_increase(self.context, self.node_mock)
         self.assertIs(message, None)
 
-        self.node_mock.get_block_height.side_effect = UnauthorizedException()
+        self.node_mock.probe.return_value = NodeProbe(healthy=False, error=UnauthorizedException())
         message = check_block_height_increase(self.context, self.node_mock)
         self.assertIn(f"returns 401 - Unauthorized".lower(), message.lower())
 
+    def test_block_height_increase_check_of_pushed_blocks(self):
+        node = Mock(spec=Node)
+        node.node_id = "pushing_node"
+        node.probe.return_value = NodeProbe(healthy=True, block_height=42, is_stalled=False)
+        self.assertIsNone(check_block_height_increase(self.context, node))
+        # The height of the last pushed block doesn't change between checks, only the stall decides
+        self.assertIsNone(check_block_height_increase(self.context, node))
+
+        node.probe.return_value = NodeProbe(healthy=True, block_height=42, is_stalled=True)
+        message = check_block_height_increase(self.context, node)
+        self.assertIn("Block height is not increasing anymore".lower(), message.lower())
+
+        node.probe.return_value = NodeProbe(healthy=True, block_height=43, is_stalled=False)
+        message = check_block_height_increase(self.context, node)
+        self.assertIn("Block height is increasing again".lower(), message.lower())
+
     def test_health_check(self):
-        self.node_mock.is_healthy.return_value = True
+        self.node_mock.probe.return_value = NodeProbe(healthy=True)
         message = check_health(self.node_mock, self.context)
         self.assertIs(message, None)
 
-        self.node_mock.is_healthy.return_value = False
+        self.node_mock.probe.return_value = NodeProbe(healthy=False, error=ConnectionError())
         message = check_health(self.node_mock, self.context)
         self.assertIn(f"is not healthy anymore".lower(), message.lower())
 
         message = check_health(self.node_mock, self.context)
         self.assertIs(message, None)
 
-        self.node_mock.is_healthy.return_value = True
+        self.node_mock.probe.return_value = NodeProbe(healthy=True)
         message = check_health(self.node_mock, self.context)
         self.assertIn(f"is healthy again!".lower(), message.lower())
 
@@ -70,18 +106,18 @@ class JobTests(unittest.TestCase):
         self.assertIs(message, None)
 
     def test_syncing_check(self):
-        self.node_mock.is_fully_synced.return_value = True
+        self.node_mock.probe.return_value = NodeProbe(healthy=True, is_synced=True)
         message = check_other_nodes_syncing(self.node_mock, self.context)
         self.assertIs(message, None)
 
-        self.node_mock.is_fully_synced.return_value = False
+        self.node_mock.probe.return_value = NodeProbe(healthy=True, is_synced=False)
         message = check_other_nodes_syncing(self.node_mock, self.context)
         self.assertIn(f"is syncing with the network".lower(), message.lower())
 
         message = check_other_nodes_syncing(self.node_mock, self.context)
         self.assertIs(message, None)
 
-        self.node_mock.is_fully_synced.return_value = True
+        self.node_mock.probe.return_value = NodeProbe(healthy=True, is_synced=True)
         message = check_other_nodes_syncing(self.node_mock, self.context)
         self.assertIn(f"is fully synced again".lower(), message.lower())
 
@@ -91,24 +127,21 @@ class JobTests(unittest.TestCase):
     @patch('jobs.thorchain_node_jobs.yggdrasil_solvency_check')
     @patch('jobs.thorchain_node_jobs.asgard_solvency_check')
     def test_solvency_check_success(self, mock_asgard_solvency_check, mock_yggdrasil_solvency_check):
-        mock_asgard_solvency_check.return_value = {"is_solvent": True,
-                                                   "solvent_coins": {'BNB.RUNE-67C': '461534.11554061',
-                                                                     'BNB.MATIC-416': '3042.60609950'}}
-        mock_yggdrasil_solvency_check.return_value = {"is_solvent": True,
-                                                      "solvent_coins": {'BNB.RUNE-67C': '129646.02621566999',
-                                                                        'BNB.MATIC-416': '6580.429120989999'}}
+        solvent_report = SolvencyReport(solvent_balances=(
+            VaultBalance(vault='thorpub1asgard', chain='BNB', asset='BNB.RUNE-67C',
+                         expected=46153411554061, actual=46153411554061),
+            VaultBalance(vault='thorpub1asgard', chain='BNB', asset='BNB.MATIC-416',
+                         expected=304260609950, actual=304260609950)), insolvent_balances=())
+        insolvent_report = SolvencyReport(solvent_balances=solvent_report.solvent_balances, insolvent_balances=(
+            VaultBalance(vault='tthorpub1addwnpepqwl6dhku5q2r98mwlx4ey4epzz5hamzc5c0s3z7qm8gudekdzgr4wjdafnc',
+                         chain='BNB', asset='BNB.BNB', expected=1175126895, actual=1175096895),))
+        mock_asgard_solvency_check.return_value = solvent_report
+        mock_yggdrasil_solvency_check.return_value = solvent_report
 
         message = check_solvency(self.context)
         self.assertIs(message, None, "Solvency message should be None but is not!")
 
-        mock_yggdrasil_solvency_check.return_value = {"is_solvent": False,
-                                                      "solvent_coins": {'BNB.RUNE-67C': '129646.02621566999',
-                                                                        'BNB.MATIC-416': '6580.429120989999'},
-                                                      'insolvent_coins': {
-                                                          'tthorpub1addwnpepqwl6dhku5q2r98mwlx4ey4epzz5hamzc5c0s3z7qm8gudekdzgr4wjdafnc':
-                                                              {'BNB.BNB':
-                                                                   {'expected': '1175126895',
-                                                                    'actual': '11.75096895'}}}}
+        mock_yggdrasil_solvency_check.return_value = insolvent_report
         for i in range(0, MISSING_FUNDS_THRESHOLD - 1):
             message = check_solvency(self.context)
             self.assertIs(message, None, "Solvency message should be None but is not!")
@@ -116,15 +149,162 @@ class JobTests(unittest.TestCase):
         message = check_solvency(self.context)
         self.assertIn("THORChain is *missing funds*! 💀", message,
                       "Solvency message should alert about missing funds but does not!")
+        self.assertIn("Expected: 11.75126895\n  Actual:   11.75096895", message)
 
-        mock_yggdrasil_solvency_check.return_value = {"is_solvent": True,
-                                                      "solvent_coins": {'BNB.RUNE-67C': '129646.02621566999',
-                                                                        'BNB.MATIC-416': '6580.429120989999'}}
+        mock_yggdrasil_solvency_check.return_value = solvent_report
 
         message = check_solvency(self.context)
         self.assertIn("THORChain is *100% solvent* again! 👌\n", message,
                       "Solvency message should alert about correct funds but does not!")
 
+    @patch('service.solvency.get_binance_balances')
+    @patch('service.solvency.get_yggdrasil_json')
+    def test_yggdrasil_solvency_check_compares_base_units(self, mock_get_yggdrasil_json, mock_get_binance_balances):
+        def vault(pub_key, address, status='active'):
+            return {'status': status, 'addresses': [{'chain': 'BNB', 'address': address}],
+                    'vault': {'pub_key': pub_key, 'status': 'active', 'coins': [
+                        {'asset': 'BNB.BNB', 'amount': '1175126895'},
+                        {'asset': 'BNB.BUSD-BD1', 'amount': '250000000'},
+                        {'asset': 'BTC.BTC', 'amount': '100000000'}]}}
+
+        mock_get_yggdrasil_json.return_value = [vault('pub1', 'bnb1'), vault('pub2', 'bnb2'),
+                                                vault('pub3', 'bnb3', status='retiring')]
+        # 2.5 BUSD is solvent, no matter how many decimals the API returns. Coins of other chains are not tracked.
+        mock_get_binance_balances.return_value = {
+            'bnb1': [{'symbol': 'BNB', 'free': '11.75126895'}, {'symbol': 'BUSD-BD1', 'free': '2.5'}],
+            'bnb2': [{'symbol': 'BNB', 'free': '11.75096895'}, {'symbol': 'BUSD-BD1', 'free': '2.500000000'}]}
+
+        report = yggdrasil_solvency_check()
+
+        self.assertEqual(list(mock_get_binance_balances.call_args[0][0]), ['bnb1', 'bnb2'])
+        self.assertFalse(report.is_solvent)
+        self.assertEqual(report.insolvent_balances, (
+            VaultBalance(vault='pub2', chain='BNB', asset='BNB.BNB', expected=1175126895, actual=1175096895),))
+        self.assertEqual(report.insolvent_balances[0].delta, -30000)
+        self.assertEqual(report.get_actual_amounts_by_asset(), {'BNB.BNB': 1175126895, 'BNB.BUSD-BD1': 500000000})
+
+    def test_solvency_tracker_only_evaluates_changed_vaults(self):
+        def vault(pub_key, free):
+            return pub_key, [{'asset': 'BNB.BNB', 'amount': '100000000'}], [{'symbol': 'BNB', 'free': free}]
+
+        tracker = SolvencyTracker()
+        with patch('service.solvency.evaluate_solvency', wraps=evaluate_solvency) as mock_evaluate_solvency:
+            report = tracker.update([vault('pub1', '1.0'), vault('pub2', '1.0')])
+            self.assertTrue(report.is_solvent)
+            self.assertEqual(mock_evaluate_solvency.call_count, 2)
+
+            self.assertIs(tracker.update([vault('pub1', '1.0'), vault('pub2', '1.0')]), report)
+            self.assertEqual(mock_evaluate_solvency.call_count, 2)
+
+            report = tracker.update([vault('pub1', '1.0'), vault('pub2', '0.9')])
+            self.assertEqual(mock_evaluate_solvency.call_count, 3)
+            self.assertEqual([balance.vault for balance in report.insolvent_balances], ['pub2'])
+
+            report = tracker.update([vault('pub1', '1.0')])
+            self.assertEqual(mock_evaluate_solvency.call_count, 3)
+            self.assertTrue(report.is_solvent)
+
+        self.assertIs(tracker.get_report(max_age_in_seconds=60), report)
+        self.assertIsNone(SolvencyTracker().get_report(max_age_in_seconds=60))
+
+    @patch('handlers.alert_digest.try_message_with_home_menu')
+    def test_alerts_of_a_chat_are_sent_as_one_digest(self, mock_try_message_with_home_menu):
+        context = Mock()
+        aggregator = AlertAggregator(window_in_seconds=5)
+        aggregator.add(context, 1, 'Block height is not increasing anymore! 💀')
+        aggregator.add(context, 2, 'Midgard API is not healthy anymore! 💀')
+        aggregator.add(context, 1, 'The node is catching up! 💀')
+        context.job_queue.run_once.assert_called_once_with(aggregator.flush, 5)
+
+        aggregator.flush(context)
+        aggregator.flush(context)
+
+        messages = {c.kwargs['chat_id']: c.kwargs['text'] for c in mock_try_message_with_home_menu.call_args_list}
+        self.assertEqual(mock_try_message_with_home_menu.call_count, 2)
+        self.assertEqual(messages[1], 'Block height is not increasing anymore! 💀' + ALERT_SEPARATOR +
+                         'The node is catching up! 💀')
+        self.assertEqual(messages[2], 'Midgard API is not healthy anymore! 💀')
+
+    def test_alert_digest_is_split_at_the_message_limit(self):
+        alerts = [f"THORNode {i} is not healthy anymore! 💀\nIP: 1.2.3.{i}" for i in range(200)]
+        long_alert = '\n'.join(['💀' * 1000] * 3)
+
+        messages = render_alert_digest(alerts + [long_alert])
+
+        self.assertTrue(all(get_telegram_length(message) <= 4096 for message in messages))
+        self.assertEqual(ALERT_SEPARATOR.join(messages[:-2]), ALERT_SEPARATOR.join(alerts))
+        self.assertEqual(messages[-2:], ['💀' * 1000 + '\n' + '💀' * 1000, '💀' * 1000])
+
+    def test_dashboard_is_only_edited_when_its_content_changed(self):
+        context = Mock()
+        node = MonitoredThornode(node_address='thor1abc', alias='My Node', status='Active', bond='1', slash_points='0',
+                                 ip_address='1.2.3.4', version='0.23.0')
+        node.block_height = 42
+        node.is_catching_up = False
+        chat_data = {'nodes': {'thor1abc': node},
+                     'dashboard': {'message_id': 7, 'content_hash': None}}
+
+        edit = Future()
+        context.bot.edit_message_text.return_value = edit
+        self.assertTrue(update_dashboard(context, 1, chat_data, network_summary=None))
+        # The edit is still waiting in the message queue
+        self.assertFalse(update_dashboard(context, 1, chat_data, network_summary=None))
+        context.bot.edit_message_text.assert_called_once()
+        self.assertIn('*My Node* (...abc) [💗]', context.bot.edit_message_text.call_args.args[0])
+        self.assertEqual(context.bot.edit_message_text.call_args.kwargs['priority'], Priority.BULK)
+        edit.set_result(True)
+        self.assertEqual(chat_data['dashboard']['content_hash'],
+                         get_content_hash(render_dashboard(chat_data['nodes'], network_summary=None)))
+
+        node.block_height = 43
+        failed_edit = Future()
+        context.bot.edit_message_text.return_value = failed_edit
+        self.assertTrue(update_dashboard(context, 1, chat_data, network_summary=None))
+        failed_edit.set_exception(BadRequest('Message to edit not found'))
+        self.assertNotIn('dashboard', chat_data)
+
+    @patch('handlers.dashboard.get_node_accounts', side_effect=Exception('Node accounts unavailable'))
+    def test_dashboard_toggle_keeps_the_settings_keyboard(self, _):
+        update = Mock()
+        update.effective_chat.id = 1
+        context = Mock()
+        context.chat_data = {}
+        context.bot_data = {}
+        context.bot.send_message.return_value.message_id = 7
+
+        def get_dashboard_button():
+            reply_markup = update.callback_query.edit_message_reply_markup.call_args.kwargs['reply_markup']
+            return reply_markup.inline_keyboard[-1][0].text
+
+        toggle_dashboard(update, context)
+        self.assertEqual(context.chat_data['dashboard']['message_id'], 7)
+        context.bot.pin_chat_message.assert_called_once_with(1, 7, disable_notification=True)
+        self.assertEqual(get_dashboard_button(), '📌 Live dashboard: ON')
+
+        toggle_dashboard(update, context)
+        self.assertNotIn('dashboard', context.chat_data)
+        context.bot.unpin_chat_message.assert_called_once_with(1, message_id=7)
+        self.assertEqual(get_dashboard_button(), '📌 Live dashboard: OFF')
+
+    def test_dashboard_network_summary_reads_the_probes_of_the_tick(self):
+        def status(block_height):
+            return {'result': {'sync_info': {'latest_block_height': str(block_height), 'catching_up': False}}}
+
+        node_accounts = NodeAccounts([{'node_address': f"thor{i}", 'status': 'Active', 'ip_address': f"1.1.1.{i}"}
+                                      for i in range(3)])
+        node_status_cache.put('1.1.1.0', value=status(100))
+        node_status_cache.put('1.1.1.1', value=status(101))
+        node_status_cache.put('1.1.1.2', error=Exception('Timeout'))
+        context = Mock()
+        context.bot_data = {'network_health_status': NetworkHealthStatus.OPTIMAL}
+
+        with patch('service.thorchain_network_service.fetch_node_status') as mock_fetch_node_status:
+            summary = get_network_summary(context, node_accounts)
+
+        mock_fetch_node_status.assert_not_called()
+        self.assertIn('Block height: *101*', summary)
+        self.assertIn('Network Security: *Optimal*', summary)
+
     @patch('jobs.thorchain_network_jobs.get_network_data')
     @patch('jobs.thorchain_network_jobs.get_network_security_ratio')
     def test_check_network_security(self, mock_get_network_security_ratio, mock_get_network_data):
@@ -302,3 +482,249 @@ class JobTests(unittest.TestCase):
         mock_try_message_to_all_users.assert_called_with(self.context,
                                                          text="🔄 CHURN SUMMARY\nTHORChain has successfully churned:\n\nNodes Added:\n*127.0.0.1*\nBond: *0.0000 RUNE*\n\nSystem:\n📡 Network Security: *NetworkHealthStatus.INSECURE*\n\n💚 Total Active Bond: *0.0000 RUNE* (total)\n\n⚖️ Bonded/Staked Ratio: *9.00 %*\n\n↩️ Bonding ROI: *10001.00 %* APY\n\n↩️ Liquidity ROI: *9901.00 %* APY\n\n⚠️ 🚨 CHURNING BUT THE VAULT ADDRESSES DID NOT CHANGE 🚨\n")
 
+    @patch('jobs.monitoring_scheduler.check_thornode')
+    @patch('jobs.monitoring_scheduler.check_versions_status')
+    @patch('jobs.monitoring_scheduler.probe_node_async')
+    @patch('jobs.monitoring_scheduler.get_node_accounts')
+    def test_monitoring_scheduler_tick(self, mock_get_node_accounts, mock_probe_node_async,
+                                       mock_check_versions_status, mock_check_thornode):
+        node = {'node_address': 'thor1', 'ip_address': '1.2.3.4', 'status': 'active', 'bond': '1', 'slash_points': '0',
+                'version': '0.1.0'}
+        remote_node = dict(node, version='0.2.0')
+        mock_get_node_accounts.return_value = NodeAccounts([remote_node])
+        context = Mock()
+        context.dispatcher.chat_data = {
+            1: {'job_started': True, 'nodes': {'thor1': MonitoredThornode.from_node_account(node, alias='Thor-1')}},
+            2: {'job_started': True, 'nodes': {'thor1': MonitoredThornode.from_node_account(node, alias='Thor-1')}},
+            3: {'nodes': {'thor2': MonitoredThornode.from_node_account(dict(node, ip_address='5.6.7.8'), alias='a')}}
+        }
+        ThornodeSubscriptionsDao().rebuild(context.dispatcher.chat_data)
+        scheduler = MonitoringScheduler(interval_in_seconds=30)
+
+        scheduler.tick(context)
+
+        mock_probe_node_async.assert_awaited_once_with('1.2.3.4')
+        self.assertEqual(sorted(c.args[1] for c in mock_check_thornode.call_args_list), [1, 2])
+        self.assertEqual(scheduler.last_tick_missed_probes, 0)
+        for c in mock_check_thornode.call_args_list:
+            self.assertEqual(c.args[3:], ('thor1', remote_node))
+        self.assertEqual([c.args[3] for c in mock_check_versions_status.call_args_list], ['0.2.0', '0.2.0'])
+        self.assertEqual(scheduler.tick_count, 1)
+        self.assertIsNotNone(scheduler.last_tick_duration)
+        self.assertIsNone(scheduler.last_tick_lag)
+
+        scheduler.tick(context)
+        self.assertEqual(scheduler.last_tick_lag, 0.0)
+
+    @patch('jobs.monitoring_scheduler.check_thornode')
+    @patch('jobs.monitoring_scheduler.check_versions_status')
+    @patch('jobs.monitoring_scheduler.probe_node_async')
+    @patch('jobs.monitoring_scheduler.get_node_accounts', return_value=NodeAccounts([]))
+    def test_monitoring_scheduler_skips_malformed_nodes(self, _, __, ___, mock_check_thornode):
+        context = Mock()
+        context.dispatcher.chat_data = {
+            1: {'job_started': True, 'nodes': {'thor1': {'status': 'active'}}},
+            2: {'job_started': True, 'nodes': {'thor1': MonitoredThornode('thor1', 'Thor-1', 'active', '1', '0',
+                                                                          '1.2.3.4', '0.1.0')}}
+        }
+        ThornodeSubscriptionsDao().rebuild(context.dispatcher.chat_data)
+
+        MonitoringScheduler(interval_in_seconds=30).tick(context)
+
+        self.assertEqual([c.args[1] for c in mock_check_thornode.call_args_list], [2])
+
+    def test_monitoring_scheduler_fetches_the_node_accounts_every_tick(self):
+        clock = [1000.0]
+
+        def fetch_node_accounts(url_path):
+            # The download takes a second, the snapshot is stamped when it is done
+            clock[0] += 1
+            return []
+
+        context = Mock()
+        context.dispatcher.chat_data = {}
+        scheduler = MonitoringScheduler(interval_in_seconds=JOB_INTERVAL_IN_SECONDS)
+        node_accounts_snapshot.invalidate()
+
+        with patch('service.thorchain_network_service.get_request_json_thorchain',
+                   side_effect=fetch_node_accounts) as mock_get_request_json_thorchain, \
+                patch('time.monotonic', side_effect=lambda: clock[0]):
+            for _ in range(3):
+                scheduler.tick(context)
+                clock[0] += JOB_INTERVAL_IN_SECONDS - 1
+
+        self.assertEqual(mock_get_request_json_thorchain.call_count, 3)
+        node_accounts_snapshot.invalidate()
+
+    def test_monitored_thornode_migration_keeps_chat_fields_only(self):
+        legacy_node = dict(node_mock, alias='My Node', healthy=False, notification_timeout_in_seconds=22.5,
+                           last_notification_timestamp=1.0)
+
+        node = MonitoredThornode.migrate(legacy_node)
+
+        self.assertIs(MonitoredThornode.migrate(node), node)
+        self.assertEqual((node.alias, node.healthy, node.notification_timeout_in_seconds), ('My Node', False, 22.5))
+        self.assertEqual((node.status, node.bond, node.version), (node_mock['status'], node_mock['bond'], '0.7.2'))
+        self.assertEqual(pickle.loads(pickle.dumps(node)).__getstate__(), node.__getstate__())
+        self.assertLess(len(pickle.dumps(node)) * 10, len(pickle.dumps(legacy_node)))
+
+    @patch('service.setup.ALLOWED_USER_IDS', 'ALL')
+    @patch('service.setup.get_node_accounts', side_effect=Exception('Node accounts unavailable'))
+    def test_legacy_nodes_are_migrated_even_if_node_accounts_are_unavailable(self, _):
+        dispatcher = Mock()
+        dispatcher.chat_data = {1: {'nodes': {node_mock['node_address']: dict(node_mock, alias='My Node')}}}
+
+        setup_existing_users(dispatcher)
+
+        node = dispatcher.chat_data[1]['nodes'][node_mock['node_address']]
+        self.assertIsInstance(node, MonitoredThornode)
+        self.assertEqual(node.alias, 'My Node')
+        self.assertEqual(ThornodeSubscriptionsDao().get_chat_ids(node_mock['node_address']), {1})
+
+    @patch('models.nodes.rpc_batch_request')
+    def test_bitcoin_like_nodes_probe_in_one_batch_request(self, mock_rpc_batch_request):
+        response = Mock(status_code=200, ok=True)
+        response.json.return_value = [{'id': 1, 'result': 101, 'error': None},
+                                      {'id': 0, 'result': {'blocks': 101, 'headers': 105}, 'error': None}]
+        mock_rpc_batch_request.return_value = response
+        node = LiteCoinNode('user:password@1.2.3.4:9332')
+
+        probe = node.probe()
+        self.assertIs(node.probe(), probe)
+        self.assertEqual(probe[:4], (True, 101, 105, False))
+        self.assertIsNone(probe.error)
+        mock_rpc_batch_request.assert_called_once()
+
+        unauthorized_node = BitcoinNode('user:wrong@1.2.3.4:8332')
+        mock_rpc_batch_request.return_value = Mock(status_code=401, ok=False)
+        self.assertIsInstance(unauthorized_node.probe().error, UnauthorizedException)
+        self.assertIn("401 - Unauthorized", check_block_height_increase(self.context, unauthorized_node))
+
+    def test_other_nodes_prober_skips_slow_nodes(self):
+        def create_node(network_name, delay):
+            node = Mock(spec=Node)
+            node.network_name = network_name
+            node.to_string.return_value = f"{network_name} node"
+            node.probe.side_effect = lambda get_network_block_height: time.sleep(delay)
+            node.is_probe_fresh.return_value = False
+            node.fetch_network_block_height.return_value = None
+            return node
+
+        fast_node = create_node("Bitcoin", 0)
+        slow_node = create_node("Bitcoin", 1)
+        other_chain_node = create_node("Ethereum", 0)
+        prober = OtherNodesProber(concurrency_per_chain=1, deadline_in_seconds=0.2)
+
+        probed_nodes = list(prober.probe([slow_node, fast_node, other_chain_node]))
+
+        # The slow Bitcoin node blocks the only Bitcoin worker, but not the Ethereum one
+        self.assertEqual(probed_nodes, [other_chain_node])
+        self.assertEqual(prober.last_missed_probes, 2)
+
+    @patch('models.nodes.get_binance_network_block_count', return_value='1000')
+    @patch('models.nodes.get_binance_node_sync_state', return_value=(990, True))
+    def test_other_nodes_prober_fetches_the_network_block_height_once_per_chain(self, _,
+                                                                                 mock_get_binance_network_block_count):
+        nodes = [BinanceNode(f'2.2.2.{i}') for i in range(3)]
+        prober = OtherNodesProber(concurrency_per_chain=3, deadline_in_seconds=2)
+
+        self.assertEqual(len(list(prober.probe(nodes))), 3)
+        self.assertEqual(len(list(prober.probe(nodes))), 3)
+
+        mock_get_binance_network_block_count.assert_called_once()
+        self.assertEqual([node.probe()[:4] for node in nodes], [(True, 990, 1000, False)] * 3)
+
+    @patch('models.nodes.get_binance_node_sync_state', return_value=(990, True))
+    def test_other_nodes_prober_does_not_wait_for_a_slow_network_block_height(self, _):
+        prober = OtherNodesProber(concurrency_per_chain=3, deadline_in_seconds=0.4)
+        with patch('models.nodes.get_binance_network_block_count', return_value='1000'):
+            self.assertEqual(len(list(prober.probe([BinanceNode('2.2.3.1')]))), 1)
+
+        nodes = [BinanceNode(f'2.2.4.{i}') for i in range(2)]
+        with patch('models.nodes.get_binance_network_block_count', side_effect=lambda: time.sleep(1) or '1001'):
+            started_at = time.monotonic()
+            self.assertEqual(len(list(prober.probe(nodes))), 2)
+            self.assertLess(time.monotonic() - started_at, 0.4)
+
+        # The probes use the last known network block height
+        self.assertEqual([node.probe()[:4] for node in nodes], [(True, 990, 1000, False)] * 2)
+
+    def test_block_height_increase_jobs_are_staggered_per_chain(self):
+        nodes = [BitcoinNode(f'user:password@1.1.1.{i}:8332') for i in range(4)] + [BinanceNode('2.2.2.2')]
+        job_queue = Mock()
+
+        schedule_block_height_increase_jobs(job_queue, nodes)
+
+        schedule = {c.kwargs['context']: c.kwargs['when'] for c in job_queue.run_once.call_args_list}
+        self.assertEqual([schedule[node] for node in nodes[:4]], [0, 900, 1800, 2700])
+        self.assertEqual(schedule[nodes[4]], 0)
+
+    @patch('models.nodes.ETHEREUM_HEAD_SUBSCRIPTIONS', True)
+    @patch('models.nodes.get_eth_node_sync_state', return_value=(100, 100, True))
+    def test_ethereum_height_checks_use_the_chain_cadence_without_an_open_subscription(self, _):
+        node = EthereumNode('3.3.3.3')
+        context = Mock(bot_data={})
+        context.job.context = node
+
+        check_block_height_increase_job(context)
+
+        # The polled height only has to increase within the time of the chain
+        context.job_queue.run_once.assert_called_once_with(check_block_height_increase_job, when=120, context=node,
+                                                           name=f"block_height_increase-{node.node_id}")
+        head = TrackedBlock(height=100, time=time.time(), received_at=time.monotonic())
+        with patch.object(ethereum_head_tracker, 'get_head', return_value=head):
+            self.assertEqual(node.block_height_check_interval_in_seconds, NODE_PROBE_MAX_AGE_IN_SECONDS)
+
+        # A polled height right after the subscription dropped is not compared with the last pushed one
+        pushing_node = Mock(spec=Node)
+        pushing_node.node_id = "dropping_node"
+        pushing_node.probe.return_value = NodeProbe(healthy=True, block_height=100, is_stalled=False)
+        self.assertIsNone(check_block_height_increase(context, pushing_node))
+        pushing_node.probe.return_value = NodeProbe(healthy=True, block_height=100)
+        self.assertIsNone(check_block_height_increase(context, pushing_node))
+        message = check_block_height_increase(context, pushing_node)
+        self.assertIn("Block height is not increasing anymore".lower(), message.lower())
+
+    def test_thornode_subscriptions(self):
+        subscriptions = ThornodeSubscriptionsDao()
+        subscriptions.rebuild({1: {'nodes': {'thor1': {}, 'thor2': {}}}, 2: {'nodes': {'thor1': {}}}, 3: {}})
+        self.assertEqual(subscriptions.get_chat_ids('thor1'), {1, 2})
+        self.assertEqual(subscriptions.get_chat_ids('thor2'), {1})
+
+        subscriptions.subscribe(3, 'thor2')
+        subscriptions.unsubscribe(1, 'thor2')
+        self.assertEqual(subscriptions.get_chat_ids('thor2'), {3})
+
+        subscriptions.unsubscribe_chat(3, ['thor2'])
+        self.assertEqual(dict(subscriptions.get_subscriptions()), {'thor1': {1, 2}})
+
+    @patch('jobs.monitoring_scheduler.check_thornode')
+    @patch('jobs.monitoring_scheduler.check_versions_status')
+    @patch('jobs.monitoring_scheduler.probe_node_async')
+    @patch('jobs.monitoring_scheduler.get_node_accounts', return_value=NodeAccounts([]))
+    def test_monitoring_scheduler_does_not_wait_for_slow_nodes(self, _, mock_probe_node_async, __,
+                                                               mock_check_thornode):
+
+        async def probe_node(node_ip):
+            if node_ip == 'slow':
+                await asyncio.sleep(1)
+
+        mock_probe_node_async.side_effect = probe_node
+        context = Mock()
+        context.dispatcher.chat_data = {
+            1: {
+                'job_started': True,
+                'nodes': {
+                    'thor1': MonitoredThornode('thor1', 'Thor-1', 'active', '1', '0', 'slow', '0.1.0'),
+                    'thor2': MonitoredThornode('thor2', 'Thor-2', 'active', '1', '0', 'fast', '0.1.0')
+                }
+            }
+        }
+        ThornodeSubscriptionsDao().rebuild(context.dispatcher.chat_data)
+        scheduler = MonitoringScheduler(interval_in_seconds=30, probe_concurrency=2, probe_deadline_in_seconds=0.2)
+
+        scheduler.tick(context)
+
+        self.assertEqual(scheduler.last_tick_missed_probes, 1)
+        checks = {c.args[3]: c.kwargs['check_health'] for c in mock_check_thornode.call_args_list}
+        self.assertEqual(checks, {'thor1': False, 'thor2': True})
@@ -4,6 +4,7 @@ import unittest
 from constants.globals import SLASH_POINTS_NOTIFICATION_THRESHOLD_DEFAULT
 from handlers.settings_handlers import set_slash_points_threshold
 from jobs.thorchain_node_jobs import build_notification_message_for_active_node
+from models.monitored_thornode import MonitoredThornode
 from service.utils import get_slash_points_threshold
 from unit_tests.helpers import ContextMock, node_mock, JobContextMock
 
@@ -30,7 +31,7 @@ class ThresholdTest(unittest.TestCase):
 
     def test_slash_points_notification(self):
         context = JobContextMock()
-        local_node = copy.deepcopy(node_mock)
+        local_node = MonitoredThornode.from_node_account(node_mock, alias='Thor-1')
         remote_node = copy.deepcopy(node_mock)
 
         message = build_notification_message_for_active_node(local_node, remote_node, context)
@@ -43,14 +44,14 @@ class ThresholdTest(unittest.TestCase):
         message = build_notification_message_for_active_node(local_node, remote_node, context)
         self.assertIn(f"Slash Points: {old_slash_points} ➡️ {remote_node['slash_points']}", message)
 
-        local_node = copy.deepcopy(remote_node)
+        local_node = MonitoredThornode.from_node_account(remote_node, alias='Thor-1')
         new_threshold = 5
         set_slash_points_threshold(new_threshold, context)
         remote_node['slash_points'] = str(int(remote_node['slash_points']) + new_threshold)
         message = build_notification_message_for_active_node(local_node, remote_node, context)
         self.assertIsNone(message)
 
-        local_node = copy.deepcopy(remote_node)
+        local_node = MonitoredThornode.from_node_account(remote_node, alias='Thor-1')
         new_threshold = 5
         set_slash_points_threshold(new_threshold, context)
         old_slash_points = int(remote_node['slash_points'])